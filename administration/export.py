@@ -0,0 +1,76 @@
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
+
+
+class Echo:
+    """File-like object whose `write` returns the value instead of storing it, for `csv.writer`."""
+
+    def write(self, value):
+        return value
+
+
+class TaskExportMixin:
+    """
+    Streaming output for task viewsets.
+
+    Adds an `export/` action (NDJSON or CSV) and streams `?page=all`, walking the
+    filtered queryset with `iterator()` and serializing one chunk at a time,
+    so memory use doesn't depend on the number of tasks.
+    """
+    export_chunk_size = 500
+    export_content_types = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('page') == 'all':
+            queryset = self.filter_queryset(self.get_queryset())
+            return StreamingHttpResponse(self.stream_json(queryset), content_type='application/json')
+        return super().list(request, *args, **kwargs)
+
+    @action(detail=False)
+    def export(self, request):
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in self.export_content_types:
+            raise ParseError("Invalid export format.")
+
+        queryset = self.filter_queryset(self.get_queryset())
+        stream = self.stream_csv(queryset) if export_format == 'csv' else self.stream_ndjson(queryset)
+        response = StreamingHttpResponse(stream, content_type=self.export_content_types[export_format])
+        response['Content-Disposition'] = f'attachment; filename="tasks.{export_format}"'
+        return response
+
+    def iter_serialized(self, queryset):
+        chunk = []
+        for task in queryset.iterator(chunk_size=self.export_chunk_size):
+            chunk.append(task)
+            if len(chunk) == self.export_chunk_size:
+                yield from self.get_serializer(chunk, many=True).data
+                chunk = []
+        if chunk:
+            yield from self.get_serializer(chunk, many=True).data
+
+    def stream_json(self, queryset):
+        yield f'{{"count": {queryset.count()}, "tasks": ['
+        for i, row in enumerate(self.iter_serialized(queryset)):
+            yield (',' if i else '') + json.dumps(row)
+        yield ']}'
+
+    def stream_ndjson(self, queryset):
+        for row in self.iter_serialized(queryset):
+            yield json.dumps(row) + '\n'
+
+    def stream_csv(self, queryset):
+        writer = csv.writer(Echo())
+        header = list(self.get_serializer().fields)
+        yield writer.writerow(header)
+        for row in self.iter_serialized(queryset):
+            yield writer.writerow(
+                json.dumps(row[name]) if isinstance(row.get(name), (dict, list)) else row.get(name)
+                for name in header
+            )
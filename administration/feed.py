@@ -0,0 +1,55 @@
+"""
+Wake-ups for the task change feed.
+
+Every commit of task changes increments a counter in the cache. Long-polling
+requests wait on a condition, which is notified straight away within the
+process, and re-read the counter every `TASK_FEED_POLL_SECONDS`, which picks up
+changes made by other processes when the cache is shared. The counter only
+tells that something was committed, not what: the feed reads the changes from
+the database. A waiting request doesn't touch the database.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+CACHE_KEY = 'task-feed-commits'
+
+_changed = threading.Condition()
+
+
+def notify():
+    """Publish a commit of task changes and wake the requests waiting in this process."""
+    try:
+        cache.incr(CACHE_KEY)
+    except ValueError:
+        # No counter yet, or it was evicted; another process may be adding it too.
+        if not cache.add(CACHE_KEY, 1, None):
+            cache.incr(CACHE_KEY)
+    with _changed:
+        _changed.notify_all()
+
+
+def latest():
+    """The commit counter, to pass to `wait_for_change()` before reading the changes."""
+    return cache.get(CACHE_KEY, 0)
+
+
+def wait_for_change(since, timeout):
+    """
+    Block until a commit is published after `latest()` returned `since`, or `timeout` seconds pass.
+
+    Returns:
+        bool: Whether a commit was published.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        # Not `>`: a counter evicted from the cache starts again from 1.
+        if latest() != since:
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        with _changed:
+            _changed.wait(min(remaining, settings.TASK_FEED_POLL_SECONDS))
@@ -0,0 +1,55 @@
+from django.core import exceptions
+from django.db import models
+
+
+class TaskTitleField(models.SmallIntegerField):
+    """
+    Store a task title as a small integer code.
+
+    Python code, forms and serializers keep working with the title strings:
+    values are converted to their code on the way to the database, so lookups
+    such as `title="create a visa"` or `title__in=[...]` run on the integer column,
+    and converted back to the title when loaded.
+
+    Args:
+        codes (dict): Mapping of each title to its code. Codes must never be reused.
+    """
+
+    def __init__(self, *args, codes=None, **kwargs):
+        self.codes = dict(codes or {})
+        self.titles = {code: title for title, code in self.codes.items()}
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['codes'] = self.codes
+        return name, path, args, kwargs
+
+    @property
+    def validators(self):
+        # Titles are strings, the integer range validators only apply to the stored codes.
+        return [*self.default_validators, *self._validators]
+
+    def get_prep_value(self, value):
+        if isinstance(value, str):
+            if value not in self.codes:
+                raise ValueError(f"Unknown task title {value!r}.")
+            return self.codes[value]
+        return super().get_prep_value(value)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.titles.get(value, value)
+
+    def to_python(self, value):
+        if value is None or value in self.codes:
+            return value
+        try:
+            return self.titles[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise exceptions.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
@@ -1,6 +1,6 @@
 import django_filters
 
-from .models import Task
+from .models import CATEGORY_VISA, Task
 from rest_framework.exceptions import ParseError
 from .utils import TITLE_NAMES
 
@@ -15,7 +15,7 @@ class TaskFilter(django_filters.FilterSet):
 
     def filter_by_title(self, queryset, name, value):
         if value == "visa":
-            return queryset.filter(**{name + '__contains': value})
+            return queryset.filter(category=CATEGORY_VISA)
         if ' ' in value:
             raise ParseError("Spaces are not allowed in the title filter.")
         value = value.replace('-', ' ')
@@ -0,0 +1,282 @@
+"""
+Staff handlers of the tasks, registered by task title.
+
+A handler approves one kind of request for both the API and the HTML staff views:
+`documents()` builds the new documents the staff completes, `validate()` checks the
+task can be approved and `apply()` writes the approval in the transaction that moves
+the task out of pending. The task is loaded with the user and their documents in one
+query, so handlers read related rows without further queries.
+
+Replaced documents are deleted, with their visas and photos, by a background job
+enqueued in the approval transaction.
+"""
+from abc import ABC, abstractmethod
+from datetime import date
+from inspect import isabstract
+
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from passports.models import ForeignPassport, Passport, Visa
+from .jobs import enqueue
+from .models import Task
+
+# Relations of a task read by its handler: the user with their documents, and the
+# address or the visa the request refers to.
+TASK_RELATED = ('user__passport', 'user__foreign_passport', 'user__address', 'address', 'visa')
+
+TASK_HANDLERS = {}
+
+
+class TaskError(Exception):
+    """The task can't be approved in the current state of the user's documents."""
+
+
+def register(*titles):
+    """
+    Register a handler class for the tasks with the given titles.
+
+    Raises:
+        TypeError: If the class doesn't implement `apply()`.
+    """
+    def decorator(handler_class):
+        if isabstract(handler_class):
+            raise TypeError(f"{handler_class.__name__} doesn't implement apply().")
+        handler_class.titles = titles
+        for title in titles:
+            TASK_HANDLERS[title] = handler_class
+        return handler_class
+    return decorator
+
+
+def get_handler(task_pk):
+    """
+    Load a task with everything its handler reads in one query.
+
+    Raises:
+        Http404: If the task doesn't exist.
+    """
+    task = get_object_or_404(Task.objects.select_related(*TASK_RELATED), pk=task_pk)
+    return TASK_HANDLERS[task.title](task)
+
+
+class TaskHandler(ABC):
+    """Approval of the tasks with the titles the class is registered for."""
+    titles = ()
+
+    def __init__(self, task):
+        self.task = task
+        self.user = task.user
+
+    def validate(self):
+        """
+        Raises:
+            TaskError: If the task can't be approved.
+            Http404: If an object the task refers to no longer exists.
+        """
+
+    def documents(self):
+        """
+        Returns:
+            dict: Unsaved new documents to be completed by the staff, by the name `apply()` takes them.
+        """
+        return {}
+
+    @abstractmethod
+    def apply(self, **documents):
+        """Write the approval, given the completed `documents()`."""
+
+    def approve(self, staff, **documents):
+        """
+        Approve the task and apply it in one transaction.
+
+        Returns:
+            bool: Whether the task was still pending and has been approved.
+        """
+        with transaction.atomic():
+            if not Task.objects.set_status(self.task, 1, staff):
+                return False
+            self.apply(**documents)
+        return True
+
+    def reject(self, staff):
+        """
+        Returns:
+            bool: Whether the task was still pending and has been rejected.
+        """
+        return Task.objects.set_status(self.task, 2, staff)
+
+    def new_passport(self, model):
+        return model(photo=self.task.user_data.get("photo"))
+
+
+@register("create an internal passport")
+class CreateInternalPassportHandler(TaskHandler):
+    def validate(self):
+        if self.task.address is None:
+            raise Http404("No Address matches the given query.")
+
+    def documents(self):
+        return {'passport': self.new_passport(Passport)}
+
+    def apply(self, passport):
+        passport.save(force_insert=True)
+        self.user.passport = passport
+        self.user.address = self.task.address
+        self.user.save(update_fields=['passport', 'address'])
+
+
+@register("create a foreign passport")
+class CreateForeignPassportHandler(TaskHandler):
+    def documents(self):
+        return {'foreign_passport': self.new_passport(ForeignPassport)}
+
+    def apply(self, foreign_passport):
+        foreign_passport.save(force_insert=True)
+        self.user.foreign_passport = foreign_passport
+        self.user.save(update_fields=['foreign_passport'])
+
+
+@register("restore an internal passport due to loss", "restore an internal passport due to expiry")
+class RestoreInternalPassportHandler(TaskHandler):
+    def validate(self):
+        if self.user.passport is None:
+            raise TaskError("The user has no internal passport.")
+
+    def documents(self):
+        return {'passport': self.new_passport(Passport)}
+
+    def apply(self, passport):
+        old_passport = self.user.passport
+        passport.save(force_insert=True)
+        self.user.passport = passport
+        self.user.save(update_fields=['passport'])
+        enqueue('delete_documents', passports=[old_passport.pk])
+
+
+@register("restore a foreign passport due to loss", "restore a foreign passport due to expiry")
+class RestoreForeignPassportHandler(TaskHandler):
+    def validate(self):
+        if self.user.foreign_passport is None:
+            raise TaskError("The user has no foreign passport.")
+
+    def documents(self):
+        return {'foreign_passport': self.new_passport(ForeignPassport)}
+
+    def apply(self, foreign_passport):
+        old_passport = self.user.foreign_passport
+        foreign_passport.save(force_insert=True)
+        self.user.foreign_passport = foreign_passport
+        self.user.save(update_fields=['foreign_passport'])
+        enqueue('delete_documents', foreign_passports=[old_passport.pk])
+
+
+@register("change user name", "change user surname", "change user patronymic")
+class ChangeUserFieldHandler(TaskHandler):
+    """Change a name of the user and reissue their passports with it."""
+
+    def __init__(self, task):
+        super().__init__(task)
+        self.field_name = task.title.rsplit(' ', 1)[1]
+        self.new_value = task.user_data.get(self.field_name)
+
+    def validate(self):
+        if not self.new_value:
+            raise TaskError(f"The task has no new {self.field_name}.")
+        if self.user.passport is None:
+            raise TaskError("The user has no internal passport.")
+
+    def documents(self):
+        documents = {'passport': self.new_passport(Passport)}
+        if self.user.foreign_passport:
+            documents['foreign_passport'] = self.new_passport(ForeignPassport)
+        return documents
+
+    def apply(self, passport, foreign_passport=None):
+        replaced = {'passports': [self.user.passport.pk]}
+        passport.save(force_insert=True)
+        self.user.passport = passport
+        setattr(self.user, self.field_name, self.new_value)
+        update_fields = [self.field_name, 'passport']
+        if foreign_passport:
+            replaced['foreign_passports'] = [self.user.foreign_passport.pk]
+            foreign_passport.save(force_insert=True)
+            self.user.foreign_passport = foreign_passport
+            update_fields.append('foreign_passport')
+        self.user.save(update_fields=update_fields)
+        enqueue('delete_documents', **replaced)
+
+
+@register("change registation address")
+class ChangeAddressHandler(TaskHandler):
+    def validate(self):
+        if self.task.address is None:
+            raise Http404("No Address matches the given query.")
+
+    def apply(self):
+        self.user.address = self.task.address
+        self.user.save(update_fields=['address'])
+
+
+@register("create a visa")
+class CreateVisaHandler(TaskHandler):
+    def validate(self):
+        if self.user.foreign_passport is None:
+            raise TaskError("The user has no foreign passport.")
+
+    def documents(self):
+        return {'visa': Visa(
+            photo=self.task.user_data.get("photo"),
+            type=self.task.user_data.get("visa_type"),
+            country=self.task.visa_country,
+            entry_amount=self.task.user_data.get("visa_entry_amount"),
+            foreign_passport=self.user.foreign_passport
+        )}
+
+    def apply(self, visa):
+        # A new visa replaces the active one of the same kind.
+        Visa.objects.filter(
+            foreign_passport=visa.foreign_passport,
+            type=visa.type,
+            country=visa.country,
+            entry_amount=visa.entry_amount,
+            is_active=True
+        ).update(is_active=False)
+        visa.save(force_insert=True)
+
+
+@register("extend a visa")
+class ExtendVisaHandler(TaskHandler):
+    def validate(self):
+        if self.task.visa is None:
+            raise Http404("No Visa matches the given query.")
+
+    def apply(self):
+        visa = self.task.visa
+        visa.date_of_expiry = date.fromisoformat(self.task.user_data.get("visa_extension_date"))
+        visa.save(update_fields=['date_of_expiry'])
+
+
+@register("restore a visa due to loss")
+class RestoreVisaHandler(TaskHandler):
+    def validate(self):
+        if self.task.visa is None:
+            raise Http404("No Visa matches the given query.")
+
+    def documents(self):
+        old_visa = self.task.visa
+        return {'visa': Visa(
+            photo=self.task.user_data.get("photo"),
+            type=old_visa.type,
+            country=old_visa.country,
+            entry_amount=old_visa.entry_amount,
+            foreign_passport=self.user.foreign_passport,
+            date_of_expiry=old_visa.date_of_expiry
+        )}
+
+    def apply(self, visa):
+        old_visa = self.task.visa
+        old_visa.is_active = False
+        old_visa.save(update_fields=['is_active'])
+        visa.save(force_insert=True)
@@ -0,0 +1,132 @@
+"""
+Database-backed background jobs.
+
+Side effects that don't have to happen within a request, such as deleting
+replaced documents and their photo files or generating the size variants of
+uploaded photos, are enqueued as `Job` rows in the
+request's transaction and run by `manage.py runworker`. A job function must be
+idempotent: a job is run again if its worker dies before committing it.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from passports.models import ForeignPassport, Passport, Visa
+from passports.photos import delete_photo, make_variants
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JOBS = {}
+
+
+def job(func=None, *, max_attempts=None):
+    """Register a job function under its name, optionally with its own number of attempts."""
+    def decorator(func):
+        func.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+        JOBS[func.__name__] = func
+        return func
+    return decorator(func) if func else decorator
+
+
+def enqueue(name, **payload):
+    """
+    Create a job calling the registered function `name` with the JSON-serializable
+    `payload` as keyword arguments. Call it in the transaction of the change the
+    job follows up.
+    """
+    return Job.objects.create(name=name, payload=payload, max_attempts=JOBS[name].max_attempts)
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt of a job that has failed `attempts` times."""
+    return min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_SECONDS)
+
+
+def run_next(worker):
+    """
+    Claim the next due job and run it.
+
+    The job function runs in a transaction together with the deletion of the job,
+    so its database changes are committed only if it succeeds. A failure is
+    recorded on the job and retried later, or marks the job as failed once it has
+    run out of attempts.
+
+    Returns:
+        Job | None: The job that was run, its `last_error` set if the run failed,
+        or None if no job is due.
+    """
+    job = Job.objects.claim_next(worker)
+    if job is None:
+        return None
+    try:
+        with transaction.atomic():
+            JOBS[job.name](**job.payload)
+            Job.objects.filter(pk=job.pk, locked_by=worker).delete()
+        job.last_error = ''
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s `%s` failed (attempt %s of %s).", job.pk, job.name, job.attempts, job.max_attempts,
+                       exc_info=True)
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.PENDING
+            job.run_after = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+        job.last_error = error
+        job.locked_by = ''
+        job.lease_expires_at = None
+        job.save(update_fields=['status', 'run_after', 'last_error', 'locked_by', 'lease_expires_at'])
+    return job
+
+
+def run_due(worker):
+    """
+    Run jobs until none is due; failed jobs wait for their retry.
+
+    Returns:
+        int: The number of jobs run.
+    """
+    count = 0
+    while run_next(worker):
+        count += 1
+    return count
+
+
+@job
+def delete_documents(passports=(), foreign_passports=()):
+    """
+    Delete passports the users no longer refer to, with the visas of the foreign
+    passports, and enqueue the deletion of their photos.
+    """
+    photos = []
+    for model, numbers in ((Passport, passports), (ForeignPassport, foreign_passports)):
+        documents = model.objects.filter(number__in=numbers)
+        photos += documents.values_list('photo', flat=True)
+        if model is ForeignPassport:
+            photos += Visa.objects.filter(foreign_passport__in=numbers).values_list('photo', flat=True)
+        # Visas are deleted through the collector, which clears the tasks referring to them.
+        documents.delete()
+    photos = [photo for photo in photos if photo]
+    if photos:
+        enqueue('delete_files', paths=photos)
+
+
+@job
+def delete_files(paths):
+    """Delete photos and their variants from the default storage; missing files are skipped."""
+    for path in paths:
+        delete_photo(path)
+
+
+@job
+def make_photo_variants(paths):
+    """Generate the size variants of uploaded photos; photos deleted in the meantime are skipped."""
+    for path in paths:
+        if default_storage.exists(path):
+            make_variants(path)
@@ -0,0 +1,53 @@
+import datetime
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from authentication.models import CustomUser
+
+
+class BenchmarkCommand(BaseCommand):
+    """
+    Base class for benchmark commands.
+
+    Fixtures are created inside a transaction that is always rolled back,
+    so a benchmark can be run against any database without leaving data behind.
+    """
+    repeat = 5
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=self.repeat,
+                            help='How many times each measurement is repeated.')
+
+    @contextmanager
+    def rollback(self):
+        with transaction.atomic():
+            yield
+            transaction.set_rollback(True)
+
+    def measure(self, func, repeat):
+        """Run `func` `repeat` times and return the median duration in milliseconds."""
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            durations.append((time.perf_counter() - start) * 1000)
+        return statistics.median(durations)
+
+    def create_user(self, **extra_fields):
+        fields = {
+            'email': f'benchmark-{uuid.uuid4().hex}@test.com',
+            'name': 'Benchmark',
+            'surname': 'Benchmark',
+            'patronymic': 'Benchmark',
+            'sex': 'F',
+            'date_of_birth': datetime.date(1990, 1, 1),
+            'place_of_birth': 'Kharkiv',
+            'nationality': 'UA',
+        }
+        fields.update(extra_fields)
+        return CustomUser.objects.create(**fields)
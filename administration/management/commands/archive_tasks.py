@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from administration.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Move completed and rejected tasks older than the given number of days to the task archive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='Archive finished tasks created this many days ago or earlier.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tasks moved per transaction.')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        total = 0
+        while moved := Task.objects.archive_batch(before, options['batch_size']):
+            total += moved
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Archived {total} tasks...')
+        self.stdout.write(f'Archived {total} task(s) created before {before:%Y-%m-%d %H:%M}.')
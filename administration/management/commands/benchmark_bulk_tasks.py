@@ -0,0 +1,68 @@
+import time
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from administration.management.benchmark import BenchmarkCommand
+from administration.models import TITLE_CATEGORIES, Task
+from administration.rest_views import (BulkChangeUserAddressAPIView, BulkRejectTaskAPIView,
+                                       ChangeUserAddressAPIView, RejectTaskAPIView)
+from passports.models import Address
+
+
+class Command(BenchmarkCommand):
+    help = 'Compare processing tasks one request at a time with the bulk reject and address approval endpoints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000, help='Number of tasks processed by each run.')
+
+    def handle(self, *args, **options):
+        count = options['tasks']
+        factory = APIRequestFactory()
+        self.stdout.write(f'{count} tasks')
+        self.stdout.write(f'{"action":>16} {"single, ms":>12} {"bulk, ms":>12}')
+
+        for action, title, single_view, bulk_view in (
+            ('reject', 'change user name', RejectTaskAPIView.as_view(), BulkRejectTaskAPIView.as_view()),
+            ('change address', 'change registation address',
+             ChangeUserAddressAPIView.as_view(), BulkChangeUserAddressAPIView.as_view()),
+        ):
+            with self.rollback():
+                admin = self.create_user(is_staff=True)
+                ids = self.create_tasks(title, count)
+
+                def single():
+                    for pk in ids:
+                        request = factory.patch('/', HTTP_HOST='localhost')
+                        force_authenticate(request, user=admin)
+                        single_view(request, task_pk=pk)
+                single_ms = self.timed(single)
+
+                Task.objects.filter(pk__in=ids).update(status=0)
+
+                def bulk():
+                    for start in range(0, count, 1000):
+                        request = factory.patch('/', {'ids': ids[start:start + 1000]}, format='json')
+                        force_authenticate(request, user=admin)
+                        bulk_view(request)
+                bulk_ms = self.timed(bulk)
+
+                processed = Task.objects.filter(pk__in=ids).exclude(status=0).count()
+                if processed != count:
+                    self.stderr.write(f'{action}: only {processed} of {count} tasks were processed')
+                self.stdout.write(f'{action:>16} {single_ms:>12.2f} {bulk_ms:>12.2f}')
+
+    def create_tasks(self, title, count):
+        address = Address.objects.create(country_code='UA', region='Kharkiv region', settlement='Kharkiv',
+                                         street='Zoryana 48', apartments='88', post_code=61070)
+        users = [self.create_user(record_number=f'19900101-{i:05d}') for i in range(1, count + 1)]
+        tasks = Task.objects.bulk_create(
+            (Task(user=user, title=title, category=TITLE_CATEGORIES[title], status=0, user_data={}, address=address)
+             for user in users),
+            batch_size=1000
+        )
+        return [task.pk for task in tasks]
+
+    def timed(self, func):
+        start = time.perf_counter()
+        func()
+        return (time.perf_counter() - start) * 1000
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from administration.management.benchmark import BenchmarkCommand
+from administration.models import TITLE_CATEGORIES, VISA_TITLES, Task
+from administration.rest_views import TaskListAPIView
+
+
+class Command(BenchmarkCommand):
+    help = 'Measure staff queue latency with finished tasks in the task table and after archiving them.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--tasks', type=int, default=200000, help='Number of tasks, most of them finished.')
+        parser.add_argument('--pending', type=int, default=5000, help='How many of the tasks are pending.')
+
+    def handle(self, *args, **options):
+        titles = [title for title, _ in Task.TITLE_CHOICES if title not in VISA_TITLES]
+        list_view = TaskListAPIView.as_view({'get': 'list'})
+        factory = APIRequestFactory()
+
+        with self.rollback():
+            staff = self.create_user(is_staff=True)
+            users = [self.create_user(record_number=f'19900101-{i:05d}')
+                     for i in range(1, options['pending'] // len(titles) + 2)]
+            tasks = (
+                Task(user=users[i // len(titles) % len(users)], title=titles[i % len(titles)],
+                     category=TITLE_CATEGORIES[titles[i % len(titles)]],
+                     status=0 if i < options['pending'] else 1 + i % 2, user_data={})
+                for i in range(options['tasks'])
+            )
+            Task.objects.bulk_create(tasks, batch_size=2000)
+            Task.objects.exclude(status=0).update(created_at=timezone.now() - timedelta(days=365))
+
+            def list_page(params):
+                def run():
+                    cache.clear()
+                    request = factory.get('/api/staff/tasks/', params, HTTP_HOST='localhost')
+                    force_authenticate(request, user=staff)
+                    list_view(request).render()
+                return run
+
+            queries = {
+                'pending page': list_page({'status': 0}),
+                'queue page': list_page({}),
+                'count all': lambda: Task.objects.count(),
+                'claim candidate': lambda: list(
+                    Task.objects.claimable().order_by('-priority', 'created_at', 'pk').values_list('pk', flat=True)[:1]
+                ),
+            }
+
+            self.stdout.write(f'{options["tasks"]} tasks, {options["pending"]} pending')
+            before = self.measure_all(queries, options['repeat'])
+            while Task.objects.archive_batch(timezone.now() - timedelta(days=90), 5000):
+                pass
+            after = self.measure_all(queries, options['repeat'])
+
+            self.stdout.write(f'{"query":>16} {"before, ms":>12} {"after, ms":>12}')
+            for name in queries:
+                self.stdout.write(f'{name:>16} {before[name]:>12.2f} {after[name]:>12.2f}')
+
+    def measure_all(self, queries, repeat):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return {name: self.measure(func, repeat) for name, func in queries.items()}
@@ -0,0 +1,58 @@
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from administration.management.benchmark import BenchmarkCommand
+from administration.models import CATEGORY_USER_DATA, Task
+from administration.pagination import KeysetPagination, TaskPagination
+
+
+class Command(BenchmarkCommand):
+    help = 'Compare page latency of offset and keyset pagination of the staff task queue.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--depths', type=int, nargs='+', default=[1, 1000, 10000],
+                            help='Page numbers to measure.')
+        parser.add_argument('--page-size', type=int, default=TaskPagination.page_size)
+
+    def handle(self, *args, **options):
+        depths = options['depths']
+        page_size = options['page_size']
+        task_count = max(depths) * page_size
+
+        with self.rollback():
+            user = self.create_user()
+            Task.objects.bulk_create(
+                (Task(user=user, title='change user name', category=CATEGORY_USER_DATA, status=i % 3, user_data={}) for i in range(task_count)),
+                batch_size=1000
+            )
+            self.stdout.write(f'{task_count} tasks, page size {page_size}')
+            self.stdout.write(f'{"page":>8} {"offset, ms":>12} {"keyset, ms":>12}')
+
+            queryset = Task.objects.order_by('status', '-created_at')
+            ordered = queryset.order_by(*KeysetPagination.ordering)
+            for depth in depths:
+                offset_request = self.make_request({'page': depth})
+                offset_ms = self.measure(
+                    lambda: self.paginate(queryset, offset_request, page_size), options['repeat']
+                )
+
+                cursor = ''
+                if depth > 1:
+                    last_row = ordered[(depth - 1) * page_size - 1]
+                    keyset = KeysetPagination()
+                    keyset.fields = keyset.get_fields(Task)
+                    cursor = keyset.encode_position(keyset.get_position(last_row), reverse=False)
+                keyset_request = self.make_request({'cursor': cursor})
+                keyset_ms = self.measure(
+                    lambda: self.paginate(queryset, keyset_request, page_size), options['repeat']
+                )
+                self.stdout.write(f'{depth:>8} {offset_ms:>12.2f} {keyset_ms:>12.2f}')
+
+    def make_request(self, params):
+        return Request(APIRequestFactory().get('/api/staff/tasks/', params, HTTP_HOST='localhost'))
+
+    def paginate(self, queryset, request, page_size):
+        paginator = TaskPagination()
+        paginator.page_size = page_size
+        return list(paginator.paginate_queryset(queryset, request))
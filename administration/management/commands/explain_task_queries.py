@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from administration.models import Task
+from administration.pagination import KeysetPagination
+
+
+class Command(BaseCommand):
+    help = 'Print the query plans of the staff queue and duplicate-submission queries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, default=1)
+        parser.add_argument('--title', default='create an internal passport')
+
+    def handle(self, *args, **options):
+        queue = Task.objects.order_by('status', '-created_at')
+        keyset = KeysetPagination()
+        first = Task.objects.order_by(*keyset.ordering).first()
+        queries = {
+            'Staff queue, first page': queue[:5],
+            'Staff queue, pending tasks': queue.filter(status=0)[:5],
+            'Duplicate submission check': Task.objects.filter(
+                user_id=options['user_id'], title=options['title'], status=0
+            ).values('pk')[:1],
+        }
+        if first is not None:
+            keyset.fields = keyset.get_fields(Task)
+            position = keyset.get_position(first)
+            for i, condition in enumerate(keyset.seek_conditions(keyset.ordering, position), start=1):
+                queries[f'Staff queue, keyset page (part {i})'] = queue.order_by(*keyset.ordering).filter(condition)[:5]
+
+        self.stdout.write(f'Database: {connection.vendor}')
+        for name, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain())
+            self.stdout.write('')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from administration.models import TaskCounter
+
+
+class Command(BaseCommand):
+    help = 'Recount the tasks of each title and status and fix the task counters.'
+
+    def handle(self, *args, **options):
+        fixed = TaskCounter.objects.rebuild()
+        for (title, status), (old, new) in sorted(fixed.items()):
+            self.stdout.write(f'{title}, status {status}: {old} -> {new}')
+        self.stdout.write(f'Fixed {len(fixed)} counter(s).')
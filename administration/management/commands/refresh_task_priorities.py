@@ -0,0 +1,35 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from administration.models import Task
+from administration.priority import task_priority
+
+
+class Command(BaseCommand):
+    help = 'Recompute the priority of pending tasks. Run it daily, priorities grow with age and near deadlines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tasks read and updated per query.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        today = datetime.date.today()
+        pending = Task.objects.filter(status=0).select_related(
+            'user__passport', 'user__foreign_passport', 'visa'
+        ).order_by('pk')
+
+        checked = updated = 0
+        changed = []
+        for task in pending.iterator(chunk_size=batch_size):
+            checked += 1
+            priority = task_priority(task, today)
+            if priority != task.priority:
+                task.priority = priority
+                changed.append(task)
+            if len(changed) == batch_size:
+                updated += Task.objects.bulk_update(changed, ['priority'])
+                changed = []
+        if changed:
+            updated += Task.objects.bulk_update(changed, ['priority'])
+        self.stdout.write(f'Checked {checked} pending task(s), updated {updated}.')
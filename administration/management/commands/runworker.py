@@ -0,0 +1,38 @@
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from administration.jobs import run_due, run_next
+
+
+class Command(BaseCommand):
+    help = 'Run the background jobs queued in the database (see administration.jobs) until interrupted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the due jobs and exit.')
+        parser.add_argument('--sleep', type=float, default=settings.JOB_POLL_SECONDS,
+                            help='Seconds to wait when no job is due.')
+        parser.add_argument('--name', default=f'{socket.gethostname()}:{os.getpid()}',
+                            help='Worker name the claimed jobs are locked by.')
+
+    def handle(self, *args, **options):
+        worker = options['name']
+        if options['once']:
+            self.stdout.write(f'Ran {run_due(worker)} job(s).')
+            return
+
+        self.stdout.write(f'Worker {worker} started.')
+        try:
+            while True:
+                close_old_connections()
+                job = run_next(worker)
+                if job is None:
+                    time.sleep(options['sleep'])
+                elif options['verbosity'] > 1:
+                    self.stdout.write(f'{job} {"failed" if job.last_error else "done"}.')
+        except KeyboardInterrupt:
+            self.stdout.write(f'Worker {worker} stopped.')
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from administration.models import Task
+
+SIZE_QUERIES = {
+    'sqlite': """
+        SELECT name, SUM(pgsize) FROM dbstat
+        WHERE name = %(table)s OR name IN (SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %(table)s)
+        GROUP BY name
+    """,
+    'postgresql': """
+        SELECT c.relname, pg_relation_size(c.oid) FROM pg_class c
+        WHERE c.oid = %(table)s::regclass
+           OR c.oid IN (SELECT indexrelid FROM pg_index WHERE indrelid = %(table)s::regclass)
+    """,
+}
+
+
+class Command(BaseCommand):
+    help = 'Print the row count and the on-disk size of the task table and each of its indexes.'
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SIZE_QUERIES:
+            raise CommandError(f'Size report is not supported on {connection.vendor}.')
+
+        table = Task._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(SIZE_QUERIES[connection.vendor], {'table': table})
+            sizes = dict(cursor.fetchall())
+        rows = Task.objects.count()
+
+        table_size = sizes.pop(table, 0)
+        self.stdout.write(f'Rows: {rows}')
+        self.stdout.write(f'{table}: {table_size / 1024:.1f} KiB'
+                          + (f' ({table_size / rows:.1f} bytes/row)' if rows else ''))
+        for name, size in sorted(sizes.items()):
+            self.stdout.write(f'  {name}: {size / 1024:.1f} KiB')
+        self.stdout.write(f'Indexes total: {sum(sizes.values()) / 1024:.1f} KiB')
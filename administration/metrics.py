@@ -0,0 +1,45 @@
+"""
+Prometheus metrics of the task queue, exported by `django_prometheus` with the rest.
+
+Metrics are recorded once the transaction that changes the tasks commits, from
+values the write paths already hold, so collecting them adds no queries.
+"""
+from django.db import transaction
+from django.utils import timezone
+from prometheus_client import Counter, Histogram
+
+TASKS_CREATED = Counter('tasks_created_total', 'Tasks submitted by users.', ['title'])
+TASKS_APPROVED = Counter('tasks_approved_total', 'Tasks approved by staff.', ['title'])
+TASKS_REJECTED = Counter('tasks_rejected_total', 'Tasks rejected by staff.', ['title'])
+TASK_PROCESSING_SECONDS = Histogram(
+    'task_processing_seconds',
+    'Time from the submission of a task to its approval or rejection.',
+    ['title'],
+    buckets=(60, 5 * 60, 15 * 60, 60 * 60, 4 * 3600, 12 * 3600, 86400, 2 * 86400, 7 * 86400, 14 * 86400,
+             30 * 86400, float('inf')),
+)
+
+PROCESSED_COUNTERS = {1: TASKS_APPROVED, 2: TASKS_REJECTED}
+
+
+def task_created(title):
+    transaction.on_commit(lambda: TASKS_CREATED.labels(title).inc())
+
+
+def tasks_processed(status, tasks, processed_at=None):
+    """
+    Record the approval or rejection of tasks on commit.
+
+    Args:
+        status (int): The new status of the tasks.
+        tasks (list): `(title, created_at)` of each processed task.
+        processed_at (datetime): When the tasks were processed, now by default.
+    """
+    processed_at = processed_at or timezone.now()
+
+    def record():
+        for title, created_at in tasks:
+            PROCESSED_COUNTERS[status].labels(title).inc()
+            TASK_PROCESSING_SECONDS.labels(title).observe(max((processed_at - created_at).total_seconds(), 0))
+
+    transaction.on_commit(record)
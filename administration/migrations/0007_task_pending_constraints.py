@@ -0,0 +1,47 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:19
+
+import django.db.models.fields.json
+from django.conf import settings
+from django.db import migrations, models
+
+
+def reject_duplicate_pending_tasks(apps, schema_editor):
+    """Reject all but the oldest of pending tasks that the new constraints would forbid."""
+    Task = apps.get_model('administration', 'Task')
+    seen = set()
+    duplicates = []
+    for task in Task.objects.filter(status=0).order_by('created_at', 'id').iterator():
+        if task.title == 'create a visa':
+            key = (task.user_id, task.title, task.user_data.get('visa_country'))
+        elif task.title in ('extend a visa', 'restore a visa due to loss'):
+            key = (task.user_id, task.title, str(task.user_data.get('visa_id')))
+        else:
+            key = (task.user_id, task.title)
+        if key in seen:
+            duplicates.append(task.pk)
+        seen.add(key)
+    Task.objects.filter(pk__in=duplicates).update(status=2)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0006_task_task_user_title_status_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(reject_duplicate_pending_tasks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 0), models.Q(('title__in', ['create a visa', 'extend a visa', 'restore a visa due to loss']), _negated=True)), fields=('user', 'title'), name='unique_pending_task'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(models.F('user'), models.F('title'), django.db.models.fields.json.KeyTextTransform('visa_country', 'user_data'), condition=models.Q(('status', 0), ('title', 'create a visa')), name='unique_pending_visa_task'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(models.F('user'), models.F('title'), django.db.models.fields.json.KeyTextTransform('visa_id', 'user_data'), condition=models.Q(('status', 0), ('title__in', ['extend a visa', 'restore a visa due to loss'])), name='unique_pending_visa_change_task'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+from django.db import migrations
+from django.db.models import Q
+
+BATCH_SIZE = 1000
+
+
+def move_keys_to_columns(apps, schema_editor):
+    """Copy `visa_id`, `address_id` and `visa_country` from `user_data` into the new columns."""
+    Task = apps.get_model('administration', 'Task')
+    Visa = apps.get_model('passports', 'Visa')
+    Address = apps.get_model('passports', 'Address')
+
+    pks = list(Task.objects.filter(
+        Q(user_data__has_key='visa_id') | Q(user_data__has_key='address_id') | Q(user_data__has_key='visa_country')
+    ).order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), BATCH_SIZE):
+        _move_batch(Task, Visa, Address, list(Task.objects.filter(pk__in=pks[start:start + BATCH_SIZE])))
+
+
+def _move_batch(Task, Visa, Address, tasks):
+    visa_ids = {int(task.user_data['visa_id']) for task in tasks if task.user_data.get('visa_id')}
+    address_ids = {int(task.user_data['address_id']) for task in tasks if task.user_data.get('address_id')}
+    existing_visas = set(Visa.objects.filter(pk__in=visa_ids).values_list('pk', flat=True))
+    existing_addresses = set(Address.objects.filter(pk__in=address_ids).values_list('pk', flat=True))
+
+    for task in tasks:
+        # References to deleted rows stay in `user_data`, the column is left empty.
+        if task.user_data.get('visa_id') and int(task.user_data['visa_id']) in existing_visas:
+            task.visa_id = int(task.user_data.pop('visa_id'))
+        if task.user_data.get('address_id') and int(task.user_data['address_id']) in existing_addresses:
+            task.address_id = int(task.user_data.pop('address_id'))
+        if 'visa_country' in task.user_data:
+            task.visa_country = task.user_data.pop('visa_country')
+    Task.objects.bulk_update(tasks, ['user_data', 'visa', 'address', 'visa_country'])
+
+
+def move_columns_to_keys(apps, schema_editor):
+    Task = apps.get_model('administration', 'Task')
+    pks = list(Task.objects.filter(
+        Q(visa__isnull=False) | Q(address__isnull=False) | Q(visa_country__isnull=False)
+    ).order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), BATCH_SIZE):
+        tasks = list(Task.objects.filter(pk__in=pks[start:start + BATCH_SIZE]))
+        for task in tasks:
+            if task.visa_id:
+                task.user_data['visa_id'] = str(task.visa_id)
+            if task.address_id:
+                task.user_data['address_id'] = task.address_id
+            if task.visa_country:
+                task.user_data['visa_country'] = task.visa_country
+        Task.objects.bulk_update(tasks, ['user_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0008_task_visa_address_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_keys_to_columns, move_columns_to_keys),
+    ]
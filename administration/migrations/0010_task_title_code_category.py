@@ -0,0 +1,51 @@
+from django.db import migrations, models
+
+TITLES = [
+    # title, code, category
+    ('create an internal passport', 1, 1),
+    ('create a foreign passport', 2, 2),
+    ('create a visa', 3, 3),
+    ('extend a visa', 4, 3),
+    ('restore a visa due to loss', 5, 3),
+    ('restore an internal passport due to loss', 6, 1),
+    ('restore a foreign passport due to loss', 7, 2),
+    ('restore an internal passport due to expiry', 8, 1),
+    ('restore a foreign passport due to expiry', 9, 2),
+    ('change user name', 10, 4),
+    ('change user surname', 11, 4),
+    ('change user patronymic', 12, 4),
+    ('change registation address', 13, 4),
+]
+
+
+def fill_codes(apps, schema_editor):
+    Task = apps.get_model('administration', 'Task')
+    for title, code, category in TITLES:
+        Task.objects.filter(title=title).update(title_code=code, category=category)
+
+
+def fill_titles(apps, schema_editor):
+    Task = apps.get_model('administration', 'Task')
+    for title, code, category in TITLES:
+        Task.objects.filter(title_code=code).update(title=title)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0009_backfill_task_visa_address_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='title_code',
+            field=models.SmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='category',
+            field=models.SmallIntegerField(choices=[(1, 'internal passport'), (2, 'foreign passport'), (3, 'visa'), (4, 'user data')], null=True),
+        ),
+        migrations.RunPython(fill_codes, fill_titles),
+    ]
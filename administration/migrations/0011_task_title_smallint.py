@@ -0,0 +1,70 @@
+import administration.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0010_task_title_code_category'),
+        ('passports', '0003_visa_is_active_alter_visa_date_of_expiry_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='task',
+            name='unique_pending_task',
+        ),
+        migrations.RemoveConstraint(
+            model_name='task',
+            name='unique_pending_visa_task',
+        ),
+        migrations.RemoveConstraint(
+            model_name='task',
+            name='unique_pending_visa_change_task',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_user_title_status_idx',
+        ),
+        migrations.RemoveField(
+            model_name='task',
+            name='title',
+        ),
+        migrations.RenameField(
+            model_name='task',
+            old_name='title_code',
+            new_name='title',
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='title',
+            field=administration.fields.TaskTitleField(choices=[('create an internal passport', 'Створення внутрішнього паспорту'), ('create a foreign passport', 'Створення закордонного паспорту'), ('create a visa', 'Створення візи'), ('extend a visa', 'Подовження візи'), ('restore a visa due to loss', 'Відновлення візи'), ('restore an internal passport due to loss', 'Відновлення внутрішнього паспорту через втрату'), ('restore a foreign passport due to loss', 'Відновлення закордонного паспорту через втрату'), ('restore an internal passport due to expiry', 'Відновлення внутрішнього паспорту через закінчення терміну дії'), ('restore a foreign passport due to expiry', 'Відновлення закордонного паспорту через закінчення терміну дії'), ('change user name', 'Зміна імені користувача'), ('change user surname', 'Зміна прізвища користувача'), ('change user patronymic', 'Зміна по батькові користувача'), ('change registation address', 'Оновлення адреси прописки')], codes={'change registation address': 13, 'change user name': 10, 'change user patronymic': 12, 'change user surname': 11, 'create a foreign passport': 2, 'create a visa': 3, 'create an internal passport': 1, 'extend a visa': 4, 'restore a foreign passport due to expiry': 9, 'restore a foreign passport due to loss': 7, 'restore a visa due to loss': 5, 'restore an internal passport due to expiry': 8, 'restore an internal passport due to loss': 6}),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='category',
+            field=models.SmallIntegerField(choices=[(1, 'internal passport'), (2, 'foreign passport'), (3, 'visa'), (4, 'user data')]),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'title', 'status'], name='task_user_title_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['category', 'status'], name='task_category_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 0), models.Q(('title__in', ['create a visa', 'extend a visa', 'restore a visa due to loss']), _negated=True)), fields=('user', 'title'), name='unique_pending_task'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 0), ('title', 'create a visa')), fields=('user', 'title', 'visa_country'), name='unique_pending_visa_task'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 0), ('title__in', ['extend a visa', 'restore a visa due to loss'])), fields=('user', 'title', 'visa'), name='unique_pending_visa_change_task'),
+        ),
+    ]
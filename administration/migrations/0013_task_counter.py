@@ -0,0 +1,43 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:43
+
+import administration.fields
+from django.db import migrations, models
+
+
+def fill_counters(apps, schema_editor):
+    Task = apps.get_model('administration', 'Task')
+    TaskCounter = apps.get_model('administration', 'TaskCounter')
+    field = TaskCounter._meta.get_field('title')
+    counts = {
+        (row['title'], row['status']): row['n']
+        for row in Task.objects.order_by().values('title', 'status').annotate(n=models.Count('id'))
+    }
+    TaskCounter.objects.bulk_create(
+        TaskCounter(title=title, status=status, count=counts.get((title, status), 0))
+        for title in field.codes
+        for status in (0, 1, 2)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0012_task_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', administration.fields.TaskTitleField(choices=[('create an internal passport', 'Створення внутрішнього паспорту'), ('create a foreign passport', 'Створення закордонного паспорту'), ('create a visa', 'Створення візи'), ('extend a visa', 'Подовження візи'), ('restore a visa due to loss', 'Відновлення візи'), ('restore an internal passport due to loss', 'Відновлення внутрішнього паспорту через втрату'), ('restore a foreign passport due to loss', 'Відновлення закордонного паспорту через втрату'), ('restore an internal passport due to expiry', 'Відновлення внутрішнього паспорту через закінчення терміну дії'), ('restore a foreign passport due to expiry', 'Відновлення закордонного паспорту через закінчення терміну дії'), ('change user name', 'Зміна імені користувача'), ('change user surname', 'Зміна прізвища користувача'), ('change user patronymic', 'Зміна по батькові користувача'), ('change registation address', 'Оновлення адреси прописки')], codes={'change registation address': 13, 'change user name': 10, 'change user patronymic': 12, 'change user surname': 11, 'create a foreign passport': 2, 'create a visa': 3, 'create an internal passport': 1, 'extend a visa': 4, 'restore a foreign passport due to expiry': 9, 'restore a foreign passport due to loss': 7, 'restore a visa due to loss': 5, 'restore an internal passport due to expiry': 8, 'restore an internal passport due to loss': 6})),
+                ('status', models.IntegerField(choices=[(0, 'in progress'), (1, 'completed'), (2, 'rejected')])),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='taskcounter',
+            constraint=models.UniqueConstraint(fields=('title', 'status'), name='unique_task_counter'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_sequence(apps, schema_editor):
+    TaskChangeSequence = apps.get_model('administration', 'TaskChangeSequence')
+    TaskChangeSequence.objects.create(pk=1, value=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0014_task_archive'),
+        ('passports', '0003_visa_is_active_alter_visa_date_of_expiry_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskChangeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='change_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='taskarchive',
+            name='change_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['change_seq', 'id'], name='task_change_seq_idx'),
+        ),
+        migrations.RunPython(create_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:57
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+
+# A frozen copy of administration.priority as of this migration, so later changes
+# to the scoring don't change what the migration does. `refresh_task_priorities`
+# recomputes the priorities with the current scoring.
+TITLE_PRIORITIES = {
+    'restore an internal passport due to expiry': 300,
+    'restore a foreign passport due to expiry': 300,
+    'extend a visa': 300,
+    'restore an internal passport due to loss': 200,
+    'restore a foreign passport due to loss': 200,
+    'restore a visa due to loss': 200,
+    'create an internal passport': 100,
+    'create a foreign passport': 100,
+    'create a visa': 100,
+    'change user name': 100,
+    'change user surname': 100,
+    'change user patronymic': 100,
+    'change registation address': 100,
+}
+DEADLINE_WINDOW_DAYS = 60
+DEADLINE_WEIGHT = 10
+AGE_WEIGHT = 5
+
+
+def task_deadline(task):
+    if task.title == 'restore an internal passport due to expiry' and task.user.passport_id:
+        return task.user.passport.date_of_expiry
+    if task.title == 'restore a foreign passport due to expiry' and task.user.foreign_passport_id:
+        return task.user.foreign_passport.date_of_expiry
+    if task.title == 'extend a visa':
+        if task.visa_id:
+            return task.visa.date_of_expiry
+        if task.user_data.get('visa_extension_date'):
+            return datetime.date.fromisoformat(task.user_data['visa_extension_date'])
+    return None
+
+
+def task_priority(task, today):
+    priority = TITLE_PRIORITIES.get(task.title, 0)
+    deadline = task_deadline(task)
+    if deadline is not None:
+        days_left = max((deadline - today).days, 0)
+        priority += max(DEADLINE_WINDOW_DAYS - days_left, 0) * DEADLINE_WEIGHT
+    created = task.created_at.date() if task.created_at else today
+    priority += max((today - created).days, 0) * AGE_WEIGHT
+    return priority
+
+
+def fill_priorities(apps, schema_editor):
+    Task = apps.get_model('administration', 'Task')
+    pending = Task.objects.filter(status=0).select_related('user__passport', 'user__foreign_passport', 'visa')
+    today = datetime.date.today()
+    tasks = []
+    for task in pending.iterator(chunk_size=1000):
+        task.priority = task_priority(task, today)
+        tasks.append(task)
+    Task.objects.bulk_update(tasks, ['priority'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0015_task_change_feed'),
+        ('passports', '0003_visa_is_active_alter_visa_date_of_expiry_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_pending_created_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='priority',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='taskarchive',
+            name='priority',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', '-priority', 'created_at', 'id'], name='task_status_priority_idx'),
+        ),
+        migrations.RunPython(fill_priorities, migrations.RunPython.noop),
+    ]
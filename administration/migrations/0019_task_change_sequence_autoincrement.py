@@ -0,0 +1,31 @@
+from django.core.management.color import no_style
+from django.db import migrations
+
+
+def continue_numbering(apps, schema_editor):
+    """Leave the auto-increment counter at the last number the single row handed out."""
+    TaskChangeSequence = apps.get_model('administration', 'TaskChangeSequence')
+    value = TaskChangeSequence.objects.filter(pk=1).values_list('value', flat=True).first() or 0
+    TaskChangeSequence.objects.all().delete()
+    if value:
+        TaskChangeSequence.objects.create(pk=value, value=value)
+        connection = schema_editor.connection
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [TaskChangeSequence]):
+                cursor.execute(sql)
+        TaskChangeSequence.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0018_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(continue_numbering, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='taskchangesequence',
+            name='value',
+        ),
+    ]
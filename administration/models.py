@@ -1,5 +1,224 @@
-from django.db import models
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, connections, models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
 from authentication.models import CustomUser
+from passports.models import Address, Visa
+from . import feed, metrics
+from .fields import TaskTitleField
+from .priority import task_priority
+
+VISA_CHANGE_TITLES = ['extend a visa', 'restore a visa due to loss']
+VISA_TITLES = ['create a visa'] + VISA_CHANGE_TITLES
+
+CATEGORY_PASSPORT, CATEGORY_FOREIGN_PASSPORT, CATEGORY_VISA, CATEGORY_USER_DATA = 1, 2, 3, 4
+
+# Stored code and category of each task title. Codes are persisted, never reuse one.
+TITLE_CODES = {
+    'create an internal passport': 1,
+    'create a foreign passport': 2,
+    'create a visa': 3,
+    'extend a visa': 4,
+    'restore a visa due to loss': 5,
+    'restore an internal passport due to loss': 6,
+    'restore a foreign passport due to loss': 7,
+    'restore an internal passport due to expiry': 8,
+    'restore a foreign passport due to expiry': 9,
+    'change user name': 10,
+    'change user surname': 11,
+    'change user patronymic': 12,
+    'change registation address': 13,
+}
+TITLE_CATEGORIES = {
+    'create an internal passport': CATEGORY_PASSPORT,
+    'create a foreign passport': CATEGORY_FOREIGN_PASSPORT,
+    'create a visa': CATEGORY_VISA,
+    'extend a visa': CATEGORY_VISA,
+    'restore a visa due to loss': CATEGORY_VISA,
+    'restore an internal passport due to loss': CATEGORY_PASSPORT,
+    'restore a foreign passport due to loss': CATEGORY_FOREIGN_PASSPORT,
+    'restore an internal passport due to expiry': CATEGORY_PASSPORT,
+    'restore a foreign passport due to expiry': CATEGORY_FOREIGN_PASSPORT,
+    'change user name': CATEGORY_USER_DATA,
+    'change user surname': CATEGORY_USER_DATA,
+    'change user patronymic': CATEGORY_USER_DATA,
+    'change registation address': CATEGORY_USER_DATA,
+}
+
+
+class TaskQuerySet(models.QuerySet):
+    def pending_duplicates(self, user, title, visa=None, visa_country=None, **fields):
+        """Pending tasks that the pending-task unique constraints don't allow a new task with these fields next to."""
+        duplicates = self.filter(user=user, title=title, status=0)
+        if title == 'create a visa':
+            return duplicates.filter(visa_country=visa_country)
+        if title in VISA_CHANGE_TITLES:
+            return duplicates.filter(visa=visa)
+        return duplicates
+
+    def create_pending(self, **kwargs):
+        """
+        Insert a pending task with a single statement, relying on the pending-task
+        unique constraints instead of a separate existence check.
+
+        Returns:
+            Task | None: The new task, or None if the same request is already pending.
+        """
+        try:
+            with transaction.atomic():
+                return self.create(**kwargs)
+        except IntegrityError:
+            # Other violations, such as a missing user, are real errors.
+            if self.pending_duplicates(**kwargs).exists():
+                return None
+            raise
+
+    def set_status(self, task, status, user=None):
+        """
+        Move a pending task to `status` with a single conditional UPDATE, recording
+        when and by which staff member (`user`) it was processed.
+
+        The UPDATE locks the row (the whole database on SQLite) and re-checks that
+        the task is still pending, and not leased to another staff member, so of
+        concurrent requests only one succeeds.
+        Call it first in the handler's transaction, so the lock is held until the
+        rest of the changes are committed together; no savepoint is taken, an error
+        here rolls back the whole handler.
+
+        Returns:
+            bool: Whether the task was pending, free for `user`, and has been updated.
+        """
+        now = timezone.now()
+        with transaction.atomic(savepoint=False):
+            change_seq = TaskChangeSequence.objects.next_value()
+            updated = self.processable_by(user, now).filter(pk=task.pk, status=0).update(
+                status=status, change_seq=change_seq, processed_at=now, processed_by=user
+            )
+            if updated:
+                TaskCounter.objects.add({(task.title, 0): -1, (task.title, status): 1})
+                metrics.tasks_processed(status, [(task.title, task.created_at)], now)
+                task.status = status
+                task.change_seq = change_seq
+                task.processed_at = now
+                task.processed_by = user
+        return bool(updated)
+
+    def update_status(self, status, user=None):
+        """
+        Move the pending tasks of the queryset to `status` with one UPDATE, recording
+        when and by whom they were processed, and adjust the counters by title.
+        Tasks leased to another staff member are left pending.
+
+        Returns:
+            int: The number of updated tasks.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            change_seq = TaskChangeSequence.objects.next_value()
+            pending = self.processable_by(user, now).filter(status=0)
+            tasks = list(pending.select_for_update().values_list('title', 'created_at'))
+            updated = pending.update(status=status, change_seq=change_seq, processed_at=now, processed_by=user)
+            changes = {}
+            for title, count in Counter(title for title, _ in tasks).items():
+                changes[title, 0] = -count
+                changes[title, status] = count
+            TaskCounter.objects.add(changes)
+            metrics.tasks_processed(status, tasks, now)
+        return updated
+
+    def archive_batch(self, before, batch_size):
+        """
+        Move up to `batch_size` completed or rejected tasks created before `before`
+        to the archive table in one transaction.
+
+        The tasks are copied with one INSERT and removed with one DELETE. Nothing
+        references a task, so the delete skips the collector and the per-row
+        deletion signals; the counters, which include archived tasks, stay unchanged.
+
+        Returns:
+            int: The number of archived tasks.
+        """
+        fields = [field.attname for field in Task._meta.concrete_fields]
+        with transaction.atomic():
+            rows = list(
+                self.select_for_update().filter(status__in=(1, 2), created_at__lt=before)
+                .order_by('pk').values_list(*fields)[:batch_size]
+            )
+            if rows:
+                TaskArchive.objects.bulk_create(TaskArchive(**dict(zip(fields, row))) for row in rows)
+                # A plain DELETE: `QuerySet.delete()` would send `post_delete` for each
+                # task, and the counters receiver would uncount the archived tasks.
+                db = connections[self.db]
+                quote = db.ops.quote_name
+                placeholders = ', '.join(['%s'] * len(rows))
+                with db.cursor() as cursor:
+                    cursor.execute(
+                        f'DELETE FROM {quote(Task._meta.db_table)} '
+                        f'WHERE {quote(Task._meta.pk.column)} IN ({placeholders})',
+                        [row[0] for row in rows],
+                    )
+        return len(rows)
+
+    def processable_by(self, user, now=None):
+        """Tasks `user` may process: not leased, leased to `user`, or whose lease has expired."""
+        now = now or timezone.now()
+        return self.filter(Q(leased_by=None) | Q(leased_by=user) | Q(lease_expires_at__lte=now))
+
+    def claimable(self, now=None):
+        """Pending tasks that are not leased, or whose lease has expired."""
+        now = now or timezone.now()
+        return self.filter(Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now), status=0)
+
+    def claim_next(self, user):
+        """
+        Lease the most urgent claimable task of the queryset, the oldest of equal priority,
+        to `user` for `TASK_LEASE_SECONDS`.
+
+        Candidates are read with `select_for_update(skip_locked=True)` where the database
+        supports it, so concurrent callers never wait for each other. The lease itself is
+        taken with a conditional UPDATE, which also keeps the claim safe on databases
+        without row locks: a candidate leased in the meantime is skipped.
+
+        Returns:
+            Task | None: The leased task, or None if there is nothing to claim.
+        """
+        now = timezone.now()
+        candidates = self.claimable(now).order_by('-priority', 'created_at', 'pk')
+        skip_locked = connection.features.has_select_for_update_skip_locked
+        with transaction.atomic():
+            if skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            change_seq = None
+            for pk in candidates.values_list('pk', flat=True)[:1 if skip_locked else 10]:
+                change_seq = change_seq or TaskChangeSequence.objects.next_value()
+                leased = self.claimable(now).filter(pk=pk).update(
+                    leased_by=user,
+                    lease_expires_at=now + timedelta(seconds=settings.TASK_LEASE_SECONDS),
+                    change_seq=change_seq,
+                )
+                if leased:
+                    return self.get(pk=pk)
+        return None
+
+    def renew_lease(self, pk, user):
+        """Extend the unexpired lease `user` holds on a pending task. Returns whether it was renewed."""
+        now = timezone.now()
+        with transaction.atomic():
+            return bool(self.filter(pk=pk, status=0, leased_by=user, lease_expires_at__gt=now).update(
+                lease_expires_at=now + timedelta(seconds=settings.TASK_LEASE_SECONDS),
+                change_seq=TaskChangeSequence.objects.next_value(),
+            ))
+
+    def release_lease(self, pk, user):
+        """Give up the lease `user` holds on a task. Returns whether there was one."""
+        with transaction.atomic():
+            return bool(self.filter(pk=pk, leased_by=user).update(
+                leased_by=None, lease_expires_at=None, change_seq=TaskChangeSequence.objects.next_value()
+            ))
 
 
 class Task(models.Model):
@@ -8,6 +227,12 @@ class Task(models.Model):
         (1, 'completed'),
         (2, 'rejected')
     ]
+    CATEGORY_CHOICES = [
+        (CATEGORY_PASSPORT, 'internal passport'),
+        (CATEGORY_FOREIGN_PASSPORT, 'foreign passport'),
+        (CATEGORY_VISA, 'visa'),
+        (CATEGORY_USER_DATA, 'user data')
+    ]
     TITLE_CHOICES = [
         ('create an internal passport', 'Створення внутрішнього паспорту'),
         ('create a foreign passport', 'Створення закордонного паспорту'),
@@ -25,10 +250,280 @@ class Task(models.Model):
     ]
 
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
-    title = models.CharField(choices=TITLE_CHOICES, max_length=255)
+    title = TaskTitleField(choices=TITLE_CHOICES, codes=TITLE_CODES)
+    category = models.SmallIntegerField(choices=CATEGORY_CHOICES)
     status = models.IntegerField(choices=STATUS_CHOICES, default=0)
     user_data = models.JSONField()
+    visa = models.ForeignKey(Visa, on_delete=models.SET_NULL, null=True, blank=True, related_name='tasks')
+    address = models.ForeignKey(Address, on_delete=models.SET_NULL, null=True, blank=True, related_name='tasks')
+    visa_country = models.CharField(max_length=2, choices=Visa.COUNTRY_CHOICES, null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    leased_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name='leased_tasks')
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    # Number of the last change of the task, see `TaskChangeSequence`.
+    change_seq = models.BigIntegerField(default=0)
+    # Urgency in the staff queue, see `administration.priority`.
+    priority = models.IntegerField(default=0)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    processed_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='processed_tasks')
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'title', 'status'], name='task_user_title_status_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='task_status_created_idx'),
+            models.Index(fields=['category', 'status'], name='task_category_status_idx'),
+            models.Index(fields=['status', '-priority', 'created_at', 'id'], name='task_status_priority_idx'),
+            models.Index(fields=['change_seq', 'id'], name='task_change_seq_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'title'],
+                condition=Q(status=0) & ~Q(title__in=VISA_TITLES),
+                name='unique_pending_task',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'title', 'visa_country'],
+                condition=Q(status=0, title='create a visa'),
+                name='unique_pending_visa_task',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'title', 'visa'],
+                condition=Q(status=0, title__in=VISA_CHANGE_TITLES),
+                name='unique_pending_visa_change_task',
+            ),
+        ]
 
     def __str__(self):
         return f"<Task {self.pk}: `{self.title}`>"
+
+    def is_leased_to_other(self, user, now=None):
+        """Whether another staff member than `user` holds an unexpired lease on the task."""
+        now = now or timezone.now()
+        return (self.leased_by_id is not None and self.leased_by_id != getattr(user, 'pk', None)
+                and self.lease_expires_at is not None and self.lease_expires_at > now)
+
+    def save(self, *args, **kwargs):
+        self.category = TITLE_CATEGORIES[self.title]
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'change_seq'}
+        adding = self._state.adding
+        if adding:
+            self.priority = task_priority(self)
+        with transaction.atomic():
+            self.change_seq = TaskChangeSequence.objects.next_value()
+            super().save(*args, **kwargs)
+            if adding:
+                TaskCounter.objects.add({(self.title, self.status): 1})
+                metrics.task_created(self.title)
+
+
+class TaskChangeSequenceQuerySet(models.QuerySet):
+    def next_value(self):
+        """
+        Take the number of a new task change.
+
+        The number is the id of a row inserted and deleted again at once, so it
+        comes from the table's auto-increment sequence and takes no lock other
+        writers wait on. Numbers are unique and increasing, but transactions may
+        commit out of number order and a rolled back one leaves a gap; the change
+        feed allows for both.
+        """
+        value = self.create().pk
+        self.filter(pk=value).delete()
+        transaction.on_commit(feed.notify)
+        return value
+
+    def current(self):
+        """The highest change number of a task."""
+        return Task.objects.aggregate(value=models.Max('change_seq'))['value'] or 0
+
+
+class TaskChangeSequence(models.Model):
+    """
+    Sequence numbering task changes for the change feed.
+
+    Every task write takes the next number and stores it in `Task.change_seq`,
+    so the tasks changed since a feed cursor are an index range. The table
+    stays empty, only its auto-increment counter is used.
+    """
+    objects = TaskChangeSequenceQuerySet.as_manager()
+
+
+class TaskArchive(models.Model):
+    """
+    Completed and rejected tasks moved out of the task table by `manage.py archive_tasks`.
+
+    The columns are the task's, in the same order, and the task keeps its id,
+    so archived and live tasks can be read together with `union()`.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='archived_tasks')
+    title = TaskTitleField(choices=Task.TITLE_CHOICES, codes=TITLE_CODES)
+    category = models.SmallIntegerField(choices=Task.CATEGORY_CHOICES)
+    status = models.IntegerField(choices=Task.STATUS_CHOICES)
+    user_data = models.JSONField()
+    visa = models.ForeignKey(Visa, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_tasks')
+    address = models.ForeignKey(Address, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='archived_tasks')
+    visa_country = models.CharField(max_length=2, choices=Visa.COUNTRY_CHOICES, null=True, blank=True)
+    created_at = models.DateTimeField()
+    leased_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name='leased_archived_tasks')
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    change_seq = models.BigIntegerField(default=0)
+    priority = models.IntegerField(default=0)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    processed_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='processed_archived_tasks')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'status', '-created_at'], name='task_archive_user_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"<TaskArchive {self.pk}: `{self.title}`>"
+
+
+class TaskCounterQuerySet(models.QuerySet):
+    def add(self, changes):
+        """
+        Apply `{(title, status): delta}` changes to the counters.
+
+        Call it in the transaction that creates or updates the tasks, so the counters
+        are committed (or rolled back) together with them.
+        """
+        for (title, status), delta in changes.items():
+            if delta and not self.filter(title=title, status=status).update(count=F('count') + delta):
+                self.create(title=title, status=status, count=delta)
+
+    def rebuild(self):
+        """
+        Recount the tasks of each title and status and overwrite the counters.
+
+        Returns:
+            dict: `{(title, status): (old count, new count)}` for the counters that were wrong.
+        """
+        with transaction.atomic():
+            counters = {(c.title, c.status): c for c in self.select_for_update()}
+            actual = Counter()
+            for model in (Task, TaskArchive):
+                rows = model.objects.order_by().values('title', 'status').annotate(n=models.Count('id'))
+                for row in rows:
+                    actual[row['title'], row['status']] += row['n']
+            fixed = {}
+            for title, _ in Task.TITLE_CHOICES:
+                for status, _ in Task.STATUS_CHOICES:
+                    counter = counters.get((title, status))
+                    count = actual[title, status]
+                    if counter is None:
+                        self.create(title=title, status=status, count=count)
+                        fixed[title, status] = (None, count)
+                    elif counter.count != count:
+                        fixed[title, status] = (counter.count, count)
+                        counter.count = count
+                        counter.save(update_fields=['count'])
+        return fixed
+
+
+class TaskCounter(models.Model):
+    """
+    Number of tasks of each title and status, kept up to date by the task write paths
+    so the staff dashboard doesn't have to count the task table. Archived tasks are
+    still counted.
+
+    `bulk_create()` and raw UPDATEs of the task table bypass the counters;
+    run `manage.py reconcile_task_counters` after using them.
+    """
+    title = TaskTitleField(choices=Task.TITLE_CHOICES, codes=TITLE_CODES)
+    status = models.IntegerField(choices=Task.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    objects = TaskCounterQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'status'], name='unique_task_counter'),
+        ]
+
+    def __str__(self):
+        return f"<TaskCounter `{self.title}` {self.status}: {self.count}>"
+
+
+class JobQuerySet(models.QuerySet):
+    def due(self, now=None):
+        """Pending jobs whose time has come, and running jobs whose worker lease has expired."""
+        now = now or timezone.now()
+        return self.filter(
+            Q(status=Job.PENDING, run_after__lte=now) | Q(status=Job.RUNNING, lease_expires_at__lte=now)
+        )
+
+    def claim_next(self, worker):
+        """
+        Lease the oldest due job to `worker` for `JOB_LEASE_SECONDS`, counting an attempt.
+
+        Claimed the same way as `TaskQuerySet.claim_next()`: candidates are read with
+        `select_for_update(skip_locked=True)` where supported and leased with a
+        conditional UPDATE, so concurrent workers never run the same job.
+
+        Returns:
+            Job | None: The leased job, or None if no job is due.
+        """
+        now = timezone.now()
+        candidates = self.due(now).order_by('run_after', 'pk')
+        skip_locked = connection.features.has_select_for_update_skip_locked
+        with transaction.atomic():
+            if skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            for pk in candidates.values_list('pk', flat=True)[:1 if skip_locked else 10]:
+                leased = self.due(now).filter(pk=pk).update(
+                    status=Job.RUNNING,
+                    locked_by=worker,
+                    lease_expires_at=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                    attempts=F('attempts') + 1,
+                )
+                if leased:
+                    return self.get(pk=pk)
+        return None
+
+
+class Job(models.Model):
+    """
+    A side effect of a committed change, run by `manage.py runworker`.
+
+    Jobs are created in the transaction of the change, so they exist only if it
+    commits, and deleted in the transaction of their own work once it succeeds.
+    A failed attempt is retried after an exponential backoff until `max_attempts`
+    is reached; the job is then kept as failed with its last error.
+    """
+    PENDING, RUNNING, FAILED = 0, 1, 2
+    STATUS_CHOICES = [
+        (PENDING, 'pending'),
+        (RUNNING, 'running'),
+        (FAILED, 'failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.SmallIntegerField(choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField()
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"<Job {self.pk}: `{self.name}`>"
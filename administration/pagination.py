@@ -0,0 +1,249 @@
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that only counts small result sets exactly.
+
+    On PostgreSQL, a `COUNT` limited to `PAGINATION_EXACT_COUNT_LIMIT + 1` rows
+    tells narrow filters, which get their exact count, from broad ones. The count
+    of a broad filter is the planner's row estimate, cached for
+    `PAGINATION_COUNT_CACHE_SECONDS`. Databases without an estimate always count
+    exactly. `count_is_exact` tells which one was used. When the count is not
+    exact, pages past the counted ones are still served until they come back empty.
+    """
+    count_is_exact = True
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list.order_by()
+        if not self.can_estimate(queryset):
+            return queryset.count()
+        limit = settings.PAGINATION_EXACT_COUNT_LIMIT
+        count = queryset[:limit + 1].count()
+        if count <= limit:
+            return count
+
+        self.count_is_exact = False
+        sql, params = queryset.query.sql_with_params()
+        key = 'pagination-count:' + hashlib.md5(f'{sql}|{params}'.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = self.estimate_count(queryset)
+            if count <= limit:
+                count = queryset.count()
+            cache.set(key, count, settings.PAGINATION_COUNT_CACHE_SECONDS)
+        return count
+
+    @staticmethod
+    def can_estimate(queryset):
+        """Whether the database of the queryset gives a row estimate, see `estimate_count()`."""
+        return connections[queryset.db].vendor == 'postgresql'
+
+    @staticmethod
+    def estimate_count(queryset):
+        """Return the planner's row estimate for the queryset."""
+        connection = connections[queryset.db]
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def validate_number(self, number):
+        self.count  # Decides whether the count is exact.
+        if self.count_is_exact:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_is_exact:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page])
+        if not object_list and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        return self._get_page(object_list, number, self)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a fixed multi-column ordering.
+
+    The cursor stores the ordering values of the first or last row of the page,
+    so every page is fetched with a range condition on the ordering columns
+    instead of an OFFSET, and rows inserted while paging don't shift the pages.
+    The view can override the ordering with a `keyset_ordering` attribute;
+    the last column must be unique. Unions of querysets are supported.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor.'
+    ordering = ('status', '-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        self.fields = self.get_fields(queryset.model)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        limit = self.page_size + 1
+        if position is None:
+            rows = list(queryset[:limit])
+        else:
+            rows = []
+            for condition in self.seek_conditions(ordering, position):
+                rows.extend(self.filter(queryset, condition)[:limit - len(rows)])
+                if len(rows) == limit:
+                    break
+
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    @staticmethod
+    def reverse_ordering(ordering):
+        return tuple(name[1:] if name.startswith('-') else '-' + name for name in ordering)
+
+    def seek_conditions(self, ordering, position):
+        """
+        Split `(a, b, c) > (x, y, z)` into `a = x AND b = y AND c > z`,
+        `a = x AND b > y` and `a > x`, in page order, honouring the direction
+        of every column. Each part is a plain index range, unlike the OR of
+        all three, which databases tend to answer by scanning from the start.
+        """
+        for depth in range(len(ordering) - 1, -1, -1):
+            equal = {name.lstrip('-'): value for name, value in zip(ordering[:depth], position[:depth])}
+            name = ordering[depth]
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            yield Q(**equal, **{f"{name.lstrip('-')}__{lookup}": position[depth]})
+
+    @staticmethod
+    def filter(queryset, condition):
+        """
+        Filter the queryset by `condition`. A union can't be filtered once combined,
+        so each of its parts is filtered and the parts are combined again.
+        """
+        query = queryset.query
+        if query.combinator != 'union':
+            return queryset.filter(condition)
+        parts = [QuerySet(model=part.model, query=part.chain()).filter(condition) for part in query.combined_queries]
+        return parts[0].union(*parts[1:], all=query.combinator_all).order_by(*query.order_by)
+
+    def get_fields(self, model):
+        return [model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+
+    def get_position(self, instance):
+        return [getattr(instance, field.attname) for field in self.fields]
+
+    def encode_position(self, position, reverse):
+        # `str` keeps the full microsecond precision of datetimes, which the seek needs.
+        payload = json.dumps({'p': position, 'r': int(reverse)}, default=str)
+        return urlsafe_b64encode(payload.encode()).decode()
+
+    def encode_cursor(self, position, reverse):
+        encoded = self.encode_position(position, reverse)
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        """
+        Return `(position, reverse)` for the cursor in the request.
+        An empty cursor means the first page.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode()).decode())
+            values = payload['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(self.fields, values)]
+            return position, bool(payload.get('r'))
+        except (BinasciiError, UnicodeDecodeError, ValueError, TypeError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class TaskPagination(PageNumberPagination):
+    """
+    Page-number pagination that switches to keyset mode when the `cursor`
+    query parameter is present. Pass an empty `?cursor=` to get the first page.
+
+    Page numbers use `EstimatedCountPaginator`; the response's `count_is_exact`
+    tells whether `count` is exact.
+    """
+    django_paginator_class = EstimatedCountPaginator
+    keyset_pagination_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_pagination_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_pagination_class()
+            self.keyset.page_size = self.get_page_size(request)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return Response({
+            'count': self.page.paginator.count,
+            'count_is_exact': self.page.paginator.count_is_exact,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_is_exact'] = {'type': 'boolean'}
+        return response_schema
@@ -0,0 +1,65 @@
+"""
+Priority of pending tasks for the staff queue.
+
+The score is the sum of a weight for the task type, a bonus that grows as the
+deadline of the request approaches, and a bonus for each day the task has waited,
+so no request waits forever behind more urgent ones. Higher is more urgent.
+It depends on the current date, so `manage.py refresh_task_priorities` has to run daily.
+"""
+import datetime
+
+TITLE_PRIORITIES = {
+    'restore an internal passport due to expiry': 300,
+    'restore a foreign passport due to expiry': 300,
+    'extend a visa': 300,
+    'restore an internal passport due to loss': 200,
+    'restore a foreign passport due to loss': 200,
+    'restore a visa due to loss': 200,
+    'create an internal passport': 100,
+    'create a foreign passport': 100,
+    'create a visa': 100,
+    'change user name': 100,
+    'change user surname': 100,
+    'change user patronymic': 100,
+    'change registation address': 100,
+}
+
+# A deadline starts to count this many days before it and adds DEADLINE_WEIGHT for each
+# day closer, so an overdue deadline adds DEADLINE_WINDOW_DAYS * DEADLINE_WEIGHT.
+DEADLINE_WINDOW_DAYS = 60
+DEADLINE_WEIGHT = 10
+# Added for each day the task has been waiting.
+AGE_WEIGHT = 5
+
+
+def task_deadline(task):
+    """
+    Return the date by which the request should be processed, or None if it has none:
+    the expiry of the document being restored or of the visa being extended, or the
+    requested extension date when the visa isn't known.
+    """
+    if task.title == 'restore an internal passport due to expiry' and task.user.passport_id:
+        return task.user.passport.date_of_expiry
+    if task.title == 'restore a foreign passport due to expiry' and task.user.foreign_passport_id:
+        return task.user.foreign_passport.date_of_expiry
+    if task.title == 'extend a visa':
+        if task.visa_id:
+            return task.visa.date_of_expiry
+        if task.user_data.get('visa_extension_date'):
+            return datetime.date.fromisoformat(task.user_data['visa_extension_date'])
+    return None
+
+
+def task_priority(task, today=None):
+    """Compute the priority of a task as of `today`."""
+    today = today or datetime.date.today()
+    priority = TITLE_PRIORITIES[task.title]
+
+    deadline = task_deadline(task)
+    if deadline is not None:
+        days_left = max((deadline - today).days, 0)
+        priority += max(DEADLINE_WINDOW_DAYS - days_left, 0) * DEADLINE_WEIGHT
+
+    created = task.created_at.date() if task.created_at else today
+    priority += max((today - created).days, 0) * AGE_WEIGHT
+    return priority
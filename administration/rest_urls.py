@@ -11,7 +11,9 @@ from .rest_views import (
     CreateVisaAPIView,
     ExtendVisaExtentionAPIView,
     RejectTaskAPIView,
-    RestoreVisaAPIView
+    RestoreVisaAPIView,
+    BulkRejectTaskAPIView,
+    BulkChangeUserAddressAPIView
 )
 
 
@@ -30,4 +32,6 @@ urlpatterns = [
     path('extend-visa/<int:task_pk>/', ExtendVisaExtentionAPIView.as_view(), name='extend_visa_s_api'),
     path('restore-visa/<int:task_pk>/', RestoreVisaAPIView.as_view(), name='restore_visa_s_api'),
     path('reject-task/<int:task_pk>/', RejectTaskAPIView.as_view(), name='reject_task_s_api'),
+    path('bulk-reject-tasks/', BulkRejectTaskAPIView.as_view(), name='bulk_reject_tasks_s_api'),
+    path('bulk-change-address/', BulkChangeUserAddressAPIView.as_view(), name='bulk_change_address_s_api'),
 ]
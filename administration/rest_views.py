@@ -1,379 +1,466 @@
-from datetime import date
+import time
 
 from django_filters.rest_framework import DjangoFilterBackend
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ParseError
 from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
-from administration.models import Task
+from administration.models import Task, TaskChangeSequence, TaskCounter
+from . import feed, metrics
+from .export import TaskExportMixin
 from .filters import TaskFilter
-from .serializers import TaskUserSerializer
+from .handlers import (TaskError, get_handler, ChangeAddressHandler, ChangeUserFieldHandler,
+                       CreateForeignPassportHandler, CreateInternalPassportHandler, CreateVisaHandler,
+                       ExtendVisaHandler, RestoreForeignPassportHandler, RestoreInternalPassportHandler,
+                       RestoreVisaHandler)
+from .pagination import KeysetPagination, TaskPagination
+from .serializers import TaskIdListSerializer, TaskLeaseSerializer, TaskUserSerializer
+from passports import documents
 from passports.serializers import (CreateInternalPassportSerializer,
                                    CreateForeignPassportSerializer,
                                    VisaSerializer,
                                    RestoreVisaSerializer)
-from passports.models import Address, Passport, ForeignPassport, Visa
+from authentication.models import CustomUser
 
 
-class TaskListAPIView(ReadOnlyModelViewSet):
-    queryset = Task.objects.all().order_by('status', '-created_at')
+class TaskListAPIView(TaskExportMixin, ReadOnlyModelViewSet):
+    queryset = Task.objects.select_related(
+        'user__address', 'address', 'visa__foreign_passport__user'
+    ).order_by('status', '-created_at')
     serializer_class = TaskUserSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TaskFilter
     permission_classes = [IsAdminUser]
+    pagination_class = TaskPagination
+    change_feed_limit = 100
+    priority_ordering = ('status', '-priority', 'created_at', 'id')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.orders_by_priority():
+            return queryset.order_by(*self.priority_ordering)
+        return queryset
+
+    def orders_by_priority(self):
+        """Whether the list is requested with `?ordering=priority` instead of the default ordering."""
+        ordering = self.request.query_params.get('ordering')
+        if ordering not in (None, 'priority'):
+            raise ParseError("Invalid ordering.")
+        return ordering == 'priority'
+
+    @property
+    def keyset_ordering(self):
+        return self.priority_ordering if self.orders_by_priority() else KeysetPagination.ordering
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 
-    def list(self, request, *args, **kwargs):
-        page = request.query_params.get('page')
-        if page == 'all':
-            queryset = self.filter_queryset(self.get_queryset())
-            count = len(queryset)
-            serializer = self.get_serializer(queryset, many=True)
-            return Response({'count': count, 'tasks': serializer.data})
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Number of tasks of each title and status, read from the counters table."""
+        statuses = dict(Task.STATUS_CHOICES)
+        titles = {title: dict.fromkeys(statuses.values(), 0) for title, _ in Task.TITLE_CHOICES}
+        totals = dict.fromkeys(statuses.values(), 0)
+        for title, task_status, count in TaskCounter.objects.values_list('title', 'status', 'count'):
+            titles[title][statuses[task_status]] = count
+            totals[statuses[task_status]] += count
+        return Response({"titles": titles, "total": totals}, status=status.HTTP_200_OK)
+
+    @action(detail=False)
+    def changes(self, request):
+        """
+        Long-poll for the tasks created or changed after `cursor`, with the list filters applied.
+
+        Without a cursor, answers straight away with the current cursor. When nothing
+        has changed, waits up to `timeout` seconds (at most `TASK_FEED_TIMEOUT_SECONDS`)
+        for a change before answering with no tasks. Pass the returned cursor to the
+        next request. Filters match the current state of a task, so filter by title
+        rather than status to see tasks leave the queue.
+
+        Changes can commit out of the order of their numbers, so the cursor also
+        carries the numbers below its position that no task had yet, as far back as
+        `TASK_FEED_REORDER_WINDOW`; their tasks are returned once they are committed.
+        """
+        cursor = self.decode_change_cursor(request.query_params.get('cursor'))
+        try:
+            timeout = min(float(request.query_params.get('timeout', settings.TASK_FEED_TIMEOUT_SECONDS)),
+                          settings.TASK_FEED_TIMEOUT_SECONDS)
+        except ValueError:
+            raise ParseError("Invalid timeout.")
+        if cursor is None:
+            seq = TaskChangeSequence.objects.current()
+            window = set(range(max(seq - settings.TASK_FEED_REORDER_WINDOW, 0) + 1, seq + 1))
+            missing = window - self.committed_changes(window)
+            return Response({"cursor": self.encode_change_cursor(seq, None, missing), "results": []})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        deadline = time.monotonic() + timeout
+        while True:
+            published = feed.latest()
+            tasks, cursor = self.read_changes(queryset, *cursor)
+            if tasks or not feed.wait_for_change(published, deadline - time.monotonic()):
+                break
+        return Response({"cursor": self.encode_change_cursor(*cursor),
+                         "results": self.get_serializer(tasks, many=True).data})
+
+    def read_changes(self, queryset, seq, pk, missing):
+        """
+        Read the tasks changed after `(seq, pk)` and those of the `missing` change numbers.
+
+        Returns:
+            tuple: The tasks, and the `(seq, pk, missing)` of the next cursor.
+        """
+        current = TaskChangeSequence.objects.current()
+        changed = Q(change_seq__gt=seq) if pk is None else Q(change_seq__gt=seq) | Q(change_seq=seq, pk__gt=pk)
+        tasks = list(queryset.filter(changed).order_by('change_seq', 'pk')[:self.change_feed_limit])
+        if len(tasks) == self.change_feed_limit:
+            # The next response resumes inside the last change read.
+            next_seq, next_pk = tasks[-1].change_seq, tasks[-1].pk
+            read_until = next_seq - 1
         else:
-            return super().list(request, *args, **kwargs)
+            next_seq, next_pk = max(seq, current, *(task.change_seq for task in tasks)), None
+            read_until = next_seq
+        if missing:
+            tasks += queryset.filter(change_seq__in=missing)
+
+        lowest = next_seq - settings.TASK_FEED_REORDER_WINDOW
+        unseen = {number for number in missing if number > lowest}
+        unseen.update(range(max(seq, lowest) + 1, read_until + 1))
+        unseen.difference_update(task.change_seq for task in tasks)
+        committed = self.committed_changes(unseen)
+        if committed:
+            # Committed after the tasks were read, unless the filters leave their tasks out.
+            tasks += queryset.filter(change_seq__in=committed)
+        tasks.sort(key=lambda task: (task.change_seq, task.pk))
+        return tasks, (next_seq, next_pk, unseen - committed)
+
+    @staticmethod
+    def committed_changes(numbers):
+        """The change numbers of `numbers` that a task has."""
+        if not numbers:
+            return set()
+        return set(Task.objects.filter(change_seq__in=numbers).values_list('change_seq', flat=True).distinct())
+
+    @staticmethod
+    def encode_change_cursor(seq, pk, missing):
+        cursor = str(seq) if pk is None else f"{seq}-{pk}"
+        if missing:
+            cursor += "~" + ",".join(str(seq - number) for number in sorted(missing, reverse=True))
+        return cursor
+
+    @staticmethod
+    def decode_change_cursor(cursor):
+        """
+        Return `(change_seq, pk, missing)` for a `<change_seq>-<pk>` cursor, or with `pk`
+        None for a `<change_seq>` cursor, which covers every task of that change. Either
+        can end with `~<offsets>`, how far below `change_seq` each missing number is.
+        """
+        if not cursor:
+            return None
+        try:
+            position, _, offsets = cursor.partition('~')
+            seq, _, pk = position.partition('-')
+            seq, pk = int(seq), int(pk) if pk else None
+            offsets = [int(offset) for offset in offsets.split(',')] if offsets else []
+        except ValueError:
+            raise NotFound("Invalid cursor.")
+        if any(offset < 0 for offset in offsets):
+            raise NotFound("Invalid cursor.")
+        return seq, pk, {seq - offset for offset in offsets if offset < settings.TASK_FEED_REORDER_WINDOW}
+
+    @action(detail=False, methods=['post'])
+    def claim(self, request):
+        """Lease the oldest pending task matching the list filters to the current staff member."""
+        task = self.filter_queryset(self.get_queryset()).claim_next(request.user)
+        if task is None:
+            return Response({"detail": "There are no pending tasks to claim."}, status=status.HTTP_404_NOT_FOUND)
+        serializer = TaskLeaseSerializer(task, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'], url_path='renew-lease')
+    def renew_lease(self, request, pk=None):
+        task = self.get_object()
+        if not Task.objects.renew_lease(task.pk, request.user):
+            return Response({"detail": "You don't hold an active lease on this task."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({"detail": "The lease has been renewed."}, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['post'], url_path='release-lease')
+    def release_lease(self, request, pk=None):
+        task = self.get_object()
+        if not Task.objects.release_lease(task.pk, request.user):
+            return Response({"detail": "You don't hold a lease on this task."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({"detail": "The lease has been released."}, status=status.HTTP_200_OK)
 
-class CreateInternalPassportAPIView(APIView):
-    permission_classes = [IsAdminUser]
 
-    def post(self, request, task_pk):
-        task_title = "create an internal passport"
-        task = get_object_or_404(Task, pk=task_pk)
-        if task_title != task.title:
-            return Response({"detail": "The task with this id and title wasn`t found."},
-                            status=status.HTTP_404_NOT_FOUND)
-        if task.status:
-            return Response(
-                {"detail": "Request has already been processed."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+def lease_conflict(task, user):
+    """A 409 response if the task is leased to another staff member than `user`, else None."""
+    if task.is_leased_to_other(user):
+        return Response({"detail": "The task is leased to another staff member."}, status=status.HTTP_409_CONFLICT)
+    return None
 
-        passport = Passport(photo=task.user_data.get("photo"))
-        serializer = CreateInternalPassportSerializer(
-            instance=passport,
-            data=request.data,
-            context={'request': request}
-        )
-        if serializer.is_valid():
-            task.user.address = get_object_or_404(Address, pk=task.user_data.get("address_id"))
-            serializer.save()
-            task.user.passport = passport
-            task.user.save()
-            task.status = 1
-            task.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-
-class RestoreInternalPassportAPIView(APIView):
-    permission_classes = [IsAdminUser]
 
-    def put(self, request, task_pk):
-        task_titles = ["restore an internal passport due to loss", "restore an internal passport due to expiry"]
-        task = get_object_or_404(Task, pk=task_pk)
-        if task.title not in task_titles:
-            return Response({"detail": "The task with this id and title wasn`t found."},
-                            status=status.HTTP_404_NOT_FOUND)
-        if task.status:
-            return Response(
-                {"detail": "Request has already been processed."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+def processing_failed(task, user, detail):
+    """The response to a status update that found the task no longer pending or leased to someone else."""
+    task.refresh_from_db(fields=['status', 'leased_by', 'lease_expires_at'])
+    conflict = None if task.status else lease_conflict(task, user)
+    return conflict or Response({"detail": detail}, status=status.HTTP_400_BAD_REQUEST)
 
-        passport = Passport(photo=task.user_data.get("photo"))
-        serializer = CreateInternalPassportSerializer(
-            instance=passport,
-            data=request.data,
-            context={'request': request}
-        )
-        if serializer.is_valid():
-            task.user.passport.delete()
-            task.user.passport = serializer.save()
-            task.user.save()
-            task.status = 1
-            task.save()
-
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class TaskHandlerAPIView(APIView):
+    """
+    Approve a task with the handler registered for its title.
 
-class CreateForeignPassportAPIView(APIView):
+    `titles` are the task titles approved at the URL and `serializer_classes` validate
+    the staff input for each new document of the handler. Approvals that create a
+    document respond with it, the others with `success_detail`.
+    """
     permission_classes = [IsAdminUser]
+    titles = ()
+    serializer_classes = {}
+    already_processed = "Request has already been processed."
+    success_detail = None
 
-    def post(self, request, task_pk):
-        task_title = "create a foreign passport"
-        task = get_object_or_404(Task, pk=task_pk)
-        if task_title != task.title:
-            return Response({"detail": "The task with this id and title wasn`t found."},
-                            status=status.HTTP_404_NOT_FOUND)
-        if task.status:
-            return Response(
-                {"detail": "Request has already been processed."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    def get_document_data(self, request, name):
+        return request.data
 
-        passport = ForeignPassport(photo=task.user_data.get("photo"))
-        serializer = CreateForeignPassportSerializer(instance=passport,
-                                                     data=request.data,
-                                                     context={'request': request})
-        if serializer.is_valid():
-            serializer.save()
-            task.user.foreign_passport = passport
-            task.user.save()
-            task.status = 1
-            task.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-
-class RestoreForeignPassportAPIView(APIView):
-    permission_classes = [IsAdminUser]
+    def get_errors(self, errors, serializers):
+        return errors[next(iter(serializers))]
 
-    def put(self, request, task_pk):
-        task_titles = ["restore a foreign passport due to loss", "restore a foreign passport due to expiry"]
-        task = get_object_or_404(Task, pk=task_pk)
-        if task.title not in task_titles:
+    def check_task(self, handler, user):
+        """The error response if the task can't be approved by `user`, otherwise None."""
+        if handler.task.title not in self.titles:
             return Response({"detail": "The task with this id and title wasn`t found."},
                             status=status.HTTP_404_NOT_FOUND)
-        if task.status:
-            return Response(
-                {"detail": "This user's request has already been processed."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        if handler.task.status:
+            return Response({"detail": self.already_processed}, status=status.HTTP_400_BAD_REQUEST)
+        conflict = lease_conflict(handler.task, user)
+        if conflict:
+            return conflict
+        try:
+            handler.validate()
+        except TaskError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return None
+
+    def approve(self, request, task_pk):
+        handler = get_handler(task_pk)
+        error = self.check_task(handler, request.user)
+        if error:
+            return error
+
+        documents = handler.documents()
+        serializers = {
+            name: self.serializer_classes[name](instance=document,
+                                                data=self.get_document_data(request, name),
+                                                context={'request': request})
+            for name, document in documents.items()
+        }
+        errors = {name: serializer.errors for name, serializer in serializers.items() if not serializer.is_valid()}
+        if errors:
+            return Response(self.get_errors(errors, serializers), status=status.HTTP_400_BAD_REQUEST)
+        for serializer in serializers.values():
+            # The handler saves the documents itself, in the approval transaction.
+            for attr, value in serializer.validated_data.items():
+                setattr(serializer.instance, attr, value)
+
+        if not handler.approve(request.user, **documents):
+            return processing_failed(handler.task, request.user, self.already_processed)
+        if self.success_detail:
+            return Response({"detail": self.success_detail.format(handler=handler)}, status=status.HTTP_200_OK)
+        serializer, = serializers.values()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class CreateInternalPassportAPIView(TaskHandlerAPIView):
+    titles = CreateInternalPassportHandler.titles
+    serializer_classes = {'passport': CreateInternalPassportSerializer}
 
-        passport = ForeignPassport(photo=task.user_data.get("photo"))
-        serializer = CreateForeignPassportSerializer(instance=passport,
-                                                     data=request.data,
-                                                     context={'request': request})
-
-        if serializer.is_valid():
-            visas = Visa.objects.filter(foreign_passport=task.user.foreign_passport)
-            visas.delete()
-
-            task.user.foreign_passport.delete()
-            task.user.foreign_passport = serializer.save()
-            task.user.save()
-
-            task.status = 1
-            task.save()
+    def post(self, request, task_pk):
+        return self.approve(request, task_pk)
 
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class RestoreInternalPassportAPIView(TaskHandlerAPIView):
+    titles = RestoreInternalPassportHandler.titles
+    serializer_classes = {'passport': CreateInternalPassportSerializer}
 
-class ChangeUserAddressAPIView(APIView):
-    permission_classes = [IsAdminUser]
+    def put(self, request, task_pk):
+        return self.approve(request, task_pk)
 
-    def patch(self, request, task_pk):
-        task_title = "change registation address"
-        task = get_object_or_404(Task, pk=task_pk)
-        if task_title != task.title:
-            return Response({"detail": "The task with this id and title wasn`t found."},
-                            status=status.HTTP_404_NOT_FOUND)
-        if task.status:
-            return Response({"detail": "This user's request has already been processed."},
-                            status=status.HTTP_400_BAD_REQUEST)
 
-        addr = get_object_or_404(Address, pk=task.user_data.get("address_id"))
-        task.user.address = addr
-        task.user.save()
-        task.status = 1
-        task.save()
+class CreateForeignPassportAPIView(TaskHandlerAPIView):
+    titles = CreateForeignPassportHandler.titles
+    serializer_classes = {'foreign_passport': CreateForeignPassportSerializer}
 
-        return Response({"detail": "The registration address has been successfully updated."},
-                        status=status.HTTP_200_OK)
+    def post(self, request, task_pk):
+        return self.approve(request, task_pk)
 
 
-class ChangeUserFieldAPIView(APIView):
-    permission_classes = [IsAdminUser]
+class RestoreForeignPassportAPIView(TaskHandlerAPIView):
+    titles = RestoreForeignPassportHandler.titles
+    serializer_classes = {'foreign_passport': CreateForeignPassportSerializer}
+    already_processed = "This user's request has already been processed."
 
-    def handle_user_field_update(self, task, passport_serializer, field_name, new_value, fpassport_serializer=None):
-        task.user.passport.delete()
-        setattr(task.user, field_name, new_value)
-        task.user.passport = passport_serializer.save()
-
-        if fpassport_serializer:
-            Visa.objects.filter(foreign_passport=task.user.foreign_passport).delete()
-            task.user.foreign_passport.delete()
-            task.user.foreign_passport = fpassport_serializer.save()
+    def put(self, request, task_pk):
+        return self.approve(request, task_pk)
 
-        task.user.save()
-        task.status = 1
-        task.save()
 
-        return Response({'detail': f'The user {field_name} has been successfully updated.'}, status=status.HTTP_200_OK)
+class ChangeUserAddressAPIView(TaskHandlerAPIView):
+    titles = ChangeAddressHandler.titles
+    already_processed = "This user's request has already been processed."
+    success_detail = "The registration address has been successfully updated."
 
     def patch(self, request, task_pk):
-        task = get_object_or_404(Task, pk=task_pk)
-        if task.status:
-            return Response(
-                {"detail": "This user's request has already been processed."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        field_name = ''
-        for key in ['name', 'surname', 'patronymic']:
-            new_value = task.user_data.get(key)
-            if new_value:
-                field_name = key
-                break
-        task_title = f"change user {field_name}"
-        if task_title != task.title:
-            return Response({"detail": "The task with this id and title wasn`t found."},
-                            status=status.HTTP_404_NOT_FOUND)
+        return self.approve(request, task_pk)
 
-        new_ipassport = Passport(photo=task.user_data.get("photo"))
-        ipassport_serializer = CreateInternalPassportSerializer(
-            instance=new_ipassport,
-            data=request.data.get('internal_passport'),
-            context={'request': request}
-        )
-        if not task.user.foreign_passport:
-            if ipassport_serializer.is_valid():
-                return self.handle_user_field_update(task, ipassport_serializer, field_name, new_value)
-            return Response(ipassport_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        new_fpassport = ForeignPassport(photo=task.user_data.get("photo"))
-        fpassport_serializer = CreateForeignPassportSerializer(instance=new_fpassport,
-                                                               data=request.data.get('foreign_passport'),
-                                                               context={'request': request})
-        if ipassport_serializer.is_valid() and fpassport_serializer.is_valid():
-            return self.handle_user_field_update(task, ipassport_serializer, field_name, new_value, fpassport_serializer)
+class ChangeUserFieldAPIView(TaskHandlerAPIView):
+    titles = ChangeUserFieldHandler.titles
+    serializer_classes = {
+        'passport': CreateInternalPassportSerializer,
+        'foreign_passport': CreateForeignPassportSerializer,
+    }
+    # Keys of the request data (and of the errors) for each passport.
+    document_keys = {'passport': 'internal_passport', 'foreign_passport': 'foreign_passport'}
+    already_processed = "This user's request has already been processed."
+    success_detail = "The user {handler.field_name} has been successfully updated."
 
-        errors = {}
-        if not ipassport_serializer.is_valid():
-            errors['internal_passport'] = ipassport_serializer.errors
-        if not fpassport_serializer.is_valid():
-            errors['foreign_passport'] = fpassport_serializer.errors
+    def get_document_data(self, request, name):
+        return request.data.get(self.document_keys[name])
 
-        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+    def get_errors(self, errors, serializers):
+        if len(serializers) == 1:
+            return super().get_errors(errors, serializers)
+        return {self.document_keys[name]: document_errors for name, document_errors in errors.items()}
 
+    def patch(self, request, task_pk):
+        return self.approve(request, task_pk)
 
-class CreateVisaAPIView(APIView):
-    permission_classes = [IsAdminUser]
+
+class CreateVisaAPIView(TaskHandlerAPIView):
+    titles = CreateVisaHandler.titles
+    serializer_classes = {'visa': VisaSerializer}
 
     def post(self, request, task_pk):
-        task_title = "create a visa"
-        task = get_object_or_404(Task, pk=task_pk)
-        if task_title != task.title:
-            return Response({"detail": "The task with this id and title wasn`t found."},
-                            status=status.HTTP_404_NOT_FOUND)
-        if task.status:
-            return Response(
-                {"detail": "Request has already been processed."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return self.approve(request, task_pk)
 
-        visa = Visa(
-            photo=task.user_data.get("photo"),
-            type=task.user_data.get("visa_type"),
-            country=task.user_data.get("visa_country"),
-            entry_amount=task.user_data.get("visa_entry_amount"),
-            foreign_passport=task.user.foreign_passport
-        )
-        serializer = VisaSerializer(
-            instance=visa,
-            data=request.data,
-            context={'request': request}
-        )
-        if serializer.is_valid():
-            old_visa = Visa.objects.filter(
-                foreign_passport=task.user.foreign_passport,
-                type=visa.type,
-                country=visa.country,
-                entry_amount=visa.entry_amount,
-                is_active=True
-            ).first()
-            if old_visa:
-                old_visa.is_active = False
-                old_visa.save()
-            serializer.save()
-            task.status = 1
-            task.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-
-class ExtendVisaExtentionAPIView(APIView):
-    permission_classes = [IsAdminUser]
+
+class ExtendVisaExtentionAPIView(TaskHandlerAPIView):
+    titles = ExtendVisaHandler.titles
+    success_detail = "You successfully accepted the visa extension."
 
     def patch(self, request, task_pk):
-        task_title = "extend a visa"
-        task = get_object_or_404(Task, pk=task_pk)
-        if task_title != task.title:
-            return Response({"detail": "The task with this id and title wasn`t found."},
-                            status=status.HTTP_404_NOT_FOUND)
-        if task.status:
-            return Response(
-                {"detail": "Request has already been processed."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        visa = Visa.objects.get(pk=task.user_data.get("visa_id"))
-        visa.date_of_expiry = date.fromisoformat(task.user_data.get("visa_extension_date"))
-        visa.save()
-        task.status = 1
-        task.save()
-        return Response({"detail": "You successfully accepted the visa extension."}, status=status.HTTP_200_OK)
+        return self.approve(request, task_pk)
 
 
 class RejectTaskAPIView(APIView):
     permission_classes = [IsAdminUser]
 
     def patch(self, request, task_pk):
-        task = get_object_or_404(Task, pk=task_pk)
+        handler = get_handler(task_pk)
+        task = handler.task
+        already_processed = "Request has already been processed."
         if task.status in (1, 2):
-            return Response(
-                {"detail": "Request has already been processed."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        task.status = 2
-        task.save()
+            return Response({"detail": already_processed}, status=status.HTTP_400_BAD_REQUEST)
+        conflict = lease_conflict(task, request.user)
+        if conflict:
+            return conflict
+        if not handler.reject(request.user):
+            return processing_failed(task, request.user, already_processed)
         msg = f"You successfully rejected the request `{task.title}` by {task.user.surname} {task.user.name} user."
         return Response({"detail": msg}, status=status.HTTP_200_OK)
 
 
-class RestoreVisaAPIView(APIView):
+class BulkRejectTaskAPIView(APIView):
+    """Reject a list of pending tasks; tasks leased to another staff member are skipped."""
     permission_classes = [IsAdminUser]
 
-    def put(self, request, task_pk):
-        task_title = "restore a visa due to loss"
-        task = get_object_or_404(Task, pk=task_pk)
-        if task.title != task_title:
-            return Response({"detail": "The task with this id and title wasn`t found."},
-                            status=status.HTTP_404_NOT_FOUND)
-        if task.status:
-            return Response(
-                {"detail": "This user's request has already been processed."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        old_visa = Visa.objects.get(pk=task.user_data.get("visa_id"))
-        visa = Visa(
-            photo=task.user_data.get("photo"),
-            type=old_visa.type,
-            country=old_visa.country,
-            entry_amount=old_visa.entry_amount,
-            foreign_passport=task.user.foreign_passport,
-            date_of_expiry=old_visa.date_of_expiry
-        )
-        serializer = RestoreVisaSerializer(
-            instance=visa,
-            data=request.data,
-            context={'request': request}
+    def patch(self, request):
+        serializer = TaskIdListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        rejected = Task.objects.filter(pk__in=serializer.validated_data['ids']).update_status(2, request.user)
+        return Response({"rejected": rejected}, status=status.HTTP_200_OK)
+
+
+class BulkChangeUserAddressAPIView(APIView):
+    """
+    Approve a list of `change registation address` tasks in one transaction.
+
+    Tasks are processed in batches: each batch is locked and read with one query,
+    marked processed with one UPDATE (plus the two counter updates) and the users'
+    addresses are set with one bulk UPDATE. The response has the result for each requested id.
+    """
+    permission_classes = [IsAdminUser]
+    task_title = "change registation address"
+    batch_size = 200
+
+    def patch(self, request):
+        serializer = TaskIdListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        results = {}
+        with transaction.atomic():
+            change_seq = TaskChangeSequence.objects.next_value()
+            for start in range(0, len(ids), self.batch_size):
+                results.update(self.approve_batch(ids[start:start + self.batch_size], change_seq, request.user))
+
+        return Response({
+            "approved": sum(result == "approved" for result in results.values()),
+            "results": [{"id": pk, "result": results[pk]} for pk in ids]
+        }, status=status.HTTP_200_OK)
+
+    def approve_batch(self, ids, change_seq, staff_user):
+        results = dict.fromkeys(ids, "not_found")
+        now = timezone.now()
+        tasks = Task.objects.select_for_update().filter(pk__in=ids, title=self.task_title).values_list(
+            'pk', 'status', 'user_id', 'address_id', 'created_at', 'leased_by_id', 'lease_expires_at'
         )
-        if serializer.is_valid():
-            old_visa.is_active = False
-            old_visa.save()
-            serializer.save()
-            task.status = 1
-            task.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        users = []
+        created = []
+        for pk, task_status, user_id, address_id, created_at, leased_by_id, lease_expires_at in tasks:
+            if task_status:
+                results[pk] = "already_processed"
+            elif leased_by_id not in (None, staff_user.pk) and lease_expires_at > now:
+                results[pk] = "leased"
+            elif address_id is None:
+                results[pk] = "address_not_found"
+            else:
+                results[pk] = "approved"
+                users.append(CustomUser(pk=user_id, address_id=address_id))
+                created.append((self.task_title, created_at))
+
+        approved = [pk for pk, result in results.items() if result == "approved"]
+        if approved:
+            # The tasks were read pending and free under lock, so all of them are updated.
+            Task.objects.processable_by(staff_user, now).filter(pk__in=approved, status=0).update(
+                status=1, change_seq=change_seq, processed_at=now, processed_by=staff_user
+            )
+            TaskCounter.objects.add({(self.task_title, 0): -len(approved), (self.task_title, 1): len(approved)})
+            for user in users:
+                user.documents_version = F('documents_version') + 1
+                user.documents_modified_at = now
+            CustomUser.objects.bulk_update(users, ['address', 'documents_version', 'documents_modified_at'])
+            documents.invalidate([user.pk for user in users])
+            metrics.tasks_processed(1, created, now)
+        return results
+
+
+class RestoreVisaAPIView(TaskHandlerAPIView):
+    titles = RestoreVisaHandler.titles
+    serializer_classes = {'visa': RestoreVisaSerializer}
+    already_processed = "This user's request has already been processed."
+
+    def put(self, request, task_pk):
+        return self.approve(request, task_pk)
@@ -3,40 +3,43 @@ from django.conf import settings
 
 from authentication.serializers import UserListSerializer
 from .models import Task
-from passports.serializers import AddressSerializer, VisaSerializer
-from passports.models import Address, Visa
+from passports.serializers import AddressSerializer, PhotoVariantField, VisaSerializer
+
+
+# Fields of a task shown to staff and clients, the rest are internal to the queue.
+TASK_FIELDS = ('id', 'user', 'title', 'status', 'user_data', 'created_at')
 
 
 class TaskUserDataSerializer(serializers.Serializer):
-    new_photo = serializers.CharField(required=False, allow_blank=True, source='photo')
-    new_name = serializers.CharField(required=False, allow_blank=True, source='name')
-    new_surname = serializers.CharField(required=False, allow_blank=True, source='surname')
-    new_patronymic = serializers.CharField(required=False, allow_blank=True, source='patronymic')
+    """
+    Request data of a task, built from the free-form `user_data` and the
+    `visa`, `address` and `visa_country` columns.
+    """
+    new_photo = serializers.CharField(required=False, allow_blank=True, source='user_data.photo')
+    new_photo_thumbnail = PhotoVariantField('thumbnail', source='user_data.photo')
+    new_photo_preview = PhotoVariantField('preview', source='user_data.photo')
+    new_name = serializers.CharField(required=False, allow_blank=True, source='user_data.name')
+    new_surname = serializers.CharField(required=False, allow_blank=True, source='user_data.surname')
+    new_patronymic = serializers.CharField(required=False, allow_blank=True, source='user_data.patronymic')
     new_address = serializers.SerializerMethodField()
 
-    visa_type = serializers.CharField(required=False, allow_blank=True)
+    visa_type = serializers.CharField(required=False, allow_blank=True, source='user_data.visa_type')
     visa_country = serializers.CharField(required=False, allow_blank=True)
-    visa_entry_amount = serializers.CharField(required=False, allow_blank=True)
+    visa_entry_amount = serializers.CharField(required=False, allow_blank=True, source='user_data.visa_entry_amount')
 
     visa = serializers.SerializerMethodField()
 
-    visa_extension_reason = serializers.CharField(required=False, allow_blank=True)
-    visa_extension_date = serializers.DateField(required=False)
+    visa_extension_reason = serializers.CharField(required=False, allow_blank=True, source='user_data.visa_extension_reason')
+    visa_extension_date = serializers.DateField(required=False, source='user_data.visa_extension_date')
 
     def get_visa(self, obj):
-        visa_id = obj.get('visa_id')
-        if visa_id:
-            visa = Visa.objects.get(pk=visa_id)
-            if visa:
-                return VisaSerializer(visa, context={'request': self.context.get('request')}).data
+        if obj.visa:
+            return VisaSerializer(obj.visa, context={'request': self.context.get('request')}).data
         return None
 
     def get_new_address(self, obj):
-        address_id = obj.get('address_id')
-        if address_id:
-            address = Address.objects.get(pk=address_id)
-            if address:
-                return AddressSerializer(address).data
+        if obj.address:
+            return AddressSerializer(obj.address).data
         return None
 
     def to_representation(self, instance):
@@ -49,25 +52,61 @@ class TaskUserDataSerializer(serializers.Serializer):
         if representation.get('new_photo') and request:
             representation['new_photo'] = request.build_absolute_uri(settings.MEDIA_URL + representation['new_photo'])
 
-        if representation.get('new_address') is None:
-            representation.pop('new_address', None)
-
-        if representation.get('visa') is None:
-            representation.pop('visa', None)
+        for field in ('new_address', 'visa', 'visa_country'):
+            if representation.get(field) is None:
+                representation.pop(field, None)
         return representation
 
 
 class TaskUserSerializer(serializers.ModelSerializer):
     user = UserListSerializer()
-    user_data = TaskUserDataSerializer()
+    user_data = TaskUserDataSerializer(source='*')
 
     class Meta:
         model = Task
-        fields = '__all__'
+        fields = TASK_FIELDS
+
+
+class TaskLeaseSerializer(TaskUserSerializer):
+    """A task claimed by a staff member, with the lease it was claimed with."""
+
+    class Meta(TaskUserSerializer.Meta):
+        fields = TASK_FIELDS + ('leased_by', 'lease_expires_at')
 
 
 class TaskSerializer(serializers.ModelSerializer):
+    """
+    A task of the client. The `visa`, `address` and `visa_country` columns are
+    read back into `user_data` under the keys the requests were stored with.
+    """
 
     class Meta:
         model = Task
-        fields = '__all__'
+        fields = TASK_FIELDS
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        columns = {
+            'visa_id': instance.visa_id,
+            'address_id': instance.address_id,
+            'visa_country': instance.visa_country,
+        }
+        representation['user_data'] = {
+            **representation['user_data'],
+            **{key: value for key, value in columns.items() if value is not None}
+        }
+        return representation
+
+
+class TaskIdListSerializer(serializers.Serializer):
+    """Ids of the tasks a bulk staff action is applied to."""
+    max_ids = 1000
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=max_ids
+    )
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Task, TaskArchive, TaskCounter
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=TaskArchive)
+def decrement_task_counter(sender, instance, **kwargs):
+    """Keep the counters right when tasks are deleted, including by a cascade from their user."""
+    TaskCounter.objects.add({(instance.title, instance.status): -1})
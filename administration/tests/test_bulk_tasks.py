@@ -0,0 +1,102 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from administration.models import Task
+from authentication.factories import CustomUserFactory
+from passports.factories import AddressFactory, PassportFactory
+
+
+class BulkTaskAPITests(APITestCase):
+    def setUp(self):
+        self.admin = CustomUserFactory(
+            email="admin@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.old_address = AddressFactory()
+        self.users = [
+            CustomUserFactory(email=f"user{i}@test.com", address=self.old_address,
+                              passport=PassportFactory(photo=''), foreign_passport=None)
+            for i in range(3)
+        ]
+        self.new_addresses = [AddressFactory() for _ in self.users]
+        self.tasks = [
+            TaskFactory(user=user, title="change registation address", status=0, address=address)
+            for user, address in zip(self.users, self.new_addresses)
+        ]
+
+
+class BulkRejectTaskAPITests(BulkTaskAPITests):
+    path = "/api/staff/bulk-reject-tasks/"
+
+    def test_bulk_reject_successful(self):
+        processed = TaskFactory(user=self.users[0], title="change user name", status=1)
+        ids = [task.pk for task in self.tasks] + [processed.pk, 999999]
+        # Savepoint, change number update and read, titles read, the task update, two counter updates,
+        # savepoint release.
+        with self.assertNumQueries(8):
+            response = self.client.patch(self.path, {"ids": ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"rejected": 3})
+        self.assertEqual(Task.objects.filter(status=2).count(), 3)
+        processed.refresh_from_db()
+        self.assertEqual(processed.status, 1)
+
+    def test_bulk_reject_empty_ids(self):
+        response = self.client.patch(self.path, {"ids": []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("ids", response.json())
+
+    def test_bulk_reject_unauthorized(self):
+        self.client.force_authenticate(self.users[0])
+        response = self.client.patch(self.path, {"ids": [self.tasks[0].pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Task.objects.filter(status=0).count(), 3)
+
+
+class BulkChangeAddressAPITests(BulkTaskAPITests):
+    path = "/api/staff/bulk-change-address/"
+
+    def test_bulk_change_address_successful(self):
+        ids = [task.pk for task in self.tasks]
+        response = self.client.patch(self.path, {"ids": ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            "approved": 3,
+            "results": [{"id": pk, "result": "approved"} for pk in ids]
+        })
+        for user, address in zip(self.users, self.new_addresses):
+            user.refresh_from_db()
+            self.assertEqual(user.address, address)
+        self.assertEqual(Task.objects.filter(status=1).count(), 3)
+
+    def test_bulk_change_address_per_task_results(self):
+        Task.objects.filter(pk=self.tasks[1].pk).update(status=2)
+        other = TaskFactory(user=self.users[0], title="change user name", status=0)
+        ids = [self.tasks[0].pk, self.tasks[1].pk, other.pk, 999999]
+        response = self.client.patch(self.path, {"ids": ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            "approved": 1,
+            "results": [
+                {"id": self.tasks[0].pk, "result": "approved"},
+                {"id": self.tasks[1].pk, "result": "already_processed"},
+                {"id": other.pk, "result": "not_found"},
+                {"id": 999999, "result": "not_found"},
+            ]
+        })
+        self.users[1].refresh_from_db()
+        self.assertEqual(self.users[1].address, self.old_address)
+        other.refresh_from_db()
+        self.assertEqual(other.status, 0)
+
+    def test_bulk_change_address_queries_per_batch(self):
+        ids = [task.pk for task in self.tasks]
+        # Savepoint, change number update and read, task read, task update, two counter updates, user update,
+        # savepoint release.
+        with self.assertNumQueries(9):
+            self.client.patch(self.path, {"ids": ids}, format='json')
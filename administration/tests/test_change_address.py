@@ -46,7 +46,7 @@ class ChangeAddressByStaffAPITests(APITestCase):
             user=self.user,
             title="change registation address",
             status=0,
-            user_data={"address_id": self.updated_address.id}
+            address=self.updated_address
         )
 
     def test_change_address_successful(self):
@@ -66,7 +66,7 @@ class ChangeAddressByStaffAPITests(APITestCase):
             user=self.user,
             title="change registation address",
             status=1,
-            user_data={"address_id": self.updated_address.id}
+            address=self.updated_address
         )
         response = self.client.patch(path=f"{self.path}{task_done.pk}/")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -80,8 +80,8 @@ class ChangeAddressByStaffAPITests(APITestCase):
             user=self.user,
             title="create an internal passport",
             status=0,
+            address=self.updated_address,
             user_data={
-                "address_id": self.updated_address.id,
                 "photo": "1-surname22-name22-create-an-internal-passport.jpg"
             }
         )
@@ -93,13 +93,9 @@ class ChangeAddressByStaffAPITests(APITestCase):
         )
 
     def test_change_address_incorrect(self):
-        incorrect_task = TaskFactory(
-            user=self.user,
-            title="change registation address",
-            status=0,
-            user_data={"address_id": 999}
-        )
-        response = self.client.patch(path=f"{self.path}{incorrect_task.pk}/")
+        self.task.address = None
+        self.task.save()
+        response = self.client.patch(path=f"{self.path}{self.task.pk}/")
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertEqual({'detail': 'No Address matches the given query.'}, response.json())
 
@@ -3,6 +3,7 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 
 from administration.factories import TaskFactory
+from administration.jobs import run_due
 from authentication.factories import CustomUserFactory
 from passports.factories import AddressFactory, PassportFactory, ForeignPassportFactory, VisaFactory
 from passports.models import Visa
@@ -259,6 +260,8 @@ class ChangeUserDataByStaffAPITests(APITestCase):
         self.task_name2.refresh_from_db()
         self.assertNotEqual(self.user2.passport.number, self.internal_passport2.number)
         self.assertNotEqual(self.user2.foreign_passport.number, self.foreign_passport2.number)
+        # Replaced documents are deleted by a background job.
+        run_due('test')
         visas = Visa.objects.all()
         self.assertFalse(visas)
         self.assertEqual(self.user2.name, self.task_name2.user_data['name'])
@@ -279,6 +282,8 @@ class ChangeUserDataByStaffAPITests(APITestCase):
         self.task_surname2.refresh_from_db()
         self.assertNotEqual(self.user2.passport.number, self.internal_passport2.number)
         self.assertNotEqual(self.user2.foreign_passport.number, self.foreign_passport2.number)
+        # Replaced documents are deleted by a background job.
+        run_due('test')
         visas = Visa.objects.all()
         self.assertFalse(visas)
         self.assertEqual(self.user2.surname, self.task_surname2.user_data['surname'])
@@ -299,6 +304,8 @@ class ChangeUserDataByStaffAPITests(APITestCase):
         self.task_patronymic2.refresh_from_db()
         self.assertNotEqual(self.user2.passport.number, self.internal_passport2.number)
         self.assertNotEqual(self.user2.foreign_passport.number, self.foreign_passport2.number)
+        # Replaced documents are deleted by a background job.
+        run_due('test')
         visas = Visa.objects.all()
         self.assertFalse(visas)
         self.assertEqual(self.user2.patronymic, self.task_patronymic2.user_data['patronymic'])
@@ -439,8 +446,8 @@ class ChangeUserDataByStaffAPITests(APITestCase):
             user=self.user1,
             title="create an internal passport",
             status=0,
+            address=AddressFactory(),
             user_data={
-                "address_id": AddressFactory().id,
                 "photo": "1-surname22-name22-create-an-internal-passport.jpg"
             }
         )
@@ -64,7 +64,9 @@ class CreateForeignPassportByStaffAPITests(APITestCase):
                 "authority": self.valid_data['authority'],
                 "date_of_issue": self.valid_data['date_of_issue'],
                 "date_of_expiry": self.valid_data['date_of_expiry'],
-                "photo": ANY
+                "photo": ANY,
+                "photo_thumbnail": ANY,
+                "photo_preview": ANY
             },
             response.json()
         )
@@ -99,7 +101,7 @@ class CreateForeignPassportByStaffAPITests(APITestCase):
             user=self.user,
             title="change registation address",
             status=0,
-            user_data={"address_id": self.address.id}
+            address=self.address
         )
         response = self.client.post(
             path=f"{self.path}{wrong_task.pk}/",
@@ -41,8 +41,8 @@ class CreateInternalPassportByStaffAPITests(APITestCase):
             user=self.user,
             title="create an internal passport",
             status=0,
+            address=self.address,
             user_data={
-                "address_id": self.address.id,
                 "photo": "1-surname22-name22-create-an-internal-passport.jpg"
             }
         )
@@ -65,7 +65,9 @@ class CreateInternalPassportByStaffAPITests(APITestCase):
                 "authority": self.valid_data['authority'],
                 "date_of_issue": self.valid_data['date_of_issue'],
                 "date_of_expiry": self.valid_data['date_of_expiry'],
-                "photo": ANY
+                "photo": ANY,
+                "photo_thumbnail": ANY,
+                "photo_preview": ANY
             },
             response.json()
         )
@@ -80,8 +82,8 @@ class CreateInternalPassportByStaffAPITests(APITestCase):
             user=self.user,
             title="create an internal passport",
             status=1,
+            address=self.address,
             user_data={
-                "address_id": self.address.id,
                 "photo": "1-surname22-name22-create-an-internal-passport.jpg"
             }
         )
@@ -101,7 +103,7 @@ class CreateInternalPassportByStaffAPITests(APITestCase):
             user=self.user,
             title="change registation address",
             status=0,
-            user_data={"address_id": self.address.id}
+            address=self.address
         )
         response = self.client.post(
             path=f"{self.path}{wrong_task.pk}/",
@@ -115,17 +117,10 @@ class CreateInternalPassportByStaffAPITests(APITestCase):
         )
 
     def test_create_internal_passport_address_incorrect(self):
-        incorrect_task = TaskFactory(
-            user=self.user,
-            title="create an internal passport",
-            status=0,
-            user_data={
-                "photo": "1-surname22-name22-create-an-internal-passport.jpg",
-                "address_id": 999
-            }
-        )
+        self.task.address = None
+        self.task.save()
         response = self.client.post(
-            path=f"{self.path}{incorrect_task.pk}/",
+            path=f"{self.path}{self.task.pk}/",
             data=self.valid_data,
             format='json'
         )
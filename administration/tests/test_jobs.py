@@ -0,0 +1,137 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from administration.factories import TaskFactory
+from administration.jobs import JOBS, enqueue, job, retry_delay, run_due, run_next
+from administration.models import Job
+from authentication.factories import CustomUserFactory
+from passports.factories import ForeignPassportFactory, PassportFactory, VisaFactory
+from passports.models import ForeignPassport, Passport, Visa
+
+calls = []
+
+
+@job(max_attempts=2)
+def record_call(value, fail=False, follow_up=None):
+    calls.append(value)
+    if follow_up:
+        enqueue('record_call', value=follow_up)
+    if fail:
+        raise ValueError("Job failed.")
+
+
+@override_settings(JOB_RETRY_BASE_SECONDS=30, JOB_RETRY_MAX_SECONDS=100, JOB_LEASE_SECONDS=60)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_in_rolled_back_transaction(self):
+        try:
+            with transaction.atomic():
+                enqueue('record_call', value=1)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertFalse(Job.objects.exists())
+
+    def test_run_next(self):
+        created = enqueue('record_call', value=1, follow_up=2)
+        self.assertEqual(created.max_attempts, 2)
+        ran = run_next('worker')
+        self.assertEqual(ran.pk, created.pk)
+        self.assertEqual(ran.last_error, '')
+        self.assertEqual(calls, [1])
+        # The job is deleted and the changes it made are committed.
+        self.assertEqual(list(Job.objects.values_list('payload', flat=True)), [{'value': 2}])
+
+    def test_nothing_due(self):
+        Job.objects.create(name='record_call', payload={'value': 1}, max_attempts=1,
+                           run_after=timezone.now() + timedelta(minutes=1))
+        self.assertIsNone(run_next('worker'))
+        self.assertEqual(calls, [])
+
+    def test_retry_with_backoff(self):
+        enqueue('record_call', value=1, fail=True, follow_up=2)
+        before = timezone.now()
+        with self.assertLogs('administration.jobs', 'WARNING'):
+            failed = run_next('worker')
+        self.assertIn("ValueError: Job failed.", failed.last_error)
+
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts, failed.locked_by), (Job.PENDING, 1, ''))
+        self.assertGreaterEqual(failed.run_after, before + timedelta(seconds=30))
+        # The changes of the failed attempt are rolled back.
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertIsNone(run_next('worker'))
+
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs('administration.jobs', 'WARNING'):
+            run_next('worker')
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), (Job.FAILED, 2))
+        self.assertEqual(calls, [1, 1])
+        self.assertIsNone(run_next('worker'))
+
+    def test_retry_delay(self):
+        self.assertEqual([retry_delay(attempts) for attempts in range(1, 5)], [30, 60, 100, 100])
+
+    def test_expired_lease_is_claimed_again(self):
+        created = enqueue('record_call', value=1)
+        self.assertEqual(Job.objects.claim_next('dead worker').pk, created.pk)
+        self.assertIsNone(Job.objects.claim_next('worker'))
+
+        Job.objects.update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        claimed = Job.objects.claim_next('worker')
+        self.assertEqual((claimed.pk, claimed.locked_by, claimed.attempts), (created.pk, 'worker', 2))
+
+    def test_runworker_once(self):
+        enqueue('record_call', value=1, follow_up=3)
+        enqueue('record_call', value=2)
+        out = StringIO()
+        call_command('runworker', '--once', stdout=out)
+        # The job enqueued by the first one is run in the same pass.
+        self.assertEqual(out.getvalue(), 'Ran 3 job(s).\n')
+        self.assertEqual(calls, [1, 2, 3])
+        self.assertFalse(Job.objects.exists())
+
+
+class DocumentJobsTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_delete_documents(self):
+        self.assertIn('delete_documents', JOBS)
+        passport = PassportFactory(photo=default_storage.save('passport.jpg', ContentFile(b'photo')))
+        foreign_passport = ForeignPassportFactory(photo=default_storage.save('foreign.jpg', ContentFile(b'photo')))
+        visa = VisaFactory(foreign_passport=foreign_passport,
+                           photo=default_storage.save('visa.jpg', ContentFile(b'photo')))
+        task = TaskFactory(user=CustomUserFactory(passport=None, foreign_passport=None),
+                           title="extend a visa", status=1, visa=visa)
+        enqueue('delete_documents', passports=[passport.pk], foreign_passports=[foreign_passport.pk])
+
+        self.assertEqual(run_due('worker'), 2)
+        self.assertFalse(Passport.objects.filter(pk=passport.pk).exists())
+        self.assertFalse(ForeignPassport.objects.filter(pk=foreign_passport.pk).exists())
+        self.assertFalse(Visa.objects.exists())
+        task.refresh_from_db()
+        self.assertIsNone(task.visa)
+        for name in ('passport.jpg', 'foreign.jpg', 'visa.jpg'):
+            self.assertFalse(default_storage.exists(name))
+
+    def test_delete_documents_again(self):
+        enqueue('delete_documents', passports=[12345678])
+        self.assertEqual(run_due('worker'), 1)
+        self.assertFalse(Job.objects.exists())
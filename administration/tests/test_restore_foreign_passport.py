@@ -4,6 +4,7 @@ from rest_framework.test import APITestCase
 from unittest.mock import ANY
 
 from administration.factories import TaskFactory
+from administration.jobs import run_due
 from authentication.factories import CustomUserFactory
 from passports.factories import AddressFactory, PassportFactory, ForeignPassportFactory, VisaFactory
 from passports.models import Visa, ForeignPassport
@@ -75,13 +76,17 @@ class RestoreForeignPassportByStaffAPITests(APITestCase):
                 "authority": self.valid_data['authority'],
                 "date_of_issue": self.valid_data['date_of_issue'],
                 "date_of_expiry": self.valid_data['date_of_expiry'],
-                "photo": ANY
+                "photo": ANY,
+                "photo_thumbnail": ANY,
+                "photo_preview": ANY
             },
             response.json()
         )
         self.user.refresh_from_db()
         self.task_passport_loss.refresh_from_db()
         self.assertEqual(self.user.foreign_passport.number, response.data['number'])
+        # Replaced documents are deleted by a background job.
+        run_due('test')
         visas = Visa.objects.all()
         self.assertFalse(visas)
         check_old_passport = ForeignPassport.objects.filter(number=self.foreign_passport.number).exists()
@@ -101,13 +106,17 @@ class RestoreForeignPassportByStaffAPITests(APITestCase):
                 "authority": self.valid_data['authority'],
                 "date_of_issue": self.valid_data['date_of_issue'],
                 "date_of_expiry": self.valid_data['date_of_expiry'],
-                "photo": ANY
+                "photo": ANY,
+                "photo_thumbnail": ANY,
+                "photo_preview": ANY
             },
             response.json()
         )
         self.user.refresh_from_db()
         self.task_passport_expiry.refresh_from_db()
         self.assertEqual(self.user.foreign_passport.number, response.data['number'])
+        # Replaced documents are deleted by a background job.
+        run_due('test')
         visas = Visa.objects.all()
         self.assertFalse(visas)
         check_old_passport = ForeignPassport.objects.filter(number=self.foreign_passport.number).exists()
@@ -139,7 +148,7 @@ class RestoreForeignPassportByStaffAPITests(APITestCase):
             user=self.user,
             title="change registation address",
             status=0,
-            user_data={"address_id": self.address.id}
+            address=self.address
         )
         response = self.client.put(
             path=f"{self.path}{wrong_task.pk}/",
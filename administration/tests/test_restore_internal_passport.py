@@ -4,6 +4,7 @@ from unittest.mock import ANY
 from django.utils import timezone
 
 from administration.factories import TaskFactory
+from administration.jobs import run_due
 from authentication.factories import CustomUserFactory
 from passports.factories import AddressFactory, PassportFactory
 from passports.models import Passport
@@ -74,13 +75,17 @@ class RestoreInternalPassportByStaffAPITests(APITestCase):
                 "authority": self.valid_data['authority'],
                 "date_of_issue": self.valid_data['date_of_issue'],
                 "date_of_expiry": self.valid_data['date_of_expiry'],
-                "photo": ANY
+                "photo": ANY,
+                "photo_thumbnail": ANY,
+                "photo_preview": ANY
             },
             response.json()
         )
         self.user.refresh_from_db()
         self.task_passport_loss.refresh_from_db()
         self.assertEqual(self.user.passport.number, response.data['number'])
+        # Replaced documents are deleted by a background job.
+        run_due('test')
         check_old_passport = Passport.objects.filter(number=self.passport.number).exists()
         self.assertFalse(check_old_passport)
         self.assertEqual(self.task_passport_loss.status, 1)
@@ -98,13 +103,17 @@ class RestoreInternalPassportByStaffAPITests(APITestCase):
                 "authority": self.valid_data['authority'],
                 "date_of_issue": self.valid_data['date_of_issue'],
                 "date_of_expiry": self.valid_data['date_of_expiry'],
-                "photo": ANY
+                "photo": ANY,
+                "photo_thumbnail": ANY,
+                "photo_preview": ANY
             },
             response.json()
         )
         self.user.refresh_from_db()
         self.task_passport_expiry.refresh_from_db()
         self.assertEqual(self.user.passport.number, response.data['number'])
+        # Replaced documents are deleted by a background job.
+        run_due('test')
         check_old_passport = Passport.objects.filter(number=self.passport.number).exists()
         self.assertFalse(check_old_passport)
         self.assertEqual(self.task_passport_expiry.status, 1)
@@ -134,7 +143,7 @@ class RestoreInternalPassportByStaffAPITests(APITestCase):
             user=self.user,
             title="change registation address",
             status=0,
-            user_data={"address_id": self.address.id}
+            address=self.address
         )
         response = self.client.put(
             path=f"{self.path}{wrong_task.pk}/",
@@ -0,0 +1,121 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import ANY
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from administration.models import Task, TaskArchive, TaskCounter
+from authentication.factories import CustomUserFactory
+from passports.factories import AddressFactory, PassportFactory
+
+
+class TaskArchiveTests(APITestCase):
+    def setUp(self):
+        self.path = "/api/my-documents/tasks/"
+        self.user = CustomUserFactory(email="test@test.com", passport=PassportFactory(photo=''), foreign_passport=None)
+        self.other_user = CustomUserFactory(email="other@test.com", passport=None, foreign_passport=None)
+
+        old = timezone.now() - timedelta(days=100)
+        self.old_completed = self.create_task("change user name", 1, old)
+        self.old_rejected = self.create_task("change user surname", 2, old - timedelta(days=1))
+        self.old_pending = self.create_task("change user patronymic", 0, old)
+        self.recent_completed = self.create_task("change user name", 1, timezone.now())
+        self.other_task = self.create_task("change user name", 1, old, user=self.other_user)
+        self.client.force_authenticate(self.user)
+
+    def create_task(self, title, task_status, created_at, user=None):
+        task = TaskFactory(user=user or self.user, title=title, status=task_status, user_data={'photo': ''})
+        Task.objects.filter(pk=task.pk).update(created_at=created_at)
+        return task
+
+    def archive(self, **options):
+        out = StringIO()
+        call_command("archive_tasks", stdout=out, **options)
+        return out.getvalue()
+
+    def get_ids(self, response):
+        return [task['id'] for task in response.data['results']]
+
+    def test_archive_moves_old_finished_tasks(self):
+        counters = list(TaskCounter.objects.values_list('title', 'status', 'count'))
+        output = self.archive(days=30, batch_size=2)
+        self.assertIn("Archived 3 task(s)", output)
+        self.assertEqual(
+            set(TaskArchive.objects.values_list('pk', flat=True)),
+            {self.old_completed.pk, self.old_rejected.pk, self.other_task.pk}
+        )
+        self.assertEqual(
+            set(Task.objects.values_list('pk', flat=True)),
+            {self.old_pending.pk, self.recent_completed.pk}
+        )
+        archived = TaskArchive.objects.get(pk=self.old_completed.pk)
+        self.assertEqual(archived.title, "change user name")
+        self.assertEqual(archived.user_data, {'photo': ''})
+        self.assertEqual(archived.created_at, Task.objects.get(pk=self.old_pending.pk).created_at)
+        self.assertEqual(list(TaskCounter.objects.values_list('title', 'status', 'count')), counters)
+
+    def test_user_list_reads_through_the_archive(self):
+        before = self.client.get(self.path)
+        self.archive(days=30)
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(self.get_ids(response), self.get_ids(before))
+        self.assertEqual(response.data['results'], before.data['results'])
+
+    def test_user_list_filters_the_archive(self):
+        self.archive(days=30)
+        response = self.client.get(self.path, {'status': 2})
+        self.assertEqual(self.get_ids(response), [self.old_rejected.pk])
+        response = self.client.get(self.path, {'title': 'change-user-name'})
+        self.assertEqual(self.get_ids(response), [self.recent_completed.pk, self.old_completed.pk])
+
+    def test_user_cursor_pagination_reads_through_the_archive(self):
+        expected = self.get_ids(self.client.get(self.path))
+        self.archive(days=30)
+        response = self.client.get(self.path, {'cursor': '', 'page_size': 3})
+        ids = self.get_ids(response)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(ids + self.get_ids(response), expected)
+        self.assertIsNone(response.data['next'])
+
+    def test_user_retrieve_and_export_archived_task(self):
+        self.archive(days=30)
+        response = self.client.get(f"{self.path}{self.old_completed.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], "change user name")
+
+        response = self.client.get(f"{self.path}{self.other_task.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(f"{self.path}export/")
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 4)
+
+    def test_user_task_fields(self):
+        address = AddressFactory()
+        task = TaskFactory(user=self.user, title="change registation address", status=0, address=address, user_data={})
+        response = self.client.get(f"{self.path}{task.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {
+                'id': task.pk,
+                'user': self.user.pk,
+                'title': "change registation address",
+                'status': 0,
+                'user_data': {'address_id': address.pk},
+                'created_at': ANY
+            },
+            response.json()
+        )
+
+    def test_deleted_user_archived_tasks_are_uncounted(self):
+        self.archive(days=30)
+        self.other_user.delete()
+        self.assertFalse(TaskArchive.objects.filter(pk=self.other_task.pk).exists())
+        self.assertEqual(TaskCounter.objects.rebuild(), {})
@@ -0,0 +1,174 @@
+import threading
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration import feed
+from administration.factories import TaskFactory
+from administration.models import Task, TaskChangeSequence
+from administration.rest_views import TaskListAPIView
+from authentication.factories import CustomUserFactory
+
+
+class TaskChangeFeedAPITests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.path = "/api/staff/tasks/changes/"
+        self.user = CustomUserFactory(email="test@test.com", passport=None, foreign_passport=None)
+        self.admin = CustomUserFactory(
+            email="admin@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.task = TaskFactory(user=self.user, title="change user name", status=0)
+
+    def tearDown(self):
+        cache.clear()
+
+    def poll(self, cursor, **params):
+        response = self.client.get(self.path, {'cursor': cursor, 'timeout': 0, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['cursor'], [task['id'] for task in response.data['results']]
+
+    def test_without_cursor(self):
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+        seq, pk, missing = TaskListAPIView.decode_change_cursor(response.data['cursor'])
+        self.assertEqual((seq, pk), (self.task.change_seq, None))
+        # Numbers below that no task has yet are kept, their changes may still be committed.
+        self.assertEqual(missing, set(range(max(seq - 100, 0) + 1, seq)))
+
+    def test_out_of_order_commit(self):
+        cursor = self.client.get(self.path).data['cursor']
+        # A change numbered before `task` that isn't committed when the feed reads `task`.
+        late_number = TaskChangeSequence.objects.next_value()
+        task = TaskFactory(user=self.user, title="change user surname", status=0)
+        cursor, ids = self.poll(cursor)
+        self.assertEqual(ids, [task.pk])
+
+        Task.objects.filter(pk=self.task.pk).update(change_seq=late_number)
+        cursor, ids = self.poll(cursor)
+        self.assertEqual(ids, [self.task.pk])
+        self.assertEqual(self.poll(cursor), (cursor, []))
+
+    def test_commit_between_reads(self):
+        cursor = self.client.get(self.path).data['cursor']
+        late_number = TaskChangeSequence.objects.next_value()
+        task = TaskFactory(user=self.user, title="change user surname", status=0)
+        committed_changes = TaskListAPIView.committed_changes
+
+        def commit_late(numbers):
+            # Committed after the tasks were read, before the numbers are checked.
+            Task.objects.filter(pk=self.task.pk).update(change_seq=late_number)
+            return committed_changes(numbers)
+
+        with patch.object(TaskListAPIView, 'committed_changes', side_effect=commit_late):
+            cursor, ids = self.poll(cursor)
+        self.assertEqual(ids, [self.task.pk, task.pk])
+        self.assertEqual(self.poll(cursor), (cursor, []))
+
+    @override_settings(TASK_FEED_REORDER_WINDOW=2)
+    def test_missing_number_leaves_window(self):
+        cursor = self.client.get(self.path).data['cursor']
+        TaskChangeSequence.objects.next_value()
+        tasks = [TaskFactory(user=self.user, title=title, status=0)
+                 for title in ("change user surname", "change user patronymic", "create a foreign passport")]
+        cursor, ids = self.poll(cursor)
+        self.assertEqual(ids, [task.pk for task in tasks])
+        self.assertEqual(cursor, str(tasks[-1].change_seq))
+
+    def test_created_and_changed_tasks(self):
+        cursor = self.client.get(self.path).data['cursor']
+        self.assertEqual(self.poll(cursor), (cursor, []))
+
+        new_task = TaskFactory(user=self.user, title="change user surname", status=0)
+        cursor, ids = self.poll(cursor)
+        self.assertEqual(ids, [new_task.pk])
+
+        self.client.patch(f"/api/staff/reject-task/{self.task.pk}/")
+        self.client.post("/api/staff/tasks/claim/")
+        cursor, ids = self.poll(cursor)
+        self.assertEqual(ids, [self.task.pk, new_task.pk])
+        self.assertEqual(self.poll(cursor), (cursor, []))
+
+    def test_changes_over_the_limit(self):
+        cursor = self.client.get(self.path).data['cursor']
+        tasks = [TaskFactory(user=self.user, title=title, status=0)
+                 for title in ("change user surname", "change user patronymic", "create a foreign passport")]
+        Task.objects.filter(pk__in=[task.pk for task in tasks]).update_status(2)
+
+        with patch.object(TaskListAPIView, 'change_feed_limit', 2):
+            cursor, first = self.poll(cursor)
+            cursor, second = self.poll(cursor)
+            self.assertEqual(self.poll(cursor), (cursor, []))
+        self.assertEqual(first + second, [task.pk for task in tasks])
+
+    def test_filters(self):
+        cursor = self.client.get(self.path).data['cursor']
+        TaskFactory(user=self.user, title="change user surname", status=0)
+        self.client.patch(f"/api/staff/reject-task/{self.task.pk}/")
+        _, ids = self.poll(cursor, title='change-user-name')
+        self.assertEqual(ids, [self.task.pk])
+
+    def test_long_poll_wakes_on_change(self):
+        cursor = self.client.get(self.path).data['cursor']
+
+        def change(after, timeout):
+            self.assertGreater(timeout, 0)
+            TaskFactory(user=self.user, title="change user surname", status=0)
+            return True
+
+        with patch('administration.rest_views.feed.wait_for_change', side_effect=change) as wait:
+            response = self.client.get(self.path, {'cursor': cursor, 'timeout': 5})
+        self.assertEqual(wait.call_count, 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_invalid_parameters(self):
+        response = self.client.get(self.path, {'cursor': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json(), {"detail": "Invalid cursor."})
+        response = self.client.get(self.path, {'cursor': '1', 'timeout': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unauthorized(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TaskFeedNotifyTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_committed_change_is_published(self):
+        user = CustomUserFactory(email="test@test.com", passport=None, foreign_passport=None)
+        with self.captureOnCommitCallbacks(execute=True):
+            TaskFactory(user=user, title="change user name", status=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            TaskFactory(user=user, title="change user surname", status=0)
+        self.assertEqual(feed.latest(), 2)
+
+    def test_wait_for_change(self):
+        self.assertFalse(feed.wait_for_change(0, 0.05))
+        timer = threading.Timer(0.05, feed.notify)
+        timer.start()
+        self.assertTrue(feed.wait_for_change(0, 5))
+        timer.join()
+        self.assertFalse(feed.wait_for_change(1, 0))
+
+    def test_evicted_counter(self):
+        feed.notify()
+        feed.notify()
+        cache.delete(feed.CACHE_KEY)
+        feed.notify()
+        self.assertTrue(feed.wait_for_change(2, 0))
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from administration.factories import TaskFactory
+from administration.rest_views import CreateInternalPassportAPIView, RejectTaskAPIView
+from authentication.factories import CustomUserFactory
+from passports.factories import AddressFactory
+from passports.models import Passport
+
+
+class ConcurrentApprovalTests(TransactionTestCase):
+    workers = 8
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.address = AddressFactory()
+        self.user = CustomUserFactory(email="test@test.com", address=None, passport=None, foreign_passport=None)
+        self.admin = CustomUserFactory(
+            email="admin@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.task = TaskFactory(
+            user=self.user,
+            title="create an internal passport",
+            status=0,
+            address=self.address,
+            user_data={"photo": "1-surname22-name22-create-an-internal-passport.jpg"}
+        )
+        self.valid_data = {
+            "authority": 6666,
+            "date_of_issue": str(timezone.now().date()),
+            "date_of_expiry": str(timezone.now().date() + timezone.timedelta(days=365 * 10 + 2))
+        }
+
+    def run_concurrently(self, view, method, path, data=None):
+        """
+        Send the same request from `workers` threads at once and return the status codes.
+
+        The views are called directly: the test client collects exceptions through a
+        global signal, which mixes up requests running in parallel threads.
+        """
+        barrier = threading.Barrier(self.workers)
+        codes = []
+
+        def worker():
+            barrier.wait()
+            try:
+                while True:
+                    request = getattr(self.factory, method)(path, data, format='json')
+                    force_authenticate(request, user=self.admin)
+                    try:
+                        codes.append(view(request, task_pk=self.task.pk).status_code)
+                        break
+                    except OperationalError as e:
+                        # The in-memory test database reports a lock conflict right away
+                        # instead of waiting for the lock like a database file does.
+                        if 'locked' not in str(e):
+                            raise
+                        time.sleep(0.01)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return codes
+
+    def test_parallel_approvals_succeed_once(self):
+        codes = self.run_concurrently(
+            CreateInternalPassportAPIView.as_view(), 'post',
+            f"/api/staff/create-internal-passport/{self.task.pk}/", self.valid_data
+        )
+        self.assertEqual(codes.count(status.HTTP_201_CREATED), 1)
+        self.assertEqual(codes.count(status.HTTP_400_BAD_REQUEST), self.workers - 1)
+        self.assertEqual(Passport.objects.count(), 1)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 1)
+
+    def test_parallel_rejections_succeed_once(self):
+        codes = self.run_concurrently(RejectTaskAPIView.as_view(), 'patch', f"/api/staff/reject-task/{self.task.pk}/")
+        self.assertEqual(codes.count(status.HTTP_200_OK), 1)
+        self.assertEqual(codes.count(status.HTTP_400_BAD_REQUEST), self.workers - 1)
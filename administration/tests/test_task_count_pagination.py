@@ -0,0 +1,98 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from administration.models import Task
+from administration.pagination import EstimatedCountPaginator
+from authentication.factories import CustomUserFactory
+from passports.factories import PassportFactory
+
+
+@override_settings(PAGINATION_EXACT_COUNT_LIMIT=6)
+class EstimatedCountPaginationTests(APITestCase):
+    """
+    The test database gives no row estimate, so the estimate is simulated with an
+    exact count, which the tests tell from the cached one.
+    """
+    def setUp(self):
+        cache.clear()
+        self.path = "/api/staff/tasks/"
+        self.user = CustomUserFactory(
+            email="test@test.com",
+            passport=PassportFactory(photo=''),
+            foreign_passport=None,
+        )
+        self.admin = CustomUserFactory(
+            email="admin@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.create_tasks(status=1, count=8)
+        self.create_tasks(status=0, count=2)
+        self.enterContext(patch.object(EstimatedCountPaginator, 'can_estimate', staticmethod(lambda queryset: True)))
+        self.enterContext(patch.object(
+            EstimatedCountPaginator, 'estimate_count', staticmethod(lambda queryset: queryset.count())
+        ))
+
+    def tearDown(self):
+        cache.clear()
+
+    def create_tasks(self, status, count):
+        for _, (title, _) in zip(range(count), Task.TITLE_CHOICES):
+            TaskFactory(user=self.user, title=title, status=status)
+
+    def test_narrow_filter_is_counted_exactly(self):
+        response = self.client.get(self.path, {'status': 0})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertTrue(response.data['count_is_exact'])
+
+    def test_broad_filter_count_is_cached(self):
+        response = self.client.get(self.path)
+        self.assertEqual(response.data['count'], 10)
+        self.assertFalse(response.data['count_is_exact'])
+
+        self.create_tasks(status=2, count=3)
+        response = self.client.get(self.path)
+        self.assertEqual(response.data['count'], 10)
+        self.assertFalse(response.data['count_is_exact'])
+
+        cache.clear()
+        response = self.client.get(self.path)
+        self.assertEqual(response.data['count'], 13)
+
+    def test_pages_past_the_cached_count(self):
+        self.client.get(self.path)
+        self.create_tasks(status=2, count=3)
+        response = self.client.get(self.path, {'page': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+
+        response = self.client.get(self.path, {'page': 4})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_page(self):
+        self.assertEqual(self.client.get(self.path, {'page': 'x'}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(self.path, {'page': 0}).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_html_task_list(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('tasks_list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.context['paginator'].count_is_exact)
+        self.assertEqual(response.context['paginator'].count, 10)
+
+    def test_exact_count_without_estimate(self):
+        with patch.object(EstimatedCountPaginator, 'can_estimate', staticmethod(lambda queryset: False)):
+            with self.assertNumQueries(2):
+                response = self.client.get(self.path, {'page_size': 1})
+        self.assertEqual(response.data['count'], 10)
+        self.assertTrue(response.data['count_is_exact'])
@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from administration.models import Task, TaskCounter
+from authentication.factories import CustomUserFactory
+from passports.factories import AddressFactory, PassportFactory
+
+
+class TaskCounterTests(APITestCase):
+    def setUp(self):
+        self.admin = CustomUserFactory(
+            email="admin@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.user = CustomUserFactory(email="test@test.com", address=None,
+                                      passport=PassportFactory(photo=''), foreign_passport=None)
+        self.address_task = TaskFactory(user=self.user, title="change registation address", status=0,
+                                        address=AddressFactory())
+        self.name_task = TaskFactory(user=self.user, title="change user name", status=0)
+        TaskFactory(user=self.user, title="change user name", status=1)
+
+    def counters(self):
+        return {(c.title, c.status): c.count for c in TaskCounter.objects.exclude(count=0)}
+
+    def assertCountersMatchTasks(self):
+        actual = {}
+        for task in Task.objects.all():
+            actual[task.title, task.status] = actual.get((task.title, task.status), 0) + 1
+        self.assertEqual(self.counters(), actual)
+
+    def test_counters_follow_created_tasks(self):
+        self.assertEqual(self.counters(), {
+            ("change registation address", 0): 1,
+            ("change user name", 0): 1,
+            ("change user name", 1): 1,
+        })
+
+    def test_duplicate_pending_task_is_not_counted(self):
+        self.assertIsNone(Task.objects.create_pending(user=self.user, title="change user name", user_data={}))
+        self.assertEqual(self.counters()["change user name", 0], 1)
+
+    def test_counters_follow_approval_and_rejection(self):
+        response = self.client.patch(f"/api/staff/change-address/{self.address_task.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(f"/api/staff/reject-task/{self.name_task.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountersMatchTasks()
+
+    def test_counters_follow_bulk_reject(self):
+        ids = [self.address_task.pk, self.name_task.pk]
+        self.client.patch("/api/staff/bulk-reject-tasks/", {"ids": ids}, format='json')
+        self.assertCountersMatchTasks()
+
+    def test_counters_follow_bulk_address_approval(self):
+        self.client.patch("/api/staff/bulk-change-address/", {"ids": [self.address_task.pk]}, format='json')
+        self.assertCountersMatchTasks()
+
+    def test_counters_follow_deleted_user(self):
+        self.user.delete()
+        self.assertEqual(self.counters(), {})
+
+    def test_stats(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/staff/tasks/stats/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["titles"]["change user name"], {"in progress": 1, "completed": 1, "rejected": 0})
+        self.assertEqual(data["titles"]["create a visa"], {"in progress": 0, "completed": 0, "rejected": 0})
+        self.assertEqual(data["total"], {"in progress": 2, "completed": 1, "rejected": 0})
+
+    def test_stats_unauthorized(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get("/api/staff/tasks/stats/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_reconcile_command(self):
+        Task.objects.filter(pk=self.name_task.pk).update(status=2)
+        TaskCounter.objects.filter(title="create a visa").delete()
+        out = StringIO()
+        call_command("reconcile_task_counters", stdout=out)
+        self.assertIn("change user name, status 0: 1 -> 0", out.getvalue())
+        self.assertIn("change user name, status 2: 0 -> 1", out.getvalue())
+        self.assertIn("Fixed 5 counter(s).", out.getvalue())
+        self.assertCountersMatchTasks()
+        self.assertEqual(TaskCounter.objects.count(), len(Task.TITLE_CHOICES) * len(Task.STATUS_CHOICES))
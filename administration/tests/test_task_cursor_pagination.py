@@ -0,0 +1,80 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from administration.models import Task
+from authentication.factories import CustomUserFactory
+from passports.factories import PassportFactory
+
+
+class TaskCursorPaginationAPITests(APITestCase):
+    def setUp(self):
+        self.path = "/api/staff/tasks/"
+
+        self.user = CustomUserFactory(
+            email="test@test.com",
+            passport=PassportFactory(photo=''),
+            foreign_passport=None,
+        )
+        self.admin = CustomUserFactory(
+            email="admin@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+        task_statuses = (0, 1, 0, 2, 1, 0, 1)
+        for task_status, title in zip(task_statuses, Task.TITLE_CHOICES):
+            TaskFactory(user=self.user, title=title[0], status=task_status)
+        self.ordered_ids = list(Task.objects.order_by('status', '-created_at', '-id').values_list('id', flat=True))
+
+    def get_ids(self, response):
+        return [task['id'] for task in response.data['results']]
+
+    def test_first_page(self):
+        response = self.client.get(self.path, {'cursor': ''})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_ids(response), self.ordered_ids[:5])
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
+
+    def test_walk_forward_and_back(self):
+        first_page = self.client.get(self.path, {'cursor': ''})
+        second_page = self.client.get(first_page.data['next'])
+        self.assertEqual(second_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_ids(second_page), self.ordered_ids[5:])
+        self.assertIsNone(second_page.data['next'])
+
+        previous_page = self.client.get(second_page.data['previous'])
+        self.assertEqual(self.get_ids(previous_page), self.ordered_ids[:5])
+        self.assertIsNotNone(previous_page.data['next'])
+
+    def test_new_tasks_do_not_shift_pages(self):
+        first_page = self.client.get(self.path, {'cursor': ''})
+        TaskFactory(user=self.user, title="change user surname", status=0)
+        second_page = self.client.get(first_page.data['next'])
+        self.assertEqual(self.get_ids(second_page), self.ordered_ids[5:])
+
+    def test_cursor_with_filter(self):
+        response = self.client.get(self.path, {'cursor': '', 'status': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertTrue(all(task['status'] == 1 for task in response.data['results']))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.path, {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual({"detail": "Invalid cursor."}, response.json())
+
+    def test_user_tasks_cursor_pagination(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get("/api/my-documents/tasks/", {'cursor': '', 'page_size': 4})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_ids(response), self.ordered_ids[:4])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(self.get_ids(response), self.ordered_ids[4:])
+        self.assertIsNone(response.data['next'])
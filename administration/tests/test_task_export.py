@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from administration.rest_views import TaskListAPIView
+from authentication.factories import CustomUserFactory
+from passports.factories import PassportFactory
+
+
+class TaskExportAPITests(APITestCase):
+    def setUp(self):
+        self.path = "/api/staff/tasks/"
+        self.export_path = "/api/staff/tasks/export/"
+
+        self.user = CustomUserFactory(
+            email="test@test.com",
+            passport=PassportFactory(photo=''),
+            foreign_passport=None,
+        )
+        self.other_user = CustomUserFactory(
+            email="other@test.com",
+            passport=PassportFactory(photo=''),
+            foreign_passport=None,
+        )
+        self.admin = CustomUserFactory(
+            email="admin@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+        TaskFactory(user=self.user, title="change user name", status=0, user_data={"name": "Valerie"})
+        TaskFactory(user=self.user, title="change user surname", status=1, user_data={"surname": "Smith"})
+        TaskFactory(user=self.other_user, title="create a foreign passport", status=0)
+
+    def read_ndjson(self, response):
+        content = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_export_ndjson(self):
+        response = self.client.get(self.export_path)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = self.read_ndjson(response)
+        self.assertEqual(len(rows), 3)
+        name_task = next(row for row in rows if row['title'] == "change user name")
+        self.assertEqual(name_task['user_data'], {'new_name': 'Valerie'})
+
+    def test_export_ndjson_in_chunks(self):
+        TaskListAPIView.export_chunk_size = 2
+        self.addCleanup(setattr, TaskListAPIView, 'export_chunk_size', 500)
+        response = self.client.get(self.export_path)
+        self.assertEqual(len(self.read_ndjson(response)), 3)
+
+    def test_export_with_filter(self):
+        response = self.client.get(self.export_path, {'status': 0})
+        rows = self.read_ndjson(response)
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(all(row['status'] == 0 for row in rows))
+
+    def test_export_csv(self):
+        response = self.client.get(self.export_path, {'export_format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="tasks.csv"')
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 3)
+        name_task = next(row for row in rows if row['title'] == "change user name")
+        self.assertEqual(json.loads(name_task['user'])['email'], self.user.email)
+
+    def test_export_invalid_format(self):
+        response = self.client.get(self.export_path, {'export_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual({'detail': 'Invalid export format.'}, response.json())
+
+    def test_export_user_no_access(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.export_path)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_page_all(self):
+        response = self.client.get(self.path, {'page': 'all'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(len(data['tasks']), 3)
+
+    def test_user_export_only_own_tasks(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get("/api/my-documents/tasks/export/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = self.read_ndjson(response)
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(all(row['user'] == self.user.id for row in rows))
@@ -0,0 +1,228 @@
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from administration.handlers import TASK_HANDLERS, TaskHandler, register
+from administration.jobs import run_due
+from authentication.factories import CustomUserFactory
+from passports.factories import AddressFactory, PassportFactory, ForeignPassportFactory, VisaFactory
+from passports.models import Visa
+
+
+class TaskHandlerTestCase(APITestCase):
+    def setUp(self):
+        self.admin = CustomUserFactory(
+            email="admin@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        today = timezone.now().date()
+        self.passport_data = {
+            "authority": 6666,
+            "date_of_issue": str(today),
+            "date_of_expiry": str(today + timezone.timedelta(days=365 * 10 + 2))
+        }
+        self.visa_data = {
+            "place_of_issue": "Kyiv",
+            "date_of_issue": str(today),
+            "date_of_expiry": str(today + timezone.timedelta(days=365 * 10 + 2))
+        }
+
+    def create_user(self, passport=True, foreign_passport=False):
+        foreign_passport = ForeignPassportFactory(photo='') if foreign_passport else None
+        if foreign_passport:
+            VisaFactory(foreign_passport=foreign_passport, photo='')
+        return CustomUserFactory(
+            email=f"user{CustomUserFactory._meta.model.objects.count()}@test.com",
+            address=AddressFactory(),
+            passport=PassportFactory(photo='') if passport else None,
+            foreign_passport=foreign_passport
+        )
+
+    def create_task(self, title, user, **kwargs):
+        kwargs.setdefault('user_data', {'photo': 'photo.jpg'})
+        return TaskFactory(user=user, title=title, status=0, **kwargs)
+
+
+class TaskHandlerQueriesTests(TaskHandlerTestCase):
+    """
+    Each approval runs a fixed number of queries: the task load, the savepoint pair of the
+    approval transaction, the status change (change number, task, two counters) and the
+    writes of the handler. The first new document of a kind in a test also reserves a block
+    of numbers (counter update and read, reservation row, taken numbers), each number drawn
+    from a block reserved in the open transaction checks its reservation row, and each visa
+    write increments the documents version of its holder.
+    """
+    path = "/api/staff/"
+
+    def assertApproval(self, queries, method, url, data=None, expected_status=status.HTTP_200_OK):
+        with self.assertNumQueries(queries):
+            response = getattr(self.client, method)(f"{self.path}{url}", data, format='json')
+        self.assertEqual(response.status_code, expected_status, response.content)
+        return response
+
+    def test_create_internal_passport(self):
+        task = self.create_task("create an internal passport", self.create_user(passport=False),
+                                address=AddressFactory())
+        self.assertApproval(16, 'post', f"create-internal-passport/{task.pk}/", self.passport_data,
+                            status.HTTP_201_CREATED)
+        task.user.refresh_from_db()
+        self.assertEqual(task.user.address_id, task.address_id)
+        self.assertIsNotNone(task.user.passport)
+
+    def test_create_foreign_passport(self):
+        task = self.create_task("create a foreign passport", self.create_user())
+        self.assertApproval(16, 'post', f"create-foreign-passport/{task.pk}/", self.passport_data,
+                            status.HTTP_201_CREATED)
+        task.user.refresh_from_db()
+        self.assertIsNotNone(task.user.foreign_passport)
+
+    def test_restore_internal_passport(self):
+        user = self.create_user()
+        old_number = user.passport.number
+        task = self.create_task("restore an internal passport due to loss", user)
+        self.assertApproval(12, 'put', f"restore-internal-passport/{task.pk}/", self.passport_data,
+                            status.HTTP_201_CREATED)
+        user.refresh_from_db()
+        self.assertNotEqual(user.passport.number, old_number)
+
+    def test_restore_foreign_passport(self):
+        user = self.create_user(foreign_passport=True)
+        old_number = user.foreign_passport.number
+        task = self.create_task("restore a foreign passport due to expiry", user)
+        self.assertApproval(12, 'put', f"restore-foreign-passport/{task.pk}/", self.passport_data,
+                            status.HTTP_201_CREATED)
+        user.refresh_from_db()
+        self.assertNotEqual(user.foreign_passport.number, old_number)
+        self.assertTrue(Visa.objects.filter(foreign_passport_id=old_number).exists())
+        run_due('test')
+        self.assertFalse(Visa.objects.filter(foreign_passport_id=old_number).exists())
+
+    def test_change_address(self):
+        task = self.create_task("change registation address", self.create_user(), address=AddressFactory())
+        self.assertApproval(9, 'patch', f"change-address/{task.pk}/")
+        task.user.refresh_from_db()
+        self.assertEqual(task.user.address_id, task.address_id)
+
+    def test_change_name(self):
+        user = self.create_user()
+        task = self.create_task("change user name", user, user_data={'photo': 'photo.jpg', 'name': 'Kate'})
+        self.assertApproval(12, 'patch', f"change-data/{task.pk}/", {'internal_passport': self.passport_data})
+        user.refresh_from_db()
+        self.assertEqual(user.name, 'Kate')
+
+    def test_change_surname_with_foreign_passport(self):
+        user = self.create_user(foreign_passport=True)
+        task = self.create_task("change user surname", user, user_data={'photo': 'photo.jpg', 'surname': 'Lee'})
+        self.assertApproval(14, 'patch', f"change-data/{task.pk}/",
+                            {'internal_passport': self.passport_data, 'foreign_passport': self.passport_data})
+        user.refresh_from_db()
+        self.assertEqual(user.surname, 'Lee')
+        self.assertFalse(user.foreign_passport.visas.exists())
+
+    def test_create_visa(self):
+        user = self.create_user(foreign_passport=True)
+        old_visa = user.foreign_passport.visas.get()
+        task = self.create_task("create a visa", user, visa_country=old_visa.country, user_data={
+            'photo': 'photo.jpg', 'visa_type': old_visa.type, 'visa_entry_amount': old_visa.entry_amount
+        })
+        self.assertApproval(12, 'post', f"create-visa/{task.pk}/", self.visa_data, status.HTTP_201_CREATED)
+        old_visa.refresh_from_db()
+        self.assertFalse(old_visa.is_active)
+        self.assertEqual(user.foreign_passport.visas.filter(is_active=True).count(), 1)
+
+    def test_extend_visa(self):
+        user = self.create_user(foreign_passport=True)
+        visa = user.foreign_passport.visas.get()
+        extension_date = visa.date_of_expiry + timezone.timedelta(days=30)
+        task = self.create_task("extend a visa", user, visa=visa, visa_country=visa.country, user_data={
+            'visa_extension_reason': 'Work', 'visa_extension_date': str(extension_date)
+        })
+        self.assertApproval(10, 'patch', f"extend-visa/{task.pk}/")
+        visa.refresh_from_db()
+        self.assertEqual(visa.date_of_expiry, extension_date)
+
+    def test_restore_visa(self):
+        user = self.create_user(foreign_passport=True)
+        visa = user.foreign_passport.visas.get()
+        task = self.create_task("restore a visa due to loss", user, visa=visa, visa_country=visa.country)
+        self.assertApproval(13, 'put', f"restore-visa/{task.pk}/",
+                            {"place_of_issue": "Kyiv", "date_of_issue": self.visa_data["date_of_issue"]},
+                            status.HTTP_201_CREATED)
+        visa.refresh_from_db()
+        self.assertFalse(visa.is_active)
+
+    def test_reject(self):
+        task = self.create_task("create a foreign passport", self.create_user())
+        self.assertApproval(6, 'patch', f"reject-task/{task.pk}/")
+        task.refresh_from_db()
+        self.assertEqual(task.status, 2)
+
+
+class TaskApprovalViewTests(TaskHandlerTestCase):
+    path = "/staff/"
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+        self.form_data = self.passport_data
+
+    def test_get_renders_forms(self):
+        user = self.create_user(foreign_passport=True)
+        task = self.create_task("change user name", user, user_data={'photo': 'photo.jpg', 'name': 'Kate'})
+        response = self.client.get(f"{self.path}change-name/{task.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('passport_form', response.context)
+        self.assertIn('fpassport_form', response.context)
+        self.assertEqual(response.context['field_name'], 'name')
+
+    def test_post_approves(self):
+        user = self.create_user()
+        old_number = user.passport.number
+        task = self.create_task("restore an internal passport due to expiry", user)
+        # Session and user, then as in the API.
+        with self.assertNumQueries(14):
+            response = self.client.post(f"{self.path}restore-passport/{task.pk}/", self.form_data)
+        self.assertRedirects(response, "/staff/tasks/", fetch_redirect_response=False)
+        user.refresh_from_db()
+        task.refresh_from_db()
+        self.assertNotEqual(user.passport.number, old_number)
+        run_due('test')
+        self.assertFalse(type(user.passport).objects.filter(number=old_number).exists())
+        self.assertEqual((task.status, task.processed_by), (1, self.admin))
+
+    def test_post_invalid_form(self):
+        task = self.create_task("create a foreign passport", self.create_user())
+        response = self.client.post(f"{self.path}create-foreign-passport/{task.pk}/",
+                                    {**self.form_data, "authority": 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.context['form'].errors)
+        task.refresh_from_db()
+        self.assertEqual(task.status, 0)
+
+    def test_wrong_title(self):
+        task = self.create_task("create a foreign passport", self.create_user())
+        response = self.client.get(f"{self.path}change-name/{task.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_already_processed(self):
+        task = self.create_task("create an internal passport", self.create_user(), address=AddressFactory())
+        response = self.client.post(f"{self.path}create-passport/{task.pk}/", self.form_data)
+        self.assertRedirects(response, "/staff/tasks/", fetch_redirect_response=False)
+        task.refresh_from_db()
+        self.assertEqual(task.status, 0)
+
+
+class TaskHandlerRegistrationTests(SimpleTestCase):
+    def test_register_requires_apply(self):
+        with self.assertRaisesMessage(TypeError, "IncompleteHandler doesn't implement apply()."):
+            @register("an incomplete request")
+            class IncompleteHandler(TaskHandler):
+                def documents(self):
+                    return {}
+        self.assertNotIn("an incomplete request", TASK_HANDLERS)
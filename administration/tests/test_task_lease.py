@@ -0,0 +1,171 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from administration.models import Task
+from authentication.factories import CustomUserFactory
+from passports.factories import AddressFactory
+
+
+class TaskLeaseAPITests(APITestCase):
+    def setUp(self):
+        self.path = "/api/staff/tasks/"
+        self.user = CustomUserFactory(email="test@test.com", passport=None, foreign_passport=None)
+        self.admin = CustomUserFactory(
+            email="admin@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.other_admin = CustomUserFactory(
+            email="admin2@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+        TaskFactory(user=self.user, title="change user surname", status=1)
+        self.oldest = TaskFactory(user=self.user, title="change user name", status=0)
+        self.newest = TaskFactory(user=self.user, title="create a foreign passport", status=0)
+
+    def claim(self, **params):
+        return self.client.post(f"{self.path}claim/" + ('?' + '&'.join(f'{k}={v}' for k, v in params.items()) if params else ''))
+
+    def test_claim_oldest_pending_task(self):
+        response = self.claim()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.oldest.pk)
+        self.assertEqual(response.data['leased_by'], self.admin.pk)
+        self.oldest.refresh_from_db()
+        self.assertEqual(self.oldest.leased_by, self.admin)
+        self.assertGreater(self.oldest.lease_expires_at, timezone.now())
+
+    def test_claims_do_not_collide(self):
+        first = self.claim()
+        self.client.force_authenticate(self.other_admin)
+        second = self.claim()
+        self.assertEqual(second.data['id'], self.newest.pk)
+        self.assertNotEqual(first.data['id'], second.data['id'])
+
+        response = self.claim()
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual({"detail": "There are no pending tasks to claim."}, response.json())
+
+    def test_claim_by_title(self):
+        response = self.claim(title='create-a-foreign-passport')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.newest.pk)
+
+    def test_claim_expired_lease(self):
+        Task.objects.filter(pk=self.oldest.pk).update(
+            leased_by=self.other_admin, lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        response = self.claim()
+        self.assertEqual(response.data['id'], self.oldest.pk)
+        self.assertEqual(response.data['leased_by'], self.admin.pk)
+
+    def test_renew_lease(self):
+        self.claim()
+        Task.objects.filter(pk=self.oldest.pk).update(lease_expires_at=timezone.now() + timedelta(seconds=5))
+        response = self.client.post(f"{self.path}{self.oldest.pk}/renew-lease/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({"detail": "The lease has been renewed."}, response.json())
+        self.oldest.refresh_from_db()
+        self.assertGreater(self.oldest.lease_expires_at, timezone.now() + timedelta(minutes=1))
+
+    def test_renew_lease_held_by_other(self):
+        self.claim()
+        self.client.force_authenticate(self.other_admin)
+        response = self.client.post(f"{self.path}{self.oldest.pk}/renew-lease/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual({"detail": "You don't hold an active lease on this task."}, response.json())
+
+    def test_renew_expired_lease(self):
+        self.claim()
+        Task.objects.filter(pk=self.oldest.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.client.post(f"{self.path}{self.oldest.pk}/renew-lease/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_release_lease(self):
+        self.claim()
+        response = self.client.post(f"{self.path}{self.oldest.pk}/release-lease/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({"detail": "The lease has been released."}, response.json())
+
+        self.client.force_authenticate(self.other_admin)
+        response = self.claim()
+        self.assertEqual(response.data['id'], self.oldest.pk)
+
+    def test_release_lease_not_held(self):
+        response = self.client.post(f"{self.path}{self.oldest.pk}/release-lease/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual({"detail": "You don't hold a lease on this task."}, response.json())
+
+    def test_claim_user_no_access(self):
+        self.client.force_authenticate(self.user)
+        response = self.claim()
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TaskLeaseEnforcementAPITests(APITestCase):
+    def setUp(self):
+        self.user = CustomUserFactory(email="test@test.com", passport=None, foreign_passport=None)
+        self.admin = CustomUserFactory(email="admin@test.com", address=None, passport=None, foreign_passport=None,
+                                       is_staff=True)
+        self.other_admin = CustomUserFactory(email="admin2@test.com", address=None, passport=None,
+                                             foreign_passport=None, is_staff=True)
+        self.task = TaskFactory(user=self.user, title="change registation address", status=0,
+                                address=AddressFactory())
+        self.lease(self.other_admin)
+        self.client.force_authenticate(self.admin)
+
+    def lease(self, staff, seconds=60):
+        Task.objects.filter(pk=self.task.pk).update(
+            leased_by=staff, lease_expires_at=timezone.now() + timedelta(seconds=seconds)
+        )
+
+    def assertPending(self):
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 0)
+
+    def test_leased_to_other(self):
+        for method, path in (("patch", f"/api/staff/reject-task/{self.task.pk}/"),
+                             ("patch", f"/api/staff/change-address/{self.task.pk}/")):
+            response = getattr(self.client, method)(path)
+            self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+            self.assertEqual(response.json(), {"detail": "The task is leased to another staff member."})
+        self.assertPending()
+
+    def test_bulk_skips_leased_to_other(self):
+        response = self.client.patch("/api/staff/bulk-reject-tasks/", {"ids": [self.task.pk]}, format='json')
+        self.assertEqual(response.json(), {"rejected": 0})
+        response = self.client.patch("/api/staff/bulk-change-address/", {"ids": [self.task.pk]}, format='json')
+        self.assertEqual(response.json(), {"approved": 0, "results": [{"id": self.task.pk, "result": "leased"}]})
+        self.assertPending()
+
+    def test_leased_between_read_and_update(self):
+        self.lease(None)
+        task = Task.objects.get(pk=self.task.pk)
+        self.lease(self.other_admin)
+        self.assertFalse(Task.objects.set_status(task, 2, self.admin))
+        self.assertPending()
+
+    def test_own_lease(self):
+        self.lease(self.admin)
+        response = self.client.patch(f"/api/staff/change-address/{self.task.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.status, self.task.processed_by), (1, self.admin))
+
+    def test_expired_lease(self):
+        self.lease(self.other_admin, seconds=-1)
+        response = self.client.patch(f"/api/staff/reject-task/{self.task.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 2)
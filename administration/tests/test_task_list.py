@@ -68,7 +68,7 @@ class TaskListAPITests(APITestCase):
             user=self.user,
             title="change registation address",
             status=1,
-            user_data={"address_id": self.updated_address.id}
+            address=self.updated_address
         )
         self.task6 = TaskFactory(user=self.user, title="create an internal passport", status=1)
 
@@ -118,6 +118,7 @@ class TaskListAPITests(APITestCase):
         self.assertEqual(
             {
                 'count': 2,
+                'count_is_exact': True,
                 'next': None,
                 'previous': None,
                 'results': [
@@ -126,6 +127,8 @@ class TaskListAPITests(APITestCase):
                         'user': self.user_data,
                         'user_data': {
                             'new_photo': ANY,
+                            'new_photo_thumbnail': ANY,
+                            'new_photo_preview': ANY,
                             'new_patronymic': self.task4.user_data['patronymic']
                         },
                         'title': self.task4.title,
@@ -137,6 +140,8 @@ class TaskListAPITests(APITestCase):
                         'user': self.user_data,
                         'user_data': {
                             'new_photo': ANY,
+                            'new_photo_thumbnail': ANY,
+                            'new_photo_preview': ANY,
                             'new_name': self.task2.user_data['name']
                         },
                         'title': self.task2.title,
@@ -0,0 +1,102 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from authentication.factories import CustomUserFactory
+from passports.factories import AddressFactory, ForeignPassportFactory, PassportFactory, VisaFactory
+
+
+class TaskListQueriesAPITests(APITestCase):
+    def setUp(self):
+        self.path = "/api/staff/tasks/"
+        self.admin = CustomUserFactory(
+            email="admin@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+    def create_tasks(self, count):
+        for _ in range(count):
+            user = CustomUserFactory(passport=PassportFactory(photo=''), foreign_passport=ForeignPassportFactory(photo=''))
+            visa = VisaFactory(foreign_passport=user.foreign_passport, photo='')
+            TaskFactory(user=user, title="extend a visa", status=0, visa=visa,
+                        user_data={'visa_extension_date': '2030-01-01'})
+            TaskFactory(user=user, title="change registation address", status=0,
+                        address=AddressFactory())
+
+    def test_page_queries_do_not_depend_on_page_size(self):
+        # count, page with visas and addresses joined
+        self.create_tasks(1)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.path)
+        self.assertEqual(len(response.data['results']), 2)
+
+        self.create_tasks(2)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.path)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_detail_queries(self):
+        self.create_tasks(1)
+        task = TaskFactory(user=self.admin, title="change registation address", status=0,
+                           address=AddressFactory())
+        # task with its user, address and visa joined
+        with self.assertNumQueries(1):
+            response = self.client.get(f"{self.path}{task.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('new_address', response.data['user_data'])
+
+
+class TaskListViewQueriesTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUserFactory(
+            email="admin@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.client.force_login(self.admin)
+
+    def create_tasks(self, count):
+        for _ in range(count):
+            user = CustomUserFactory(passport=PassportFactory(), foreign_passport=None)
+            TaskFactory(user=user, title="change registation address", status=0, address=AddressFactory())
+            TaskFactory(user=user, title="change user name", status=0, user_data={'name': 'Name', 'photo': ''})
+            TaskFactory(user=user, title="extend a visa", status=0, user_data={'photo': ''})
+
+    def test_full_page_queries(self):
+        # session, user, count, page with users, passports and addresses joined
+        self.create_tasks(1)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('tasks_list'))
+        self.assertEqual(len(response.context['tasks']), 3)
+
+        self.create_tasks(2)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('tasks_list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.context['tasks']), 5)
+
+    def test_task_routes(self):
+        self.create_tasks(1)
+        response = self.client.get(reverse('tasks_list'))
+        routes = {task.title: task.path for task in response.context['tasks']}
+        self.assertEqual(routes, {
+            "change registation address": "change_address_s",
+            "change user name": "change_name_s",
+            "extend a visa": None,
+        })
+        task = next(task for task in response.context['tasks'] if task.title == "change user name")
+        self.assertContains(response, reverse('change_name_s', args=[task.pk]))
+
+    def test_title_filter(self):
+        self.create_tasks(1)
+        response = self.client.get(reverse('tasks_list'), {'title': 'change-name'})
+        self.assertEqual([task.title for task in response.context['tasks']], ["change user name"])
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from administration.models import Task
+from authentication.factories import CustomUserFactory
+from passports.factories import AddressFactory, PassportFactory
+
+
+def sample(name, title):
+    return REGISTRY.get_sample_value(name, {'title': title}) or 0
+
+
+class TaskMetricsTests(APITestCase):
+    title = "change registation address"
+
+    def setUp(self):
+        self.admin = CustomUserFactory(
+            email="admin@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.user = CustomUserFactory(email="user@test.com", address=AddressFactory(),
+                                      passport=PassportFactory(photo=''), foreign_passport=None)
+        self.client.force_authenticate(self.admin)
+
+    def create_task(self, user=None):
+        task = TaskFactory(user=user or self.user, title=self.title, status=0, address=AddressFactory())
+        # `created_at` is set on insert, backdate the submission by an hour.
+        Task.objects.filter(pk=task.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        task.refresh_from_db()
+        return task
+
+    def test_created_counter(self):
+        before = sample('tasks_created_total', self.title)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_task()
+        self.assertEqual(sample('tasks_created_total', self.title), before + 1)
+
+    def test_approve_records_processing(self):
+        task = self.create_task()
+        approved = sample('tasks_approved_total', self.title)
+        observed = sample('task_processing_seconds_count', self.title)
+        total = sample('task_processing_seconds_sum', self.title)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/staff/change-address/{task.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        task.refresh_from_db()
+        self.assertEqual(task.processed_by, self.admin)
+        self.assertAlmostEqual(task.processed_at, timezone.now(), delta=timedelta(minutes=1))
+        self.assertEqual(sample('tasks_approved_total', self.title), approved + 1)
+        self.assertEqual(sample('task_processing_seconds_count', self.title), observed + 1)
+        self.assertAlmostEqual(sample('task_processing_seconds_sum', self.title) - total, 3600, delta=60)
+
+    def test_reject_records_processing(self):
+        task = self.create_task()
+        rejected = sample('tasks_rejected_total', self.title)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/staff/reject-task/{task.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        task.refresh_from_db()
+        self.assertEqual(task.processed_by, self.admin)
+        self.assertIsNotNone(task.processed_at)
+        self.assertEqual(sample('tasks_rejected_total', self.title), rejected + 1)
+
+    def test_bulk_actions_record_processing(self):
+        other = CustomUserFactory(email="other@test.com", address=None, passport=None, foreign_passport=None)
+        tasks = [self.create_task(), self.create_task(other)]
+        rejected = sample('tasks_rejected_total', self.title)
+        observed = sample('task_processing_seconds_count', self.title)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch("/api/staff/bulk-reject-tasks/", {"ids": [tasks[0].pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sample('tasks_rejected_total', self.title), rejected + 1)
+
+        approved = sample('tasks_approved_total', self.title)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch("/api/staff/bulk-change-address/",
+                                         {"ids": [task.pk for task in tasks]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sample('tasks_approved_total', self.title), approved + 1)
+        self.assertEqual(sample('task_processing_seconds_count', self.title), observed + 2)
+        self.assertEqual(
+            list(Task.objects.order_by('pk').values_list('status', 'processed_by')),
+            [(2, self.admin.pk), (1, self.admin.pk)]
+        )
+
+    def test_no_metrics_for_processed_task(self):
+        task = self.create_task()
+        Task.objects.filter(pk=task.pk).update(status=1)
+        approved = sample('tasks_approved_total', self.title)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/staff/change-address/{task.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(sample('tasks_approved_total', self.title), approved)
+
+    def test_html_handler_records_processing(self):
+        self.client.force_login(self.admin)
+        task = self.create_task()
+        approved = sample('tasks_approved_total', self.title)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/staff/change-address/{task.pk}/")
+        self.assertEqual(response.status_code, 302)
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, 1)
+        self.assertEqual(task.processed_by, self.admin)
+        self.assertEqual(sample('tasks_approved_total', self.title), approved + 1)
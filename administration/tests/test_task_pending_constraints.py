@@ -0,0 +1,42 @@
+from django.db import IntegrityError
+from django.test import TestCase
+
+from administration.factories import TaskFactory
+from administration.models import Task
+from authentication.factories import CustomUserFactory
+from passports.factories import VisaFactory
+
+
+class PendingTaskConstraintTests(TestCase):
+    def setUp(self):
+        self.user = CustomUserFactory(email="test@test.com", passport=None, foreign_passport=None)
+
+    def test_create_pending_duplicate(self):
+        task = Task.objects.create_pending(user=self.user, title="change user name", user_data={"name": "A"})
+        self.assertIsNotNone(task)
+        duplicate = Task.objects.create_pending(user=self.user, title="change user name", user_data={"name": "B"})
+        self.assertIsNone(duplicate)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 1)
+
+    def test_create_pending_after_processed(self):
+        TaskFactory(user=self.user, title="change user name", status=1)
+        task = Task.objects.create_pending(user=self.user, title="change user name", user_data={"name": "A"})
+        self.assertIsNotNone(task)
+
+    def test_create_pending_visa_per_country(self):
+        title = "create a visa"
+        self.assertIsNotNone(Task.objects.create_pending(user=self.user, title=title, user_data={}, visa_country="PL"))
+        self.assertIsNotNone(Task.objects.create_pending(user=self.user, title=title, user_data={}, visa_country="DE"))
+        self.assertIsNone(Task.objects.create_pending(user=self.user, title=title, user_data={}, visa_country="PL"))
+
+    def test_create_pending_visa_change_per_visa(self):
+        title = "extend a visa"
+        visa, other_visa = VisaFactory(photo=''), VisaFactory(photo='')
+        self.assertIsNotNone(Task.objects.create_pending(user=self.user, title=title, user_data={}, visa=visa))
+        self.assertIsNotNone(Task.objects.create_pending(user=self.user, title=title, user_data={}, visa=other_visa))
+        self.assertIsNone(Task.objects.create_pending(user=self.user, title=title, user_data={}, visa=visa))
+
+    def test_create_pending_other_integrity_error(self):
+        with self.assertRaises(IntegrityError):
+            Task.objects.create_pending(user=self.user, title="change user name", user_data=None)
+        self.assertFalse(Task.objects.exists())
@@ -0,0 +1,91 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from administration.models import Task
+from administration.priority import task_priority
+from authentication.factories import CustomUserFactory
+from passports.factories import ForeignPassportFactory, PassportFactory, VisaFactory
+
+
+class TaskPriorityTests(APITestCase):
+    def setUp(self):
+        self.path = "/api/staff/tasks/"
+        self.today = timezone.now().date()
+        self.user = CustomUserFactory(
+            email="test@test.com",
+            passport=PassportFactory(photo='', date_of_expiry=self.today + datetime.timedelta(days=10)),
+            foreign_passport=ForeignPassportFactory(photo=''),
+        )
+        self.admin = CustomUserFactory(
+            email="admin@test.com",
+            address=None,
+            passport=None,
+            foreign_passport=None,
+            is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+        self.creation = TaskFactory(user=self.user, title="change user name", status=0)
+        self.expiry = TaskFactory(user=self.user, title="restore an internal passport due to expiry", status=0)
+        self.visa = VisaFactory(foreign_passport=self.user.foreign_passport, photo='',
+                                date_of_expiry=self.today - datetime.timedelta(days=1))
+        self.extension = TaskFactory(user=self.user, title="extend a visa", status=0, visa=self.visa,
+                                     user_data={'visa_extension_date': '2030-01-01'})
+
+    def get_ids(self, response):
+        return [task['id'] for task in response.data['results']]
+
+    def test_priority_on_creation(self):
+        self.assertEqual(self.creation.priority, 100)
+        # 50 days into the 60-day deadline window
+        self.assertEqual(self.expiry.priority, 300 + 50 * 10)
+        # overdue visa
+        self.assertEqual(self.extension.priority, 300 + 60 * 10)
+
+    def test_priority_grows_with_age(self):
+        Task.objects.filter(pk=self.creation.pk).update(created_at=timezone.now() - datetime.timedelta(days=20))
+        self.creation.refresh_from_db()
+        self.assertEqual(task_priority(self.creation), 100 + 20 * 5)
+
+    def test_extension_date_without_visa(self):
+        task = Task(user=self.user, title="extend a visa", user_data={'visa_extension_date': str(self.today)})
+        self.assertEqual(task_priority(task), 300 + 60 * 10)
+
+    def test_claim_takes_the_most_urgent_task(self):
+        claimed = [self.client.post(f"{self.path}claim/").data['id'] for _ in range(3)]
+        self.assertEqual(claimed, [self.extension.pk, self.expiry.pk, self.creation.pk])
+
+    def test_list_ordered_by_priority(self):
+        TaskFactory(user=self.user, title="change user surname", status=1)
+        response = self.client.get(self.path, {'ordering': 'priority'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_ids(response)[:3], [self.extension.pk, self.expiry.pk, self.creation.pk])
+
+    def test_cursor_pages_ordered_by_priority(self):
+        for title in ("change user surname", "change user patronymic", "create a foreign passport"):
+            TaskFactory(user=self.user, title=title, status=0)
+        expected = list(Task.objects.order_by('status', '-priority', 'created_at', 'id').values_list('id', flat=True))
+
+        response = self.client.get(self.path, {'ordering': 'priority', 'cursor': ''})
+        ids = self.get_ids(response)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(ids + self.get_ids(response), expected)
+
+    def test_invalid_ordering(self):
+        response = self.client.get(self.path, {'ordering': 'created_at'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {"detail": "Invalid ordering."})
+
+    def test_refresh_command(self):
+        Task.objects.filter(pk=self.creation.pk).update(created_at=timezone.now() - datetime.timedelta(days=20))
+        out = StringIO()
+        call_command("refresh_task_priorities", stdout=out)
+        self.assertIn("Checked 3 pending task(s), updated 1.", out.getvalue())
+        self.creation.refresh_from_db()
+        self.assertEqual(self.creation.priority, 200)
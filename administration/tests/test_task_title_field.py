@@ -0,0 +1,52 @@
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from administration.models import CATEGORY_USER_DATA, CATEGORY_VISA, TITLE_CODES, Task
+from authentication.factories import CustomUserFactory
+
+
+class TaskTitleFieldTests(TestCase):
+    def setUp(self):
+        self.task = TaskFactory(title="extend a visa", status=1)
+
+    def test_title_stored_as_code(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT title FROM {Task._meta.db_table} WHERE id = %s", [self.task.pk])
+            self.assertEqual(cursor.fetchone()[0], TITLE_CODES["extend a visa"])
+
+    def test_title_loaded_as_string(self):
+        task = Task.objects.get(pk=self.task.pk)
+        self.assertEqual(task.title, "extend a visa")
+        self.assertEqual(Task.objects.filter(title="extend a visa").count(), 1)
+        self.assertEqual(Task.objects.filter(title__in=["create a visa", "change user name"]).count(), 0)
+
+    def test_category_follows_title(self):
+        self.assertEqual(self.task.category, CATEGORY_VISA)
+        self.task.title = "change user name"
+        self.task.save()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.category, CATEGORY_USER_DATA)
+
+    def test_unknown_title(self):
+        with self.assertRaises(ValueError):
+            Task.objects.filter(title="unknown title").count()
+        self.task.title = "unknown title"
+        with self.assertRaises(ValidationError):
+            self.task.full_clean()
+
+
+class TaskVisaFilterAPITests(APITestCase):
+    def test_filter_visa_tasks(self):
+        admin = CustomUserFactory(address=None, passport=None, foreign_passport=None, is_staff=True)
+        self.client.force_authenticate(admin)
+        for title in ("create a visa", "extend a visa", "restore a visa due to loss", "change user name"):
+            TaskFactory(title=title, status=1)
+
+        response = self.client.get("/api/staff/tasks/", {'title': 'visa'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertTrue(all('visa' in task['title'] for task in response.data['results']))
@@ -1,74 +1,77 @@
 import datetime
-from random import randint
 
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
-from django.shortcuts import render, redirect, get_object_or_404
-from django.views.generic import ListView
+from django.http import Http404
+from django.shortcuts import redirect
+from django.utils.decorators import method_decorator
+from django.views.generic import ListView, TemplateView
 
+from .handlers import (TaskError, get_handler, ChangeAddressHandler, CreateForeignPassportHandler,
+                       CreateInternalPassportHandler, RestoreForeignPassportHandler, RestoreInternalPassportHandler)
 from .models import Task
-from passports.models import Address, Passport, ForeignPassport, Visa
+from .pagination import EstimatedCountPaginator
 from passports.forms import PassportForm, ForeignPassportForm
+from passports.photos import variant_url
+
+
+# Staff form that processes each task title. Visa tasks are processed through the API only.
+TITLE_ROUTES = {
+    'create an internal passport': 'create_passport_s',
+    'create a foreign passport': 'create_fpassport_s',
+    'restore an internal passport due to loss': 'restore_passport_s',
+    'restore a foreign passport due to loss': 'restore_fpassport_s',
+    'restore an internal passport due to expiry': 'restore_passport_s',
+    'restore a foreign passport due to expiry': 'restore_fpassport_s',
+    'change user name': 'change_name_s',
+    'change user surname': 'change_surname_s',
+    'change user patronymic': 'change_patronymic_s',
+    'change registation address': 'change_address_s',
+}
+
+# Values of the `title` query parameter of the task list.
+TITLE_FILTERS = {
+    'create-passport': 'create an internal passport',
+    'create-foreign-passport': 'create a foreign passport',
+    'restore-passport-loss': 'restore an internal passport due to loss',
+    'restore-fpassport-loss': 'restore a foreign passport due to loss',
+    'restore-passport-expiry': 'restore an internal passport due to expiry',
+    'restore-fpassport-expiry': 'restore a foreign passport due to expiry',
+    'change-name': 'change user name',
+    'change-surname': 'change user surname',
+    'change-patronymic': 'change user patronymic',
+    'change-address': 'change registation address',
+}
 
 
 class TaskListView(ListView):
     model = Task
     context_object_name = 'tasks'
     paginate_by = 5
+    paginator_class = EstimatedCountPaginator
     template_name = 'administration/task_list.html'
-    title_filters = (
-        'create-passport',
-        'create-foreign-passport',
-        # 'create-visa',
-        'restore-passport-loss',
-        'restore-fpassport-loss',
-        'restore-passport-expiry',
-        'restore-fpassport-expiry',
-        'change-name',
-        'change-surname',
-        'change-patronymic',
-        'change-address',
-    )
-    title_paths = (
-        'create_passport_s',
-        'create_fpassport_s',
-        # '',
-        'restore_passport_s',
-        'restore_fpassport_s',
-        'restore_passport_s',
-        'restore_fpassport_s',
-        'change_name_s',
-        'change_surname_s',
-        'change_patronymic_s',
-        'change_address_s'
-    )
 
     def get_queryset(self):
-        filters_dict = dict(zip(self.title_filters, Task.TITLE_CHOICES))
-        tasks = Task.objects.all().order_by('-created_at', 'status')
+        tasks = Task.objects.select_related('user__passport', 'address').order_by('-created_at', 'status', '-id')
         title = self.request.GET.get('title')
 
-        if title and title in self.title_filters:
-            tasks = tasks.filter(title=filters_dict[title][0])
+        if title in TITLE_FILTERS:
+            tasks = tasks.filter(title=TITLE_FILTERS[title])
         return tasks
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Список заявок'
-        paths_dict = dict(zip([i[0] for i in Task.TITLE_CHOICES], self.title_paths))
-        tasks_with_addresses = []
-        for task in context['tasks']:
-            task.path = paths_dict[task.title]
-            user_data = task.user_data
-            if 'address_id' in user_data:
-                try:
-                    address = Address.objects.get(pk=user_data['address_id'])
-                    formatted_address = f"{address.country_code}, {address.region}, {address.settlement}, {address.street}, {address.apartments}, {address.post_code}"
-                    user_data['formatted_address'] = formatted_address
-                except Address.DoesNotExist:
-                    user_data['formatted_address'] = 'Неможливо визначити адресу'
-            tasks_with_addresses.append(task)
-        context['tasks'] = tasks_with_addresses
+        tasks = list(context['tasks'])
+        for task in tasks:
+            task.path = TITLE_ROUTES.get(task.title)
+            photo = task.user_data.get('photo') or (task.user.passport and task.user.passport.photo.name)
+            task.photo_thumbnail = variant_url(photo, 'thumbnail') if photo else None
+            if task.address_id:
+                address = task.address
+                formatted_address = f"{address.country_code}, {address.region}, {address.settlement}, {address.street}, {address.apartments}, {address.post_code}"
+                task.user_data['formatted_address'] = formatted_address
+        context['tasks'] = tasks
         return context
 
     def dispatch(self, request, *args, **kwargs):
@@ -78,231 +81,152 @@ class TaskListView(ListView):
         return super().dispatch(request, *args, **kwargs)
 
 
-def create_passport(task, model):
-    """Creates a new passport (internal or foreign) for the user."""
+def fill_passport(passport):
+    """Prefill a new passport (internal or foreign) in the staff form."""
     today = datetime.date.today()
-    ten_years_more = today + datetime.timedelta(days=10 * 365 + 2)
-    new_passport = model(
-        date_of_issue=today,
-        number=randint(10000000, 99999999),
-        date_of_expiry=ten_years_more,
-        photo=task.user_data['photo'],
-    )
-    return new_passport
-
-
-@staff_member_required(login_url='signin')
-def create_ipassport_for_user(request, task_pk):
-    task = get_object_or_404(Task, pk=task_pk)
-    if task.status or task.user.passport:
-        messages.error(request, 'Заявка від цього користувача вже опрацьована.')
-        return redirect('tasks_list')
+    passport.date_of_issue = today
+    passport.date_of_expiry = today + datetime.timedelta(days=10 * 365 + 2)
+    return passport
+
+
+@method_decorator(staff_member_required(login_url='signin'), name='dispatch')
+class TaskApprovalView(TemplateView):
+    """
+    Staff form approving a task with the handler registered for its title.
+
+    `form_classes` complete the new documents of the handler, by document name, and
+    are passed to the template under `form_names`.
+    """
+    titles = ()
+    form_classes = {}
+    form_names = {}
+    template_name = 'administration/task_form.html'
+    title = ''
+    success_message = ''
+    already_processed = 'Заявка від цього користувача вже опрацьована.'
+    leased_to_other = 'Заявку опрацьовує інший співробітник.'
 
-    passport = create_passport(task, Passport)
-    address = get_object_or_404(Address, pk=task.user_data['address_id'])
-    if request.method == 'POST':
-        form = PassportForm(request.POST, instance=passport)
-        if form.is_valid():
-            task.user.passport = form.save()
-            task.user.address = address
-            task.user.save()
-            task.status = 1
-            task.save()
-            messages.success(request, 'Успішно оформлено внутрішній паспорт!')
+    def dispatch(self, request, *args, **kwargs):
+        self.handler = get_handler(kwargs['task_pk'])
+        self.task = self.handler.task
+        if self.task.title not in self.titles:
+            raise Http404("The task with this id and title wasn`t found.")
+        if self.task.status or self.is_processed():
+            messages.error(request, self.already_processed)
             return redirect('tasks_list')
-        else:
-            messages.error(request, form.errors)
-    form = PassportForm(instance=passport)
-    context = {
-        'form': form,
-        'user': task.user,
-        'address': address,
-        'task': task,
-        'title': 'Оформлення паспорту'
-    }
-    return render(request, 'administration/task_form.html', context=context)
+        if self.task.is_leased_to_other(request.user):
+            messages.error(request, self.leased_to_other)
+            return redirect('tasks_list')
+        try:
+            self.handler.validate()
+        except TaskError as error:
+            messages.error(request, str(error))
+            return redirect('tasks_list')
+        return super().dispatch(request, *args, **kwargs)
 
+    def is_processed(self):
+        """Whether the request is already fulfilled, although the task is pending."""
+        return False
 
-@staff_member_required(login_url='signin')
-def create_fpassport_for_user(request, task_pk):
-    task = get_object_or_404(Task, pk=task_pk)
-    if task.status or task.user.foreign_passport:
-        messages.error(request, 'Заявка від цього користувача вже опрацьована.')
-        return redirect('tasks_list')
+    def get_forms(self, data=None):
+        return {
+            name: self.form_classes[name](data, instance=fill_passport(document))
+            for name, document in self.handler.documents().items()
+        }
 
-    passport = create_passport(task, ForeignPassport)
-    if request.method == 'POST':
-        form = ForeignPassportForm(request.POST, instance=passport)
-        if form.is_valid():
-            task.user.foreign_passport = form.save()
-            task.user.save()
-            task.status = 1
-            task.save()
-            messages.success(request, 'Успішно оформлено закордонний паспорт!')
-            return redirect('tasks_list')
-        else:
-            messages.error(request, form.errors)
-    form = ForeignPassportForm(instance=passport)
-    return render(request, 'administration/task_form.html',
-                  {'form': form, 'user': task.user, 'task': task, 'title': 'Оформлення закордонного паспорту'})
+    def get_context_data(self, forms=None, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update({self.form_names[name]: form for name, form in (forms or {}).items()})
+        context.update({'user': self.task.user, 'task': self.task, 'title': self.get_title()})
+        return context
 
+    def get_title(self):
+        return self.title
 
-@staff_member_required(login_url='signin')
-def restore_ipassport_for_user(request, task_pk):
-    task = get_object_or_404(Task, pk=task_pk)
-    if task.status:
-        messages.error(request, 'Заявка від цього користувача вже опрацьована.')
-        return redirect('tasks_list')
+    def get(self, request, *args, **kwargs):
+        return self.render_to_response(self.get_context_data(forms=self.get_forms()))
 
-    new_passport = create_passport(task, Passport)
-    if request.method == 'POST':
-        form = PassportForm(request.POST, instance=new_passport)
-        if form.is_valid():
-            task.user.passport.delete()
-            task.user.passport = form.save()
-            task.user.save()
-            task.status = 1
-            task.save()
-            messages.success(request, 'Успішно поновлено внутрішній паспорт!')
-            return redirect('tasks_list')
+    def post(self, request, *args, **kwargs):
+        forms = self.get_forms(request.POST)
+        if not all([form.is_valid() for form in forms.values()]):
+            for form in forms.values():
+                messages.error(request, form.errors)
+            return self.render_to_response(self.get_context_data(forms=forms))
+
+        documents = {name: form.save(commit=False) for name, form in forms.items()}
+        if self.handler.approve(request.user, **documents):
+            messages.success(request, self.success_message.format(handler=self.handler))
         else:
-            messages.error(request, form.errors)
-    form = PassportForm(instance=new_passport)
-    return render(request, 'administration/task_form.html',
-                  {'form': form, 'user': task.user, 'title': 'Поновлення паспорту',
-                   'task': task, 'form_title': 'Встановіть необхідні дані для внутрішнього паспотру:'})
-
-
-@staff_member_required(login_url='signin')
-def restore_fpassport_for_user(request, task_pk):
-    task = get_object_or_404(Task, pk=task_pk)
-    if task.status:
-        messages.error(request, 'Заявка від цього користувача вже опрацьована.')
+            self.task.refresh_from_db(fields=['status', 'leased_by', 'lease_expires_at'])
+            leased = not self.task.status and self.task.is_leased_to_other(request.user)
+            messages.error(request, self.leased_to_other if leased else self.already_processed)
         return redirect('tasks_list')
 
-    new_passport = create_passport(task, ForeignPassport)
-    if request.method == 'POST':
-        form = ForeignPassportForm(request.POST, instance=new_passport)
-        if form.is_valid():
-            visas = Visa.objects.filter(foreign_passport=task.user.foreign_passport)
-            visas.delete()
-            task.user.foreign_passport.delete()
-            task.user.foreign_passport = form.save()
-            task.user.save()
-            task.status = 1
-            task.save()
-            messages.success(request, 'Успішно поновлено закордонний паспорт!')
-            return redirect('tasks_list')
-        else:
-            messages.error(request, form.errors)
-    form = ForeignPassportForm(instance=new_passport)
-    context = {
-        'form': form,
-        'user': task.user,
-        'title': 'Відновлення закордонного паспорту',
-        'task': task,
-        'form_title': 'Встановіть необхідні дані для відновлення закордонного паспотру користувача:'
-    }
-    return render(request, 'administration/task_form.html', context=context)
 
+class CreateInternalPassportView(TaskApprovalView):
+    titles = CreateInternalPassportHandler.titles
+    form_classes = {'passport': PassportForm}
+    form_names = {'passport': 'form'}
+    title = 'Оформлення паспорту'
+    success_message = 'Успішно оформлено внутрішній паспорт!'
 
-@staff_member_required(login_url='signin')
-def change_address_for_user(request, task_pk):
-    task = get_object_or_404(Task, pk=task_pk)
-    if task.status:
-        messages.error(request, 'Заявка від цього користувача вже опрацьована.')
-        return redirect('tasks_list')
-    addr = get_object_or_404(Address, pk=task.user_data["address_id"])
-    if request.method == 'POST':
-        task.user.address = addr
-        task.user.save()
-        task.status = 1
-        task.save()
-        messages.success(request, 'Успішно поновлено адресу прописки!')
-        return redirect('tasks_list')
+    def is_processed(self):
+        return self.task.user.passport is not None
 
-    return render(request, 'administration/address_form.html',
-                  {'user': task.user, 'address': addr, 'title': 'Оновлення адреси прописки'})
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(address=self.task.address, **kwargs)
 
 
-def handle_user_field_update(request, task, passport_form, field_name, new_value, fpassport_form=None):
-    """Handles updating a specific field on the user object and saving the new passport(s)."""
-    if passport_form.is_valid() and (fpassport_form is None or fpassport_form.is_valid()):
-        task.user.passport.delete()
-        setattr(task.user, field_name, new_value)
-        task.user.passport = passport_form.save()
+class CreateForeignPassportView(TaskApprovalView):
+    titles = CreateForeignPassportHandler.titles
+    form_classes = {'foreign_passport': ForeignPassportForm}
+    form_names = {'foreign_passport': 'form'}
+    title = 'Оформлення закордонного паспорту'
+    success_message = 'Успішно оформлено закордонний паспорт!'
 
-        if fpassport_form:
-            Visa.objects.filter(foreign_passport=task.user.foreign_passport).delete()
-            task.user.foreign_passport.delete()
-            task.user.foreign_passport = fpassport_form.save()
+    def is_processed(self):
+        return self.task.user.foreign_passport is not None
 
-        task.user.save()
-        task.status = 1
-        task.save()
 
-        messages.success(request, f'Успішно поновлено {field_name} користувача!')
-        return redirect('tasks_list')
-    else:
-        messages.error(request, passport_form.errors)
-        if fpassport_form:
-            messages.error(request, fpassport_form.errors)
+class RestoreInternalPassportView(TaskApprovalView):
+    titles = RestoreInternalPassportHandler.titles
+    form_classes = {'passport': PassportForm}
+    form_names = {'passport': 'form'}
+    title = 'Поновлення паспорту'
+    extra_context = {'form_title': 'Встановіть необхідні дані для внутрішнього паспотру:'}
+    success_message = 'Успішно поновлено внутрішній паспорт!'
 
 
-@staff_member_required(login_url='signin')
-def change_user_field(request, task_pk, field_name, new_value):
-    task = get_object_or_404(Task, pk=task_pk)
-    if task.status:
-        messages.error(request, 'Заявка від цього користувача вже опрацьована.')
-        return redirect('tasks_list')
+class RestoreForeignPassportView(TaskApprovalView):
+    titles = RestoreForeignPassportHandler.titles
+    form_classes = {'foreign_passport': ForeignPassportForm}
+    form_names = {'foreign_passport': 'form'}
+    title = 'Відновлення закордонного паспорту'
+    extra_context = {
+        'form_title': 'Встановіть необхідні дані для відновлення закордонного паспотру користувача:'
+    }
+    success_message = 'Успішно поновлено закордонний паспорт!'
 
-    new_passport = create_passport(task, Passport)
-
-    if not task.user.foreign_passport:
-        if request.method == 'POST':
-            passport_form = PassportForm(request.POST, instance=new_passport)
-            return handle_user_field_update(request, task, passport_form, field_name, new_value)
-        passport_form = PassportForm(instance=new_passport)
-        return render(request, 'administration/change_data_form.html', {
-            'user': task.user,
-            'task': task,
-            'passport_form': passport_form,
-            'field_name': field_name,
-            'title': f'Переоформлення {field_name} користувача у документах'
-        })
-
-    new_fpassport = create_passport(task, ForeignPassport)
-
-    if request.method == 'POST':
-        passport_form = PassportForm(request.POST, instance=new_passport)
-        fpassport_form = ForeignPassportForm(request.POST, instance=new_fpassport)
-        return handle_user_field_update(request, task, passport_form, field_name, new_value, fpassport_form)
-
-    passport_form = PassportForm(instance=new_passport)
-    fpassport_form = ForeignPassportForm(instance=new_fpassport)
-    return render(request, 'administration/change_data_form.html', {
-        'user': task.user,
-        'task': task,
-        'passport_form': passport_form,
-        'fpassport_form': fpassport_form,
-        'field_name': field_name,
-        'title': f'Переоформлення {field_name} користувача у документах'
-    })
-
-
-@staff_member_required(login_url='signin')
-def change_name_for_user(request, task_pk):
-    task = get_object_or_404(Task, pk=task_pk)
-    return change_user_field(request, task_pk, 'name', task.user_data['name'])
-
-
-@staff_member_required(login_url='signin')
-def change_surname_for_user(request, task_pk):
-    task = get_object_or_404(Task, pk=task_pk)
-    return change_user_field(request, task_pk, 'surname', task.user_data['surname'])
-
-
-@staff_member_required(login_url='signin')
-def change_patronymic_for_user(request, task_pk):
-    task = get_object_or_404(Task, pk=task_pk)
-    return change_user_field(request, task_pk, 'patronymic', task.user_data['patronymic'])
+
+class ChangeAddressView(TaskApprovalView):
+    titles = ChangeAddressHandler.titles
+    template_name = 'administration/address_form.html'
+    title = 'Оновлення адреси прописки'
+    success_message = 'Успішно поновлено адресу прописки!'
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(address=self.task.address, **kwargs)
+
+
+class ChangeUserFieldView(TaskApprovalView):
+    """Reissue the passports of the user with a new name; `titles` is set per URL."""
+    form_classes = {'passport': PassportForm, 'foreign_passport': ForeignPassportForm}
+    form_names = {'passport': 'passport_form', 'foreign_passport': 'fpassport_form'}
+    template_name = 'administration/change_data_form.html'
+    success_message = 'Успішно поновлено {handler.field_name} користувача!'
+
+    def get_title(self):
+        return f'Переоформлення {self.handler.field_name} користувача у документах'
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(field_name=self.handler.field_name, **kwargs)
@@ -0,0 +1,95 @@
+"""
+Token authentication for the client API.
+
+`DocumentsTokenAuthentication` loads the token with the user, their passports and
+their address in one joined query, so views reading `request.user.passport`,
+`.foreign_passport` or `.address` run no further queries for them.
+
+With `TOKEN_CACHE_SECONDS` set, the users of recently seen tokens are also kept in
+memory by each process for that long. Logging out deletes the token, which drops
+it from the cache, and changes to a user or their documents made in the process
+drop the user; a change made by another process is seen once the entry expires.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenUserCache:
+    """In-process cache of `(user, token)` by token key, the oldest entry evicted when full."""
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """A copy of the cached user and the token, or None if the key isn't cached or has expired."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, user, token = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+        # Each request gets its own instance, views may set attributes on the user.
+        user = copy.copy(user)
+        user.from_token_cache = True
+        return user, token
+
+    def set(self, key, user, token):
+        if settings.TOKEN_CACHE_SECONDS <= 0:
+            return
+        with self.lock:
+            self.entries.pop(key, None)
+            if len(self.entries) >= settings.TOKEN_CACHE_MAX_SIZE:
+                del self.entries[next(iter(self.entries))]
+            self.entries[key] = (time.monotonic() + settings.TOKEN_CACHE_SECONDS, copy.copy(user), token)
+
+    def forget(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def forget_users(self, user_pks):
+        user_pks = set(user_pks)
+        if user_pks:
+            self.forget_where(lambda user: user.pk in user_pks)
+
+    def forget_where(self, predicate):
+        """Drop the entries whose user matches `predicate`."""
+        with self.lock:
+            for key in [key for key, (expires_at, user, token) in self.entries.items() if predicate(user)]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenUserCache()
+
+
+class DocumentsTokenAuthentication(TokenAuthentication):
+    related = ('user__passport', 'user__foreign_passport', 'user__address')
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        model = self.get_model()
+        try:
+            token = model.objects.select_related(*self.related).get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        token_cache.set(key, token.user, token)
+        return token.user, token
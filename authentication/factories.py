@@ -1,5 +1,4 @@
 import datetime
-from random import randint
 
 import factory.django
 import factory.fuzzy
@@ -27,6 +26,5 @@ class CustomUserFactory(factory.django.DjangoModelFactory):
     passport         = factory.SubFactory(PassportFactory)
     foreign_passport = factory.SubFactory(ForeignPassportFactory)
 
-    record_number = factory.LazyAttribute(lambda o: o.date_of_birth.strftime('%Y%m%d') + f'-{randint(1, 99999):05d}')
     is_active      = True
     is_staff       = False
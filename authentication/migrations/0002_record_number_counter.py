@@ -0,0 +1,20 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecordNumberCounter',
+            fields=[
+                ('date_of_birth', models.DateField(primary_key=True, serialize=False)),
+                ('last_suffix', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
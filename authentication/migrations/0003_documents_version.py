@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_record_number_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='documents_modified_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='documents_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
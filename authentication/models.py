@@ -1,7 +1,9 @@
-from random import randint
+from collections import defaultdict
 
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 
 from passports.models import Address, Passport, ForeignPassport
 from passports.utils import COUNTRY_CHOICES
@@ -25,6 +27,25 @@ class CustomUserManager(BaseUserManager):
         extra_fields.setdefault('is_superuser', True)
         return self.create_user(email, password, **extra_fields)
 
+    def assign_record_numbers(self, users):
+        """
+        Give the users without a record number the next free ones, with one
+        reservation per birth date. Used for imports that `bulk_create()` many users.
+        """
+        users_by_date = defaultdict(list)
+        for user in users:
+            if not user.record_number:
+                users_by_date[user.date_of_birth].append(user)
+        for date_of_birth, dated_users in users_by_date.items():
+            record_numbers = RecordNumberCounter.objects.allocate(date_of_birth, len(dated_users))
+            for user, record_number in zip(dated_users, record_numbers):
+                user.record_number = record_number
+        return users
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = self.assign_record_numbers(list(objs))
+        return super().bulk_create(objs, *args, **kwargs)
+
 
 class CustomUser(AbstractBaseUser):
     GENDER_CHOICES = [
@@ -51,6 +72,10 @@ class CustomUser(AbstractBaseUser):
     is_staff     = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
 
+    # Incremented by every change of what the client document endpoints return, for their ETags.
+    documents_version     = models.PositiveIntegerField(default=0)
+    documents_modified_at = models.DateTimeField(default=timezone.now)
+
     objects = CustomUserManager()
 
     USERNAME_FIELD  = 'email'
@@ -66,7 +91,83 @@ class CustomUser(AbstractBaseUser):
     def has_module_perms(self, app_label):
         return self.is_superuser
 
+    # Saves of only these fields leave the documents as they are.
+    ACCOUNT_FIELDS = frozenset({'password', 'last_login', 'is_active', 'is_staff', 'is_superuser'})
+
     def save(self, *args, **kwargs):
         if not self.record_number:
-            self.record_number = self.date_of_birth.strftime('%Y%m%d') + f'-{randint(1, 99999):05d}'
+            self.record_number, = RecordNumberCounter.objects.allocate(self.date_of_birth)
+        update_fields = kwargs.get('update_fields')
+        touched = not self._state.adding and (
+            update_fields is None or not self.ACCOUNT_FIELDS.issuperset(update_fields)
+        )
+        if touched:
+            # Incremented in the database, so concurrent saves never share a version.
+            self.documents_version = F('documents_version') + 1
+            self.documents_modified_at = timezone.now()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'documents_version', 'documents_modified_at'}
         super().save(*args, **kwargs)
+        if touched:
+            # Reloaded when read.
+            del self.__dict__['documents_version']
+
+
+class RecordNumbersExhausted(Exception):
+    """All record numbers of a birth date have been handed out."""
+
+
+class RecordNumberCounterQuerySet(models.QuerySet):
+    def reserve(self, date_of_birth, count):
+        """
+        Reserve `count` record number suffixes of a birth date.
+
+        Inside a transaction the counter row stays locked until the transaction
+        ends, and the reservation is undone if it rolls back.
+
+        Returns:
+            int: The first reserved suffix.
+
+        Raises:
+            RecordNumbersExhausted: If fewer than `count` suffixes are left.
+        """
+        with transaction.atomic(savepoint=False):
+            if not self.filter(pk=date_of_birth).update(last_suffix=F('last_suffix') + count):
+                self.get_or_create(date_of_birth=date_of_birth)
+                self.filter(pk=date_of_birth).update(last_suffix=F('last_suffix') + count)
+            last_suffix = self.values_list('last_suffix', flat=True).get(pk=date_of_birth)
+            if last_suffix > RecordNumberCounter.MAX_SUFFIX:
+                raise RecordNumbersExhausted(f"No record numbers are left for {date_of_birth}.")
+        return last_suffix - count + 1
+
+    def allocate(self, date_of_birth, count=1):
+        """
+        Take the next `count` free record numbers of a birth date.
+
+        Suffixes already used by users numbered before the counter, or given their
+        record number explicitly, are found with one range query on the unique
+        index and skipped.
+
+        Returns:
+            list[str]: The record numbers, in the `YYYYMMDD-NNNNN` format.
+        """
+        prefix = date_of_birth.strftime('%Y%m%d')
+        record_numbers = []
+        while len(record_numbers) < count:
+            needed = count - len(record_numbers)
+            first = self.reserve(date_of_birth, needed)
+            candidates = [f'{prefix}-{suffix:05d}' for suffix in range(first, first + needed)]
+            taken = set(CustomUser.objects.filter(record_number__range=(candidates[0], candidates[-1]))
+                        .values_list('record_number', flat=True))
+            record_numbers += [record_number for record_number in candidates if record_number not in taken]
+        return record_numbers
+
+
+class RecordNumberCounter(models.Model):
+    """Last record number suffix handed out for a birth date."""
+    MAX_SUFFIX = 99999
+
+    date_of_birth = models.DateField(primary_key=True)
+    last_suffix = models.IntegerField(default=0)
+
+    objects = RecordNumberCounterQuerySet.as_manager()
@@ -0,0 +1,52 @@
+import datetime
+
+from django.test import TestCase
+
+from authentication.factories import CustomUserFactory
+from authentication.models import CustomUser, RecordNumberCounter, RecordNumbersExhausted
+
+
+class RecordNumberTests(TestCase):
+    date_of_birth = datetime.date(1990, 1, 1)
+
+    def new_user(self, i, **kwargs):
+        return CustomUser(email=f"import{i}@test.com", name="Name", surname="Surname", patronymic="Patronymic",
+                          sex="F", date_of_birth=self.date_of_birth, place_of_birth="Kyiv", nationality="UA",
+                          **kwargs)
+
+    def test_save_takes_next_suffix(self):
+        users = [CustomUserFactory(date_of_birth=self.date_of_birth, address=None, passport=None,
+                                   foreign_passport=None) for _ in range(3)]
+        self.assertEqual([user.record_number for user in users],
+                         ['19900101-00001', '19900101-00002', '19900101-00003'])
+        other = CustomUserFactory(date_of_birth=datetime.date(1990, 1, 2), address=None, passport=None,
+                                  foreign_passport=None)
+        self.assertEqual(other.record_number, '19900102-00001')
+
+    def test_skips_taken_record_numbers(self):
+        self.new_user(0, record_number='19900101-00002').save()
+        users = CustomUser.objects.bulk_create([self.new_user(i) for i in range(1, 4)])
+        self.assertEqual([user.record_number for user in users],
+                         ['19900101-00001', '19900101-00003', '19900101-00004'])
+
+    def test_allocation_queries_dont_grow_with_count(self):
+        RecordNumberCounter.objects.create(date_of_birth=self.date_of_birth)
+        # Counter update and read, taken numbers.
+        for count in (1, 1000):
+            with self.assertNumQueries(3):
+                RecordNumberCounter.objects.allocate(self.date_of_birth, count)
+
+    def test_bulk_create_50k_users_born_on_the_same_day(self):
+        users = CustomUser.objects.bulk_create([self.new_user(i) for i in range(50000)], batch_size=2000)
+        self.assertEqual(len({user.record_number for user in users}), 50000)
+        self.assertEqual(CustomUser.objects.filter(record_number__startswith='19900101-').count(), 50000)
+        self.assertEqual(CustomUser.objects.order_by('-record_number').values_list('record_number', flat=True)[0],
+                         '19900101-50000')
+        user = self.new_user(50000)
+        user.save()
+        self.assertEqual(user.record_number, '19900101-50001')
+
+    def test_exhausted(self):
+        RecordNumberCounter.objects.create(date_of_birth=self.date_of_birth, last_suffix=99999)
+        with self.assertRaises(RecordNumbersExhausted):
+            self.new_user(0).save()
@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from authentication.authentication import token_cache
+from authentication.factories import CustomUserFactory
+from passports.documents import cache_key
+from passports.factories import AddressFactory, PassportFactory, ForeignPassportFactory, VisaFactory
+
+
+class TokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        foreign_passport = ForeignPassportFactory(photo='')
+        self.visa = VisaFactory(foreign_passport=foreign_passport, photo='')
+        self.user = CustomUserFactory(email="test@test.com", address=AddressFactory(),
+                                      passport=PassportFactory(photo=''), foreign_passport=foreign_passport)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def assertQueries(self, queries, path):
+        with self.assertNumQueries(queries):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_user_is_loaded_with_documents(self):
+        # The token joined with the user, passports and address.
+        for path in ("/api/my-documents/", "/api/my-documents/internal-passport/",
+                     "/api/my-documents/foreign-passport/", "/api/my-documents/address/",
+                     "/api/my-documents/user-data/"):
+            cache.clear()
+            self.assertQueries(1, path)
+        # Then the visas, with their passport's user joined.
+        self.assertQueries(2, "/api/my-documents/visas/")
+        self.assertQueries(2, f"/api/my-documents/visas/{self.visa.pk}/")
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token wrong")
+        response = self.client.get("/api/my-documents/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json(), {"detail": "Invalid token."})
+
+    def test_inactive_user(self):
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        response = self.client.get("/api/my-documents/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_no_cache_by_default(self):
+        self.assertQueries(1, "/api/my-documents/user-data/")
+        self.assertQueries(1, "/api/my-documents/user-data/")
+
+    @override_settings(TOKEN_CACHE_SECONDS=60)
+    def test_cached_user(self):
+        self.assertQueries(1, "/api/my-documents/user-data/")
+        response = self.assertQueries(0, "/api/my-documents/user-data/")
+        self.assertEqual(response.json()['email'], "test@test.com")
+
+    @override_settings(TOKEN_CACHE_SECONDS=60)
+    def test_logout_invalidates(self):
+        self.assertQueries(1, "/api/my-documents/user-data/")
+        response = self.client.post("/api/auth/token/logout/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get("/api/my-documents/user-data/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_CACHE_SECONDS=60)
+    def test_document_change_invalidates(self):
+        self.assertQueries(1, "/api/my-documents/internal-passport/")
+        self.user.passport.authority = 1234
+        self.user.passport.save()
+        response = self.assertQueries(1, "/api/my-documents/internal-passport/")
+        self.assertEqual(response.json()['authority'], 1234)
+
+    @override_settings(TOKEN_CACHE_SECONDS=60)
+    def test_cached_user_doesnt_fill_documents_cache(self):
+        self.assertQueries(1, "/api/my-documents/user-data/")
+        self.assertQueries(0, "/api/my-documents/")
+        self.assertIsNone(cache.get(cache_key(self.user)))
@@ -50,7 +50,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'authentication.authentication.DocumentsTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -148,6 +148,8 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
+
+TEST_RUNNER = 'passport_service.test_runner.TestRunner'
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -158,6 +160,53 @@ AUTH_USER_MODEL = 'authentication.CustomUser'
 LOGIN_URL = 'signin'
 LOGIN_REDIRECT_URL = 'signin'
 
+# How long a task claimed by a staff member stays reserved for them, in seconds.
+TASK_LEASE_SECONDS = 10 * 60
+
+# Paginated lists with more rows than this get an estimated or cached count instead of an exact one.
+PAGINATION_EXACT_COUNT_LIMIT = 10000
+# How long such a count is cached, in seconds.
+PAGINATION_COUNT_CACHE_SECONDS = 30
+
+# Longest wait of a task change feed request, in seconds, and how often a waiting request
+# checks the cache for changes made by other processes.
+TASK_FEED_TIMEOUT_SECONDS = 25
+TASK_FEED_POLL_SECONDS = 1
+# Task changes are numbered without a lock and can commit out of order. A feed cursor keeps the
+# numbers without a task among its last TASK_FEED_REORDER_WINDOW and reads them again; a change
+# committed later than that many newer ones is missed.
+TASK_FEED_REORDER_WINDOW = 100
+
+# Background jobs, see `administration.jobs`. A running job whose worker doesn't finish it within
+# JOB_LEASE_SECONDS is run again; failed attempts are retried after JOB_RETRY_BASE_SECONDS,
+# doubled after each attempt up to JOB_RETRY_MAX_SECONDS.
+JOB_LEASE_SECONDS = 5 * 60
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE_SECONDS = 30
+JOB_RETRY_MAX_SECONDS = 60 * 60
+# How long an idle worker sleeps before looking for due jobs again, in seconds.
+JOB_POLL_SECONDS = 5
+
+# Document numbers reserved by a process at a time, see `passports.numbers`. Numbers left in a
+# process's block when it exits are never handed out.
+DOCUMENT_NUMBER_BLOCK_SIZE = 100
+
+# How long the serialized documents of a user are cached, in seconds, see `passports.documents`.
+DOCUMENTS_CACHE_SECONDS = 60 * 60
+
+# How long each process keeps the users of API tokens in memory, in seconds; 0 disables the cache.
+# See `authentication.authentication`.
+TOKEN_CACHE_SECONDS = 0
+TOKEN_CACHE_MAX_SIZE = 10000
+
+# Variants generated next to each uploaded photo, the largest width and height of each, see
+# `passports.photos`.
+PHOTO_VARIANTS = {
+    'thumbnail': (160, 200),
+    'preview': (640, 800),
+}
+PHOTO_VARIANT_QUALITY = 85
+
 DJOSER = {
     "LOGIN_FIELD": "email",
     'USER_CREATE_PASSWORD_RETYPE': True,
@@ -0,0 +1,23 @@
+import shutil
+import tempfile
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the tests with MEDIA_ROOT in a temporary directory, removed afterwards,
+    so uploaded and factory-made photos don't end up in the project's media.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.media_root = tempfile.mkdtemp(prefix='passport-service-media-')
+        self.media = override_settings(MEDIA_ROOT=self.media_root)
+        self.media.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.media.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
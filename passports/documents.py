@@ -0,0 +1,93 @@
+"""
+Cached document bundles of the users.
+
+The passports of a user, as `RetrieveDocumentsSerializer` renders them, change only
+when the user, their passports or their address are saved, so the serialized
+bundle is cached per user for `DOCUMENTS_CACHE_SECONDS` and served to
+`my-documents/`, `internal-passport/` and `foreign-passport/`. Photo URLs, of the
+originals and their variants, are cached relative and made absolute for each request.
+
+Every such change increments `CustomUser.documents_version`, which is part of the
+cache key: a bundle cached before the change is never read again, by any process,
+and just expires. The signals in `passports.signals` increment the version of the
+users a save changes; writes that bypass the signals, such as bulk updates,
+increment it themselves and call `invalidate()`.
+
+The client document endpoints are decorated with `documents_condition`, which tags responses
+with an ETag and Last-Modified from it and answers a request whose validators
+still match with 304 before the view runs.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.views.decorators.http import condition
+from prometheus_client import Counter, Gauge
+
+from authentication.authentication import token_cache
+from .serializers import RetrieveDocumentsSerializer
+
+DOCUMENTS = ('internal_passport', 'foreign_passport')
+PHOTO_FIELDS = ('photo', 'photo_thumbnail', 'photo_preview')
+
+DOCUMENTS_CACHE_REQUESTS = Counter('documents_cache_requests_total', 'Reads of cached document bundles.',
+                                   ['result'])
+DOCUMENTS_CACHE_HIT_RATIO = Gauge('documents_cache_hit_ratio',
+                                  'Share of the document bundle reads served from the cache by this process.')
+
+
+def hit_ratio():
+    reads = {sample.labels['result']: sample.value for metric in DOCUMENTS_CACHE_REQUESTS.collect()
+             for sample in metric.samples if sample.name.endswith('_total')}
+    total = sum(reads.values())
+    return reads.get('hit', 0) / total if total else 0.0
+
+
+DOCUMENTS_CACHE_HIT_RATIO.set_function(hit_ratio)
+
+
+def cache_key(user):
+    return f'documents:{user.pk}:{user.documents_version}'
+
+
+def get_documents(request):
+    """
+    The document bundle of the requesting user.
+
+    Returns:
+        dict: The serialized `internal_passport` and `foreign_passport`, each None if the user has none.
+    """
+    key = cache_key(request.user)
+    bundle = cache.get(key)
+    if bundle is None:
+        DOCUMENTS_CACHE_REQUESTS.labels('miss').inc()
+        bundle = dict(RetrieveDocumentsSerializer(request.user).data)
+        # A user from the token cache may predate a change made by another process.
+        if not getattr(request.user, 'from_token_cache', False):
+            cache.set(key, bundle, settings.DOCUMENTS_CACHE_SECONDS)
+    else:
+        DOCUMENTS_CACHE_REQUESTS.labels('hit').inc()
+
+    for name in DOCUMENTS:
+        document = bundle[name]
+        if document:
+            bundle[name] = {**document, **{field: request.build_absolute_uri(document[field])
+                                           for field in PHOTO_FIELDS if document.get(field)}}
+    return bundle
+
+
+def invalidate(user_pks):
+    """
+    Drop the users whose documents version was incremented from this process's
+    token cache, which would otherwise keep reading their bundles of the old version.
+    """
+    token_cache.forget_users(list(user_pks))
+
+
+def documents_etag(request, *args, **kwargs):
+    return f'W/"{request.user.pk}-{request.user.documents_version}"'
+
+
+def documents_last_modified(request, *args, **kwargs):
+    return request.user.documents_modified_at
+
+
+documents_condition = condition(etag_func=documents_etag, last_modified_func=documents_last_modified)
@@ -10,6 +10,9 @@ from authentication.models import CustomUser
 from .models import Address, Passport, ForeignPassport, Visa
 from .utils import COUNTRY_CHOICES
 
+# Sample photos for the tests; not read through MEDIA_ROOT, which the test runner points at a temporary directory.
+TEST_IMAGES_DIR = os.path.join(settings.BASE_DIR, 'media', 'tests')
+
 
 class AddressFactory(factory.django.DjangoModelFactory):
     class Meta:
@@ -27,7 +30,6 @@ class AbstractPassportFactory(factory.django.DjangoModelFactory):
     class Meta:
         abstract = True
 
-    number         = factory.LazyAttribute(lambda _: random.randint(10000000, 99999999))
     authority      = factory.LazyAttribute(lambda _: random.randint(1111, 9999))
     date_of_issue  = factory.LazyAttribute(lambda _: timezone.now().date())
     date_of_expiry = factory.LazyAttribute(lambda o: o.date_of_issue + timezone.timedelta(days=365 * 10 + 2))
@@ -37,7 +39,7 @@ class PassportFactory(AbstractPassportFactory):
     class Meta:
         model = Passport
 
-    photo = factory.django.ImageField(from_path=os.path.join(settings.MEDIA_ROOT, 'tests/create_ip.png'),
+    photo = factory.django.ImageField(from_path=os.path.join(TEST_IMAGES_DIR, 'create_ip.png'),
                                       filename="TEST-internal-passport.jpeg")
 
 
@@ -45,19 +47,18 @@ class ForeignPassportFactory(AbstractPassportFactory):
     class Meta:
         model = ForeignPassport
 
-    photo = factory.django.ImageField(from_path=os.path.join(settings.MEDIA_ROOT, 'tests/create_fp.jpg'), filename="TEST-foreign-passport.jpeg")
+    photo = factory.django.ImageField(from_path=os.path.join(TEST_IMAGES_DIR, 'create_fp.jpg'), filename="TEST-foreign-passport.jpeg")
 
 
 class VisaFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Visa
 
-    number           = factory.LazyAttribute(lambda _: random.randint(10000000, 99999999))
     foreign_passport = factory.SubFactory(ForeignPassportFactory)
     place_of_issue   = factory.Sequence(lambda n: f"Test place{n + 1}")
     date_of_issue    = factory.LazyAttribute(lambda _: timezone.now().date())
     date_of_expiry   = factory.LazyAttribute(lambda o: o.date_of_issue + timezone.timedelta(days=365 * 10 + 2))
-    photo            = factory.django.ImageField(from_path=os.path.join(settings.MEDIA_ROOT, 'tests/create_visa.jpg'), filename="TEST-visa.jpeg")
+    photo            = factory.django.ImageField(from_path=os.path.join(TEST_IMAGES_DIR, 'create_visa.jpg'), filename="TEST-visa.jpeg")
     type             = factory.fuzzy.FuzzyChoice(Visa.TYPE_CHOICES, getter=lambda c: c[0])
     country          = factory.fuzzy.FuzzyChoice(COUNTRY_CHOICES, getter=lambda c: c[0])
     entry_amount     = factory.fuzzy.FuzzyChoice(Visa.ENTRY_CHOICES, getter=lambda c: c[0])
@@ -25,9 +25,8 @@ class PassportForm(forms.ModelForm):
 
     class Meta:
         model = Passport
-        fields = ('number', 'authority', 'date_of_issue', 'date_of_expiry')
+        fields = ('authority', 'date_of_issue', 'date_of_expiry')
         widgets = {
-            'number': forms.NumberInput(attrs={'class': 'form-control'}),
             'authority': forms.NumberInput(attrs={'class': 'form-control'}),
             'date_of_issue': forms.DateInput(attrs={'class': 'form-control'}),
             'date_of_expiry': forms.DateInput(attrs={'class': 'form-control'}),
@@ -38,9 +37,8 @@ class ForeignPassportForm(forms.ModelForm):
 
     class Meta:
         model = ForeignPassport
-        fields = ('number', 'authority', 'date_of_issue', 'date_of_expiry')
+        fields = ('authority', 'date_of_issue', 'date_of_expiry')
         widgets = {
-            'number': forms.NumberInput(attrs={'class': 'form-control'}),
             'authority': forms.NumberInput(attrs={'class': 'form-control'}),
             'date_of_issue': forms.DateInput(attrs={'class': 'form-control'}),
             'date_of_expiry': forms.DateInput(attrs={'class': 'form-control'}),
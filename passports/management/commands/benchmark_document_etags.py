@@ -0,0 +1,73 @@
+import datetime
+
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from administration.management.benchmark import BenchmarkCommand
+from passports.models import Address, ForeignPassport, Passport, Visa
+from passports.rest_views import (ForeignPassportDetailAPIView, GetDocumentsAPIView, InternalPassportDetailAPIView,
+                                  UserAddressAPIView, VisaViewSet)
+
+
+class Command(BenchmarkCommand):
+    help = 'Compare bytes sent and latency of a repeat visit to the client document endpoints with and without ETags.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--visas', type=int, default=5, help='Visas of the benchmark user.')
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        endpoints = (
+            ('my-documents', GetDocumentsAPIView.as_view()),
+            ('internal-passport', InternalPassportDetailAPIView.as_view()),
+            ('foreign-passport', ForeignPassportDetailAPIView.as_view()),
+            ('address', UserAddressAPIView.as_view()),
+            ('visas', VisaViewSet.as_view({'get': 'list'})),
+        )
+        with self.rollback():
+            token = self.create_client(options['visas'])
+            self.stdout.write(f'{"endpoint":>18} {"200, bytes":>11} {"200, ms":>9} {"304, bytes":>11} {"304, ms":>9}')
+            for name, view in endpoints:
+                # Warm the document cache, a repeat visit is served from it either way.
+                response = self.visit(view, token)
+                etag = response.headers['ETag']
+                full_ms = self.measure(lambda: self.visit(view, token), repeat)
+                not_modified_ms = self.measure(lambda: self.visit(view, token, HTTP_IF_NONE_MATCH=etag), repeat)
+                not_modified = self.visit(view, token, HTTP_IF_NONE_MATCH=etag)
+                if not_modified.status_code != 304:
+                    self.stderr.write(f'{name}: expected 304, got {not_modified.status_code}')
+                self.stdout.write(f'{name:>18} {self.size(response):>11} {full_ms:>9.2f} '
+                                  f'{self.size(not_modified):>11} {not_modified_ms:>9.2f}')
+        cache.clear()
+
+    def create_client(self, visas):
+        today = datetime.date.today()
+        dates = {'date_of_issue': today, 'date_of_expiry': today + datetime.timedelta(days=10 * 365 + 2)}
+        foreign_passport = ForeignPassport.objects.create(authority=1234, photo='photos/benchmark.jpg', **dates)
+        Visa.objects.bulk_create(
+            Visa(number=10000001 + i, foreign_passport=foreign_passport, place_of_issue='Kyiv', photo='',
+                 type='Tourist', country='PL', entry_amount='MULT', **dates)
+            for i in range(visas)
+        )
+        user = self.create_user(
+            address=Address.objects.create(country_code='UA', region='Kharkiv region', settlement='Kharkiv',
+                                           street='Zoryana 4', apartments='88', post_code=61070),
+            passport=Passport.objects.create(authority=1234, photo='photos/benchmark.jpg', **dates),
+            foreign_passport=foreign_passport,
+        )
+        return Token.objects.create(user=user)
+
+    def visit(self, view, token, **headers):
+        request = APIRequestFactory().get('/', HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Token {token.key}',
+                                          **headers)
+        response = view(request)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def size(self, response):
+        """Body and header bytes of the response."""
+        headers = sum(len(f'{name}: {value}\r\n') for name, value in response.headers.items())
+        return len(response.content) + headers
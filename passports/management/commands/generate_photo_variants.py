@@ -0,0 +1,61 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from administration.models import Task
+from passports.models import ForeignPassport, Passport, Visa
+from passports.photos import make_variants, variant_paths
+
+
+def generate(path):
+    """Generate the variants of a photo in a worker process; returns the error, if any."""
+    try:
+        make_variants(path)
+    except Exception as error:
+        return f'{type(error).__name__}: {error}'
+    return None
+
+
+def has_variants(path):
+    return all(default_storage.exists(name) for name in variant_paths(path))
+
+
+class Command(BaseCommand):
+    help = ('Regenerate the size variants (see passports.photos) of the photos of the documents and tasks '
+            'in a pool of processes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes.')
+        parser.add_argument('--missing', action='store_true',
+                            help='Only generate the variants of the photos missing any of them.')
+
+    def handle(self, *args, **options):
+        paths = self.photo_paths()
+        if options['missing']:
+            paths = [path for path in paths if not has_variants(path)]
+
+        started = time.perf_counter()
+        failed = 0
+        # Workers started with the spawn or forkserver methods don't inherit the set up apps.
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as executor:
+            for path, error in zip(paths, executor.map(generate, paths, chunksize=16)):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{path}: {error}')
+                elif options['verbosity'] > 1:
+                    self.stdout.write(path)
+
+        self.stdout.write(f'Generated variants of {len(paths) - failed} photo(s), {failed} failed, '
+                          f'in {time.perf_counter() - started:.1f}s.')
+
+    def photo_paths(self):
+        """Paths of the photos of the documents and tasks, without duplicates."""
+        paths = set()
+        for model in (Passport, ForeignPassport, Visa):
+            paths.update(model.objects.exclude(photo='').values_list('photo', flat=True))
+        paths.update(Task.objects.filter(user_data__has_key='photo').values_list('user_data__photo', flat=True))
+        return sorted(path for path in paths if path and default_storage.exists(path))
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+def create_sequences(apps, schema_editor):
+    DocumentNumberSequence = apps.get_model('passports', 'DocumentNumberSequence')
+    DocumentNumberSequence.objects.bulk_create([
+        DocumentNumberSequence(kind=kind) for kind in ('passports.passport', 'passports.foreignpassport', 'passports.visa')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('passports', '0003_visa_is_active_alter_visa_date_of_expiry_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentNumberSequence',
+            fields=[
+                ('kind', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('next_index', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_sequences, migrations.RunPython.noop),
+    ]
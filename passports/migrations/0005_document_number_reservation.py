@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-18 17:35
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('passports', '0004_document_number_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentNumberReservation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=100)),
+                ('start', models.BigIntegerField()),
+            ],
+        ),
+    ]
@@ -1,11 +1,14 @@
-import random
-from django.db import models
+import uuid
+
+from django.db import models, transaction
+from django.db.models import F
 
 from validation.validate_authority import validate_authority
 from validation.validate_expiry_date import validate_expiry_date
 from validation.validate_issue_date import validate_issue_date
 from validation.validate_number import validate_number
 from validation.validate_post_code import validate_post_code
+from .numbers import DocumentNumberAllocator
 from .utils import COUNTRY_CHOICES
 
 
@@ -38,16 +41,21 @@ class AbstractPassport(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.number:
-            self.number = random.randint(10000000, 99999999)
+            self.number = self.numbers.allocate()
+            kwargs.setdefault('force_insert', True)
         super().save(*args, **kwargs)
 
 
 class Passport(AbstractPassport):
+    numbers = DocumentNumberAllocator()
+
     def __str__(self):
         return super().__str__() + "(Internal Passport)"
 
 
 class ForeignPassport(AbstractPassport):
+    numbers = DocumentNumberAllocator()
+
     def __str__(self):
         return super().__str__() + "(Foreign Passport)"
 
@@ -81,10 +89,49 @@ class Visa(models.Model):
     entry_amount     = models.CharField(max_length=4, choices=ENTRY_CHOICES)
     is_active        = models.BooleanField(default=True)
 
+    numbers = DocumentNumberAllocator()
+
     def __str__(self):
         return f"Visa to {self.country}. Expiration date: {self.date_of_expiry})"
 
     def save(self, *args, **kwargs):
         if not self.number:
-            self.number = random.randint(10000000, 99999999)
+            self.number = self.numbers.allocate()
+            kwargs.setdefault('force_insert', True)
         super().save(*args, **kwargs)
+
+
+class DocumentNumberSequenceQuerySet(models.QuerySet):
+    def reserve(self, kind, size):
+        """
+        Reserve `size` indexes of the number space of `kind`.
+
+        Inside a transaction the counter row stays locked until the transaction
+        ends, and the reservation is undone if it rolls back.
+
+        Returns:
+            int: The first reserved index.
+        """
+        with transaction.atomic(savepoint=False):
+            if not self.filter(pk=kind).update(next_index=F('next_index') + size):
+                self.get_or_create(kind=kind)
+                self.filter(pk=kind).update(next_index=F('next_index') + size)
+            return self.values_list('next_index', flat=True).get(pk=kind) - size
+
+
+class DocumentNumberSequence(models.Model):
+    """Counter of the indexes of a document number space handed out in blocks, see `passports.numbers`."""
+    kind = models.CharField(max_length=100, primary_key=True)
+    next_index = models.BigIntegerField(default=0)
+
+    objects = DocumentNumberSequenceQuerySet.as_manager()
+
+
+class DocumentNumberReservation(models.Model):
+    """
+    A block of indexes reserved inside a transaction, see `passports.numbers.NumberBlock`.
+    The row is rolled back together with the reservation, and deleted once it commits.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=100)
+    start = models.BigIntegerField()
@@ -0,0 +1,175 @@
+"""
+Collision-free document numbers.
+
+Each document model numbers its rows through a `DocumentNumberAllocator`. The
+allocator walks the indexes 0, 1, 2, ... of the number space and maps every index
+to a number with a keyed permutation, so numbers never repeat but consecutive
+documents don't get consecutive numbers.
+
+The indexes are reserved from `DocumentNumberSequence` in blocks, one counter
+update for `DOCUMENT_NUMBER_BLOCK_SIZE` numbers, and handed out from memory, so
+processes sharing the database never get the same index. Numbers of a block that
+are already taken, by documents numbered before the allocator, are dropped when
+the block is reserved.
+"""
+import hashlib
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+
+# Numbers accepted by `validate_number`.
+FIRST_NUMBER = 10000001
+NUMBER_SPACE = 99999998 - FIRST_NUMBER + 1
+
+
+class DocumentNumbersExhausted(Exception):
+    """Every number of the allocator's space has been handed out."""
+
+
+class FeistelPermutation:
+    """
+    Keyed bijection of range(size) onto itself.
+
+    A balanced Feistel network permutes the smallest even-width bit domain holding
+    `size` values; results outside the range are permuted again (cycle walking)
+    until they fall inside it, which keeps the mapping a bijection of the range.
+    The domain is less than four times the range, so a few rounds are expected per
+    index.
+    """
+
+    def __init__(self, size, key, rounds=4):
+        self.size = size
+        self.half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self.mask = (1 << self.half_bits) - 1
+        self.keys = [
+            int.from_bytes(hashlib.blake2b(f"{key}:{i}".encode(), digest_size=8).digest(), 'big')
+            for i in range(rounds)
+        ]
+
+    def _round(self, value, key):
+        value = (value * 0x9E3779B97F4A7C15 + key) & 0xFFFFFFFFFFFFFFFF
+        value ^= value >> 29
+        return value & self.mask
+
+    def __call__(self, index):
+        if not 0 <= index < self.size:
+            raise ValueError(f"Index {index} is outside of range({self.size}).")
+        value = index
+        while True:
+            left, right = value >> self.half_bits, value & self.mask
+            for key in self.keys:
+                left, right = right, left ^ self._round(right, key)
+            value = (left << self.half_bits) | right
+            if value < self.size:
+                return value
+
+
+class NumberBlock:
+    """
+    Numbers of one reserved block, usable once the reservation is committed.
+
+    A block reserved inside a transaction is also usable by that transaction while
+    its reservation stands, which is recorded by a `DocumentNumberReservation` row:
+    the row is only visible to the reserving connection, and is gone if the
+    transaction or a savepoint around the reservation is rolled back.
+    """
+
+    def __init__(self, numbers, reservation=None):
+        self.numbers = deque(numbers)
+        self.reservation = reservation
+        self.connection = transaction.get_connection() if reservation else None
+        self.committed = reservation is None
+
+    def commit(self):
+        from .models import DocumentNumberReservation
+
+        self.committed = True
+        DocumentNumberReservation.objects.filter(pk=self.reservation).delete()
+
+    def is_usable(self):
+        """
+        Whether the reservation is committed or still pending in the current
+        transaction. A block whose reservation was rolled back may be reserved
+        again by another process and must not be used.
+        """
+        from .models import DocumentNumberReservation
+
+        if self.committed:
+            return True
+        connection = transaction.get_connection()
+        return (connection is self.connection and connection.in_atomic_block
+                and DocumentNumberReservation.objects.filter(pk=self.reservation).exists())
+
+
+class DocumentNumberAllocator:
+    """
+    Hands out the numbers of a document model, set as a class attribute of the model:
+
+        numbers = DocumentNumberAllocator()
+
+    `kind` names the counter of the model, the model label by default. It also
+    keys the permutation, so it must never change once numbers are handed out.
+    """
+
+    def __init__(self, kind=None, first=FIRST_NUMBER, size=NUMBER_SPACE, block_size=None):
+        self.kind = kind
+        self.first = first
+        self.size = size
+        self.block_size = block_size
+        self.model = None
+        self.permutation = FeistelPermutation(size, kind) if kind else None
+        self.block = None
+        self.lock = threading.Lock()
+
+    def contribute_to_class(self, model, name):
+        self.model = model
+        if self.kind is None:
+            self.kind = model._meta.label_lower
+            self.permutation = FeistelPermutation(self.size, self.kind)
+        setattr(model, name, self)
+
+    def allocate(self):
+        """
+        Take an unused number.
+
+        Raises:
+            DocumentNumbersExhausted: If the number space is used up.
+        """
+        while True:
+            with self.lock:
+                if self.block is not None and self.block.numbers and self.block.is_usable():
+                    return self.block.numbers.popleft()
+            # Not under the lock: reserving may wait for the counter row locked by another process.
+            block = self.reserve()
+            if not block.numbers:
+                continue
+            with self.lock:
+                number = block.numbers.popleft()
+                if self.block is None or not self.block.numbers or not self.block.is_usable():
+                    self.block = block
+                return number
+
+    def reserve(self):
+        """Reserve the next block of indexes and map them to the numbers still free."""
+        from .models import DocumentNumberReservation, DocumentNumberSequence
+
+        block_size = self.block_size or settings.DOCUMENT_NUMBER_BLOCK_SIZE
+        # Outside a transaction the reservation is committed straight away.
+        in_transaction = transaction.get_connection().in_atomic_block
+        reservation = None
+        with transaction.atomic(savepoint=False):
+            start = DocumentNumberSequence.objects.reserve(self.kind, block_size)
+            if start >= self.size:
+                raise DocumentNumbersExhausted(f"No {self.kind} numbers are left.")
+            if in_transaction:
+                reservation = DocumentNumberReservation.objects.create(kind=self.kind, start=start).pk
+        numbers = [self.first + self.permutation(index) for index in range(start, min(start + block_size, self.size))]
+        if self.model is not None:
+            taken = set(self.model._base_manager.filter(pk__in=numbers).values_list('pk', flat=True))
+            numbers = [number for number in numbers if number not in taken]
+        block = NumberBlock(numbers, reservation)
+        if reservation:
+            transaction.on_commit(block.commit)
+        return block
@@ -0,0 +1,81 @@
+"""
+Size variants of the uploaded photos.
+
+Staff lists and the client documents show photos far smaller than they are
+uploaded, so next to each original `make_variants()` stores a JPEG downscaled to
+fit each box in `PHOTO_VARIANTS`: `photos/.../<name>.jpg` gets
+`photos/.../<name>.thumbnail.jpg` and `photos/.../<name>.preview.jpg`. The
+serializers return their URLs with `passports.serializers.PhotoVariantField`.
+
+Variants of a photo uploaded with a request are generated by the `make_photo_variants`
+job once the task is created, see `passports.views.submit_task`; until the job runs
+their URLs point at missing files. They are regenerated for the stored photos with the
+`generate_photo_variants` command.
+"""
+import io
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+def variant_path(path, variant):
+    """Storage path of the `variant` of the photo stored at `path`."""
+    root, extension = posixpath.splitext(path)
+    return f'{root}.{variant}.jpg'
+
+
+def variant_paths(path):
+    return [variant_path(path, variant) for variant in settings.PHOTO_VARIANTS]
+
+
+def variant_url(path, variant):
+    return default_storage.url(variant_path(path, variant))
+
+
+def render_variant(image, size):
+    """The image downscaled to fit `size`, encoded as JPEG."""
+    image = image.copy()
+    image.thumbnail(size, Image.Resampling.LANCZOS)
+    content = io.BytesIO()
+    image.save(content, 'JPEG', quality=settings.PHOTO_VARIANT_QUALITY, optimize=True, progressive=True)
+    return content.getvalue()
+
+
+def make_variants(path):
+    """
+    Generate every variant of the photo stored at `path`, replacing existing ones.
+
+    Returns:
+        list[str]: The storage paths of the variants.
+    """
+    with default_storage.open(path, 'rb') as file, Image.open(file) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # JPEG has no transparency, transparent areas become white.
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+
+    paths = []
+    for variant, size in settings.PHOTO_VARIANTS.items():
+        name = variant_path(path, variant)
+        # The storage doesn't overwrite, it saves under a new name if the file exists.
+        default_storage.delete(name)
+        saved = default_storage.save(name, ContentFile(render_variant(image, size)))
+        if saved != name:
+            # Another generation of the photo saved the variant in between; it is just as good.
+            default_storage.delete(saved)
+        paths.append(name)
+    return paths
+
+
+def delete_photo(path):
+    """Delete a photo and its variants from the default storage; missing files are skipped."""
+    for name in [path] + variant_paths(path):
+        default_storage.delete(name)
@@ -1,50 +1,51 @@
 import datetime
 
 from django_filters.rest_framework import DjangoFilterBackend
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.viewsets import ViewSet, ReadOnlyModelViewSet
-from rest_framework.pagination import PageNumberPagination
 
-from administration.models import Task
+from administration.models import Task, TaskArchive
+from administration.export import TaskExportMixin
 from administration.filters import TaskFilter
+from administration.pagination import TaskPagination
 from authentication.serializers import (
     ChangeUserDataSerializer,
     UserListSerializer
 )
+from .documents import documents_condition, get_documents
 from .models import Visa
 from .serializers import (
     AddressSerializer,
     PhotoSerializer,
-    RetrieveDocumentsSerializer,
-    RetrieveInternalPassportSerializer,
-    RetrieveForeignPassportSerializer,
     RestorePassportSerializer,
     VisaSerializer,
     CreateVisaSerializer,
     ExtendVisaSerializer
 )
-from .views import get_photo_path, get_address
+from .views import get_photo_path, get_address, submit_task
 from .permissions import IsClient
 from administration.serializers import TaskSerializer
 
 
-class CustomPagination(PageNumberPagination):
+class CustomPagination(TaskPagination):
     page_size = 6
     page_size_query_param = 'page_size'
     max_page_size = 100
 
 
+@method_decorator(documents_condition, name='get')
 class InternalPassportDetailAPIView(APIView):
     permission_classes = [IsClient]
 
     def get(self, request):
-        passport = request.user.passport
+        passport = get_documents(request)['internal_passport']
         if passport:
-            user_serializer = RetrieveInternalPassportSerializer(passport, context={'request': request})
-            return Response(user_serializer.data, status=status.HTTP_200_OK)
+            return Response(passport, status=status.HTTP_200_OK)
         else:
             return Response({"detail": "Internal passport not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -52,7 +53,7 @@ class InternalPassportDetailAPIView(APIView):
         user = request.user
         task_title = "create an internal passport"
 
-        if Task.objects.filter(user=user, title=task_title, status=0).exists():
+        if Task.objects.pending_duplicates(user=user, title=task_title).exists():
             return Response({"detail": "You have already sent a request for creating an internal passport."},
                             status=status.HTTP_400_BAD_REQUEST)
         if user.passport:
@@ -68,8 +69,9 @@ class InternalPassportDetailAPIView(APIView):
             adr, created = get_address(address_serializer.validated_data)
             photo = photo_serializer.validated_data.get('photo')
             photo_path = get_photo_path(photo, user, task_title)
-            user_data = {'photo': photo_path, 'address_id': adr.pk}
-            Task.objects.create(user=user, title=task_title, user_data=user_data)
+            if not submit_task(user, task_title, {'photo': photo_path}, address=adr):
+                return Response({"detail": "You have already sent a request for creating an internal passport."},
+                                status=status.HTTP_400_BAD_REQUEST)
             return Response({"detail": "Your request for creating an internal passport has been sent."},
                             status=status.HTTP_201_CREATED)
         else:
@@ -89,7 +91,7 @@ class InternalPassportDetailAPIView(APIView):
             task_reason = serializer.validated_data.get('reason')
             task_title = f"restore an internal passport due to {task_reason}"
 
-            if Task.objects.filter(user=user, title=task_title, status=0).exists():
+            if Task.objects.pending_duplicates(user=user, title=task_title).exists():
                 return Response({"detail": f"You have already sent a request for restoring an internal passport due to {task_reason}."},
                                 status=status.HTTP_400_BAD_REQUEST)
             if not user.passport:
@@ -98,21 +100,23 @@ class InternalPassportDetailAPIView(APIView):
 
             photo = serializer.validated_data.get('photo')
             photo_path = get_photo_path(photo, user, task_title)
-            Task.objects.create(user=user, title=task_title, user_data={'photo': photo_path})
+            if not submit_task(user, task_title, {'photo': photo_path}):
+                return Response({"detail": f"You have already sent a request for restoring an internal passport due to {task_reason}."},
+                                status=status.HTTP_400_BAD_REQUEST)
             return Response({"detail": f"Your request for restoring an internal passport due to {task_reason} has been sent."},
                             status=status.HTTP_200_OK)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@method_decorator(documents_condition, name='get')
 class ForeignPassportDetailAPIView(APIView):
     permission_classes = [IsClient]
 
     def get(self, request):
-        foreign_passport = request.user.foreign_passport
+        foreign_passport = get_documents(request)['foreign_passport']
         if foreign_passport:
-            user_serializer = RetrieveForeignPassportSerializer(foreign_passport, context={'request': request})
-            return Response(user_serializer.data, status=status.HTTP_200_OK)
+            return Response(foreign_passport, status=status.HTTP_200_OK)
         else:
             return Response({"detail": "You don`t have a foreign passport yet."}, status=status.HTTP_200_OK)
 
@@ -120,7 +124,7 @@ class ForeignPassportDetailAPIView(APIView):
         user = request.user
         task_title = "create a foreign passport"
 
-        if Task.objects.filter(user=user, title=task_title, status=0).exists():
+        if Task.objects.pending_duplicates(user=user, title=task_title).exists():
             return Response({"detail": "You have already sent a request for creating a foreign passport."},
                             status=status.HTTP_400_BAD_REQUEST)
         if user.foreign_passport:
@@ -134,7 +138,9 @@ class ForeignPassportDetailAPIView(APIView):
         if photo_serializer.is_valid():
             photo = photo_serializer.validated_data.get('photo')
             photo_path = get_photo_path(photo, user, task_title)
-            Task.objects.create(user=user, title=task_title, user_data={'photo': photo_path})
+            if not submit_task(user, task_title, {'photo': photo_path}):
+                return Response({"detail": "You have already sent a request for creating a foreign passport."},
+                                status=status.HTTP_400_BAD_REQUEST)
             return Response({"detail": "Your request for creating a foreign passport has been sent."},
                             status=status.HTTP_201_CREATED)
         else:
@@ -148,7 +154,7 @@ class ForeignPassportDetailAPIView(APIView):
             task_reason = serializer.validated_data.get('reason')
             task_title = f"restore a foreign passport due to {task_reason}"
 
-            if Task.objects.filter(user=user, title=task_title, status=0).exists():
+            if Task.objects.pending_duplicates(user=user, title=task_title).exists():
                 return Response({"detail": f"You have already sent a request for restoring a foreign passport due to {task_reason}."},
                                 status=status.HTTP_400_BAD_REQUEST)
             if not user.foreign_passport:
@@ -157,21 +163,24 @@ class ForeignPassportDetailAPIView(APIView):
 
             photo = serializer.validated_data.get('photo')
             photo_path = get_photo_path(photo, user, task_title)
-            Task.objects.create(user=user, title=task_title, user_data={'photo': photo_path})
+            if not submit_task(user, task_title, {'photo': photo_path}):
+                return Response({"detail": f"You have already sent a request for restoring a foreign passport due to {task_reason}."},
+                                status=status.HTTP_400_BAD_REQUEST)
             return Response({"detail": f"Your request for restoring a foreign passport due to {task_reason} has been sent."},
                             status=status.HTTP_200_OK)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@method_decorator(documents_condition, name='get')
 class GetDocumentsAPIView(APIView):
     permission_classes = [IsClient]
 
     def get(self, request):
-        user_serializer = RetrieveDocumentsSerializer(request.user, context={'request': request})
-        return Response(user_serializer.data, status=status.HTTP_200_OK)
+        return Response(get_documents(request), status=status.HTTP_200_OK)
 
 
+@method_decorator(documents_condition, name='get')
 class UserAddressAPIView(APIView):
     permission_classes = [IsClient]
 
@@ -186,7 +195,7 @@ class UserAddressAPIView(APIView):
     def patch(self, request):
         task_title = 'change registation address'
 
-        if Task.objects.filter(user=request.user, title=task_title, status=0).exists():
+        if Task.objects.pending_duplicates(user=request.user, title=task_title).exists():
             return Response({"detail": "You have already submitted a request to update your registration address."},
                             status=status.HTTP_400_BAD_REQUEST)
         if not request.user.passport:
@@ -197,7 +206,9 @@ class UserAddressAPIView(APIView):
 
         if address_serializer.is_valid():
             adr, created = get_address(address_serializer.validated_data)
-            Task.objects.create(user=request.user, title=task_title, user_data={'address_id': adr.pk})
+            if not submit_task(request.user, task_title, {}, address=adr):
+                return Response({"detail": "You have already submitted a request to update your registration address."},
+                                status=status.HTTP_400_BAD_REQUEST)
             return Response({"detail": "Your request to update the registration address has been submitted."},
                             status=status.HTTP_200_OK)
         else:
@@ -225,7 +236,7 @@ class UserDataAPIView(APIView):
         if is_user_valid and is_photo_valid:
             field = user_serializer.validated_data.get('field')
             task_title = f"change user {field}"
-            if Task.objects.filter(user=user, title=task_title, status=0).exists():
+            if Task.objects.pending_duplicates(user=user, title=task_title).exists():
                 return Response({"detail": f"You have already sent a request for changing the {field}."},
                                 status=status.HTTP_400_BAD_REQUEST)
 
@@ -233,7 +244,9 @@ class UserDataAPIView(APIView):
             photo = photo_serializer.validated_data.get('photo')
             photo_path = get_photo_path(photo, user, task_title)
             user_data = {'photo': photo_path, field: value}
-            Task.objects.create(user=user, title=task_title, user_data=user_data)
+            if not submit_task(user, task_title, user_data):
+                return Response({"detail": f"You have already sent a request for changing the {field}."},
+                                status=status.HTTP_400_BAD_REQUEST)
             return Response({"detail": f"Your request for changing the {field} has been sent."},
                             status=status.HTTP_200_OK)
         else:
@@ -245,11 +258,15 @@ class UserDataAPIView(APIView):
             return Response(errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@method_decorator(documents_condition, name='list')
+@method_decorator(documents_condition, name='retrieve')
 class VisaViewSet(ViewSet):
     permission_classes = [IsClient]
 
     def get_queryset(self, request):
-        return Visa.objects.filter(foreign_passport=request.user.foreign_passport, is_active=True).order_by('-is_active')
+        return Visa.objects.select_related('foreign_passport__user').filter(
+            foreign_passport=request.user.foreign_passport, is_active=True
+        ).order_by('-is_active')
 
     def list(self, request):
         serializer = VisaSerializer(self.get_queryset(request), many=True, context={'request': request})
@@ -272,13 +289,7 @@ class VisaViewSet(ViewSet):
             visa_type = serializer.validated_data.get('type')
             country = serializer.validated_data.get('country')
             entry_amount = serializer.validated_data.get('entry_amount')
-            check_task = Task.objects.filter(
-                user=user,
-                title=task_title,
-                status=0,
-                user_data__visa_country=country
-            )
-            if check_task.exists():
+            if Task.objects.pending_duplicates(user=user, title=task_title, visa_country=country).exists():
                 return Response(
                     {"detail": f"You have already sent a request for creating a visa of {country}."},
                     status=status.HTTP_400_BAD_REQUEST
@@ -297,8 +308,12 @@ class VisaViewSet(ViewSet):
                 )
             photo = serializer.validated_data.get('photo')
             photo_path = get_photo_path(photo, user, task_title, 'visas')
-            user_data = {'photo': photo_path, 'visa_country': country, 'visa_type': visa_type, 'visa_entry_amount': entry_amount}
-            Task.objects.create(user=user, title=task_title, user_data=user_data)
+            user_data = {'photo': photo_path, 'visa_type': visa_type, 'visa_entry_amount': entry_amount}
+            if not submit_task(user, task_title, user_data, visa_country=country):
+                return Response(
+                    {"detail": f"You have already sent a request for creating a visa of {country}."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             return Response({"detail": "Your request for creating a visa has been sent."},
                             status=status.HTTP_201_CREATED)
         else:
@@ -311,7 +326,7 @@ class VisaViewSet(ViewSet):
         if not visa.is_active:
             return Response({"detail": "Only an active visa can be extended."},
                             status=status.HTTP_400_BAD_REQUEST)
-        if Task.objects.filter(user=user, title=task_title, status=0, user_data__visa_id=pk).exists():
+        if Task.objects.pending_duplicates(user=user, title=task_title, visa=visa).exists():
             return Response({"detail": f"You have already sent a request for extending a visa of {visa.country}."},
                             status=status.HTTP_400_BAD_REQUEST)
 
@@ -324,8 +339,10 @@ class VisaViewSet(ViewSet):
                     {"detail": "The extension date must be greater than the expiration date."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            user_data = {'visa_id': pk, 'visa_extension_reason': reason, 'visa_extension_date': str(extension_date)}
-            Task.objects.create(user=user, title=task_title, user_data=user_data)
+            user_data = {'visa_extension_reason': reason, 'visa_extension_date': str(extension_date)}
+            if not submit_task(user, task_title, user_data, visa=visa):
+                return Response({"detail": f"You have already sent a request for extending a visa of {visa.country}."},
+                                status=status.HTTP_400_BAD_REQUEST)
             return Response({"detail": "Your request for extending a visa has been sent."},
                             status=status.HTTP_200_OK)
         else:
@@ -338,7 +355,7 @@ class VisaViewSet(ViewSet):
         if not visa.is_active:
             return Response({"detail": "Only an active visa can be restored."},
                             status=status.HTTP_400_BAD_REQUEST)
-        if Task.objects.filter(user=user, title=task_title, status=0, user_data__visa_id=pk).exists():
+        if Task.objects.pending_duplicates(user=user, title=task_title, visa=visa).exists():
             return Response({"detail": f"You have already sent a request for restoring a visa of {visa.country}."},
                             status=status.HTTP_400_BAD_REQUEST)
 
@@ -346,14 +363,16 @@ class VisaViewSet(ViewSet):
         if serializer.is_valid():
             photo = serializer.validated_data.get('photo')
             photo_path = get_photo_path(photo, user, task_title, 'visas')
-            Task.objects.create(user=user, title=task_title, user_data={'photo': photo_path, 'visa_id': pk})
+            if not submit_task(user, task_title, {'photo': photo_path}, visa=visa):
+                return Response({"detail": f"You have already sent a request for restoring a visa of {visa.country}."},
+                                status=status.HTTP_400_BAD_REQUEST)
             return Response({"detail": "Your request for restoring a visa due to loss has been sent."},
                             status=status.HTTP_200_OK)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TaskListForUserViewSet(ReadOnlyModelViewSet):
+class TaskListForUserViewSet(TaskExportMixin, ReadOnlyModelViewSet):
     queryset = Task.objects.all().order_by('status', '-created_at')
     serializer_class = TaskSerializer
     filter_backends = (DjangoFilterBackend,)
@@ -364,12 +383,22 @@ class TaskListForUserViewSet(ReadOnlyModelViewSet):
     def get_queryset(self):
         return Task.objects.filter(user=self.request.user).order_by('status', '-created_at')
 
-    def list(self, request, *args, **kwargs):
-        page = request.query_params.get('page')
-        if page == 'all':
-            queryset = self.filter_queryset(self.get_queryset())
-            count = len(queryset)
-            serializer = self.get_serializer(queryset, many=True)
-            return Response({'count': count, 'tasks': serializer.data})
-        else:
-            return super().list(request, *args, **kwargs)
+    def filter_queryset(self, queryset):
+        """Read the user's archived tasks through, so lists and exports show the full history."""
+        tasks = super().filter_queryset(queryset)
+        if self.action == 'retrieve':
+            return tasks
+        archived = TaskFilter(
+            self.request.query_params,
+            queryset=TaskArchive.objects.filter(user=self.request.user),
+            request=self.request
+        ).qs
+        return tasks.order_by().union(archived.order_by(), all=True).order_by('status', '-created_at')
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            task = get_object_or_404(TaskArchive, user=self.request.user, pk=self.kwargs['pk'])
+            self.check_object_permissions(self.request, task)
+            return task
@@ -1,6 +1,27 @@
 from rest_framework import serializers
 from authentication.models import CustomUser
 from .models import Address, Passport, ForeignPassport, Visa
+from .photos import variant_url
+
+
+class PhotoVariantField(serializers.ReadOnlyField):
+    """
+    URL of a variant of the photo in `source` (`photo` by default), a file field or a
+    storage path. Absolute with a request in the context, relative otherwise.
+    """
+
+    def __init__(self, variant, **kwargs):
+        self.variant = variant
+        kwargs.setdefault('source', 'photo')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        path = getattr(value, 'name', value)
+        if not path:
+            return None
+        url = variant_url(path, self.variant)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
 
 # Client Serializers
@@ -17,6 +38,8 @@ class PhotoSerializer(serializers.Serializer):
 
 class RetrieveInternalPassportSerializer(serializers.ModelSerializer):
     photo = serializers.SerializerMethodField()
+    photo_thumbnail = PhotoVariantField('thumbnail')
+    photo_preview = PhotoVariantField('preview')
     name = serializers.CharField(source='user.name')
     surname = serializers.CharField(source='user.surname')
     patronymic = serializers.CharField(source='user.patronymic')
@@ -32,19 +55,22 @@ class RetrieveInternalPassportSerializer(serializers.ModelSerializer):
         model = Passport
         fields = (
             'number', 'authority', 'date_of_issue', 'date_of_expiry',
-            'photo', 'name', 'surname', 'patronymic', 'sex', 'date_of_birth',
+            'photo', 'photo_thumbnail', 'photo_preview', 'name', 'surname', 'patronymic', 'sex', 'date_of_birth',
             'record_number', 'place_of_birth', 'nationality', 'registration_address'
         )
 
     def get_photo(self, obj):
+        # Without a request the URL is left relative, as the document cache stores it.
         request = self.context.get('request')
-        if obj.photo and request:
-            return request.build_absolute_uri(obj.photo.url)
+        if obj.photo:
+            return request.build_absolute_uri(obj.photo.url) if request else obj.photo.url
         return None
 
 
 class RetrieveForeignPassportSerializer(serializers.ModelSerializer):
     photo = serializers.SerializerMethodField()
+    photo_thumbnail = PhotoVariantField('thumbnail')
+    photo_preview = PhotoVariantField('preview')
 
     name = serializers.CharField(source='user.name')
     surname = serializers.CharField(source='user.surname')
@@ -60,14 +86,15 @@ class RetrieveForeignPassportSerializer(serializers.ModelSerializer):
         model = ForeignPassport
         fields = (
             'number', 'authority', 'date_of_issue', 'date_of_expiry',
-            'photo', 'name', 'surname', 'patronymic', 'sex', 'date_of_birth',
+            'photo', 'photo_thumbnail', 'photo_preview', 'name', 'surname', 'patronymic', 'sex', 'date_of_birth',
             'record_number', 'place_of_birth', 'nationality', 'country_code'
         )
 
     def get_photo(self, obj):
+        # Without a request the URL is left relative, as the document cache stores it.
         request = self.context.get('request')
-        if obj.photo and request:
-            return request.build_absolute_uri(obj.photo.url)
+        if obj.photo:
+            return request.build_absolute_uri(obj.photo.url) if request else obj.photo.url
         return None
 
 
@@ -108,6 +135,8 @@ class RestoreVisaSerializer(serializers.ModelSerializer):
 
 
 class VisaSerializer(serializers.ModelSerializer):
+    photo_thumbnail = PhotoVariantField('thumbnail')
+    photo_preview = PhotoVariantField('preview')
     name = serializers.CharField(source='foreign_passport.user.name', required=False)
     surname = serializers.CharField(source='foreign_passport.user.surname', required=False)
     sex = serializers.CharField(source='foreign_passport.user.sex', required=False)
@@ -131,6 +160,8 @@ class VisaSerializer(serializers.ModelSerializer):
 
 # Admin Serializers
 class CreateInternalPassportSerializer(serializers.ModelSerializer):
+    photo_thumbnail = PhotoVariantField('thumbnail')
+    photo_preview = PhotoVariantField('preview')
 
     class Meta:
         model = Passport
@@ -145,6 +176,8 @@ class CreateInternalPassportSerializer(serializers.ModelSerializer):
 
 
 class CreateForeignPassportSerializer(serializers.ModelSerializer):
+    photo_thumbnail = PhotoVariantField('thumbnail')
+    photo_preview = PhotoVariantField('preview')
 
     class Meta:
         model = ForeignPassport
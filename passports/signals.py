@@ -0,0 +1,56 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from authentication.authentication import token_cache
+from authentication.models import CustomUser
+from . import documents
+from .models import Address, ForeignPassport, Passport, Visa
+
+
+def touch(users):
+    """Increment the documents version of the users."""
+    return users.update(documents_version=F('documents_version') + 1, documents_modified_at=timezone.now())
+
+
+def touch_documents(users):
+    """Increment the documents version of the users and drop their cached documents."""
+    user_pks = list(users.values_list('pk', flat=True))
+    if user_pks:
+        touch(CustomUser.objects.filter(pk__in=user_pks))
+        documents.invalidate(user_pks)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_documents(sender, instance, **kwargs):
+    # `CustomUser.save()` increments the version itself.
+    documents.invalidate([instance.pk])
+
+
+@receiver(post_save, sender=Passport)
+@receiver(pre_delete, sender=Passport)
+@receiver(post_save, sender=ForeignPassport)
+@receiver(pre_delete, sender=ForeignPassport)
+@receiver(post_save, sender=Address)
+@receiver(pre_delete, sender=Address)
+def touch_holder_documents(sender, instance, created=False, **kwargs):
+    """
+    Touch the users of a changed document or address. A new one has no users yet;
+    the users of a deleted one are read before the deletion clears their reference
+    with an UPDATE that sends no signal.
+    """
+    if created:
+        return
+    field = {Passport: 'passport', ForeignPassport: 'foreign_passport', Address: 'address'}[sender]
+    touch_documents(CustomUser.objects.filter(**{field: instance}))
+
+
+@receiver(post_save, sender=Visa)
+@receiver(pre_delete, sender=Visa)
+def touch_visa_holder_documents(sender, instance, **kwargs):
+    """Visas aren't in the cached bundle, only the version of their holder changes."""
+    number = instance.foreign_passport_id
+    if touch(CustomUser.objects.filter(foreign_passport=number)):
+        token_cache.forget_where(lambda user: user.foreign_passport_id == number)
@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from authentication.factories import CustomUserFactory
+from passports.factories import AddressFactory, PassportFactory, ForeignPassportFactory, VisaFactory
+
+PATHS = ("/api/my-documents/", "/api/my-documents/internal-passport/", "/api/my-documents/foreign-passport/",
+         "/api/my-documents/address/", "/api/my-documents/visas/")
+
+
+class DocumentETagTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        foreign_passport = ForeignPassportFactory(photo='')
+        self.visa = VisaFactory(foreign_passport=foreign_passport, photo='')
+        self.user = CustomUserFactory(email="test@test.com", address=AddressFactory(),
+                                      passport=PassportFactory(photo=''), foreign_passport=foreign_passport)
+        self.authenticate()
+
+    def authenticate(self):
+        self.user.refresh_from_db()
+        self.client.force_authenticate(self.user)
+
+    def get(self, path, **headers):
+        return self.client.get(path, headers=headers)
+
+    def test_repeat_visit_not_modified(self):
+        for path in PATHS + (f"/api/my-documents/visas/{self.visa.pk}/",):
+            response = self.get(path)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etag = response.headers['ETag']
+            self.assertEqual(etag, f'W/"{self.user.pk}-{self.user.documents_version}"')
+            self.assertEqual(response.headers['Last-Modified'], http_date(self.user.documents_modified_at.timestamp()))
+
+            with mock.patch('passports.rest_views.get_documents') as get_documents, self.assertNumQueries(0):
+                response = self.get(path, if_none_match=etag)
+            get_documents.assert_not_called()
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response.content, b'')
+
+    def test_if_modified_since(self):
+        response = self.get("/api/my-documents/")
+        response = self.get("/api/my-documents/", if_modified_since=response.headers['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_account_change_keeps_version(self):
+        etag = self.get("/api/my-documents/").headers['ETag']
+        self.user.set_password("Test1234")
+        self.user.save(update_fields=['password'])
+        self.authenticate()
+        self.assertEqual(self.get("/api/my-documents/", if_none_match=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def assertChanged(self, etag, path="/api/my-documents/"):
+        self.authenticate()
+        response = self.get(path, if_none_match=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        return response
+
+    def test_user_change(self):
+        etag = self.get("/api/my-documents/").headers['ETag']
+        self.user.name = "Kate"
+        self.user.save(update_fields=['name'])
+        self.assertEqual(self.assertChanged(etag).json()['internal_passport']['name'], "Kate")
+
+    def test_document_changes(self):
+        for document in (self.user.passport, self.user.foreign_passport, self.user.address, self.visa):
+            etag = self.get("/api/my-documents/visas/").headers['ETag']
+            document.save()
+            self.assertChanged(etag, "/api/my-documents/visas/")
+
+    def test_bulk_address_approval(self):
+        etag = self.get("/api/my-documents/address/").headers['ETag']
+        address = AddressFactory()
+        task = TaskFactory(user=self.user, title="change registation address", status=0, address=address)
+        self.client.force_authenticate(CustomUserFactory(email="admin@test.com", address=None, passport=None,
+                                                         foreign_passport=None, is_staff=True))
+        response = self.client.patch("/api/staff/bulk-change-address/", {"ids": [task.pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.assertChanged(etag, "/api/my-documents/address/").json()['id'], address.pk)
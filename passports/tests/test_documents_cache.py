@@ -0,0 +1,115 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from authentication.factories import CustomUserFactory
+from passports.factories import AddressFactory, PassportFactory, ForeignPassportFactory
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class DocumentsCacheTests(APITestCase):
+    path = "/api/my-documents/"
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUserFactory(
+            email="test@test.com",
+            address=AddressFactory(),
+            passport=PassportFactory(photo='photos/passport.jpg'),
+            foreign_passport=ForeignPassportFactory(photo=''),
+        )
+        self.admin = CustomUserFactory(email="admin@test.com", address=None, passport=None, foreign_passport=None,
+                                       is_staff=True)
+        self.client.force_authenticate(self.user)
+
+    def get_documents(self, path=None):
+        response = self.client.get(path or self.path)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_second_read_is_served_from_cache(self):
+        hits = sample('documents_cache_requests_total', result='hit')
+        misses = sample('documents_cache_requests_total', result='miss')
+        documents = self.get_documents()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_documents(), documents)
+            self.assertEqual(self.get_documents("/api/my-documents/internal-passport/"), documents['internal_passport'])
+            self.assertEqual(self.get_documents("/api/my-documents/foreign-passport/"), documents['foreign_passport'])
+        self.assertEqual(sample('documents_cache_requests_total', result='miss'), misses + 1)
+        self.assertEqual(sample('documents_cache_requests_total', result='hit'), hits + 3)
+        self.assertGreater(sample('documents_cache_hit_ratio'), 0)
+
+    def test_photo_url_is_absolute_per_request(self):
+        self.get_documents()
+        documents = self.get_documents()
+        self.assertEqual(documents['internal_passport']['photo'], "http://testserver/media/photos/passport.jpg")
+        self.assertIsNone(documents['foreign_passport']['photo'])
+
+    def test_user_save_invalidates(self):
+        self.get_documents()
+        self.user.name = "Kate"
+        self.user.save(update_fields=['name'])
+        self.assertEqual(self.get_documents()['internal_passport']['name'], "Kate")
+
+    def test_passport_save_invalidates(self):
+        self.get_documents()
+        self.user.passport.authority = 1234
+        self.user.passport.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.get_documents()['internal_passport']['authority'], 1234)
+
+    def test_address_save_invalidates(self):
+        self.get_documents()
+        self.user.address.street = "Zoryana 5"
+        self.user.address.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.get_documents()['internal_passport']['registration_address']['street'], "Zoryana 5")
+
+    def test_passport_delete_invalidates(self):
+        self.get_documents()
+        self.user.foreign_passport.delete()
+        self.user.refresh_from_db()
+        self.assertIsNone(self.get_documents()['foreign_passport'])
+
+    def test_change_invalidated_in_another_process(self):
+        self.get_documents()
+        # The bundle stays cached in this process, another one handled the change.
+        with patch('passports.documents.invalidate'):
+            self.user.passport.authority = 1234
+            self.user.passport.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.get_documents()['internal_passport']['authority'], 1234)
+
+    def test_approval_invalidates(self):
+        old_number = self.get_documents()['foreign_passport']['number']
+        task = TaskFactory(user=self.user, title="restore a foreign passport due to loss", status=0,
+                           user_data={'photo': 'photo.jpg'})
+        self.client.force_authenticate(self.admin)
+        response = self.client.put(f"/api/staff/restore-foreign-passport/{task.pk}/", {
+            "authority": 6666, "date_of_issue": str(self.user.passport.date_of_issue),
+            "date_of_expiry": str(self.user.passport.date_of_expiry)
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.content)
+
+        self.user.refresh_from_db()
+        self.client.force_authenticate(self.user)
+        self.assertNotEqual(self.get_documents()['foreign_passport']['number'], old_number)
+
+    def test_bulk_address_approval_invalidates(self):
+        self.get_documents()
+        address = AddressFactory()
+        task = TaskFactory(user=self.user, title="change registation address", status=0, address=address)
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch("/api/staff/bulk-change-address/", {"ids": [task.pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.refresh_from_db()
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.get_documents()['internal_passport']['registration_address']['id'], address.pk)
@@ -1,17 +1,19 @@
 import os
 from io import BytesIO
 
-from unittest.mock import ANY
+from unittest.mock import ANY, patch
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
+from django.core.cache import cache
 from rest_framework import status
 from rest_framework.test import APITestCase
 from PIL import Image
 
 from administration.factories import TaskFactory
+from administration.models import Task, TaskQuerySet
 from authentication.factories import CustomUserFactory
 from passports.utils import COUNTRY_CHOICES_DICT
-from passports.factories import PassportFactory, ForeignPassportFactory
+from passports.factories import PassportFactory, ForeignPassportFactory, TEST_IMAGES_DIR
 
 
 class ForeignPassportGetAPITests(APITestCase):
@@ -25,6 +27,7 @@ class ForeignPassportGetAPITests(APITestCase):
     - Permission checks for admin users attempting to access foreign passport data
     """
     def setUp(self):
+        cache.clear()
         self.path = "/api/my-documents/foreign-passport/"
 
         self.user = CustomUserFactory(
@@ -63,6 +66,8 @@ class ForeignPassportGetAPITests(APITestCase):
             "date_of_issue": str(self.user.foreign_passport.date_of_issue),
             "date_of_expiry": str(self.user.foreign_passport.date_of_expiry),
             "photo": ANY,
+            "photo_thumbnail": ANY,
+            "photo_preview": ANY,
             "name": self.user.name,
             "surname": self.user.surname,
             "patronymic": self.user.patronymic,
@@ -131,6 +136,7 @@ class ForeignPassportCreateAPITests(APITestCase):
     - Request without any data
     - Request from a user without an internal passport
     - Request when a creation task is already stored
+    - Request when a creation task is stored concurrently
     - Request from a user who already has a foreign passport
     - Request by an unauthenticated user
     - Request by an admin user who should be forbidden from creating a foreign passport
@@ -162,6 +168,9 @@ class ForeignPassportCreateAPITests(APITestCase):
         )
         self.client.force_authenticate(self.user_without_foreign_passport)
 
+    def stored_files(self):
+        return {os.path.join(root, name) for root, _, files in os.walk(settings.MEDIA_ROOT) for name in files}
+
     def test_create_foreign_passport_successful(self):
         """
         Test successful creation of a foreign passport.
@@ -238,6 +247,32 @@ class ForeignPassportCreateAPITests(APITestCase):
             response.json()
         )
 
+    def test_create_foreign_passport_task_stored_concurrently(self):
+        """
+        Test creation request when a creation task is stored after the duplicate check.
+
+        Verifies that the insert rejected by the pending-task constraint gives the same error
+        message and that the uploaded photo is removed.
+        """
+        TaskFactory(
+            user=self.user_without_foreign_passport,
+            title='create a foreign passport',
+            status=0
+        )
+        image = Image.new('RGB', (100, 100), color='red')
+        test_image = BytesIO()
+        image.save(test_image, format='JPEG')
+        valid_photo = SimpleUploadedFile('create_fp.jpg', test_image.getvalue(), content_type='image/jpg')
+        stored_files = self.stored_files()
+        with patch.object(TaskQuerySet, 'pending_duplicates', side_effect=[Task.objects.none(), Task.objects.all()]):
+            response = self.client.post(path=self.path, data={'photo': valid_photo}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            {"detail": "You have already sent a request for creating a foreign passport."},
+            response.json()
+        )
+        self.assertEqual(self.stored_files(), stored_files)
+
     def test_create_foreign_passport_already_stored(self):
         """
         Test creation request for a user who already has a foreign passport.
@@ -300,7 +335,7 @@ class ForeignPassportRestoreAPITests(APITestCase):
             is_staff=True
         )
         self.client.force_authenticate(self.user)
-        self.image_path = os.path.join(settings.MEDIA_ROOT, 'tests/create_fp.jpg')
+        self.image_path = os.path.join(TEST_IMAGES_DIR, 'create_fp.jpg')
         self.loss_reason = "loss"
         self.expiry_reason = "expiry"
 
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from rest_framework import status
 from rest_framework.test import APITestCase
 from unittest.mock import ANY
@@ -9,6 +10,7 @@ from passports.factories import AddressFactory, PassportFactory, ForeignPassport
 
 class GetDocumentsAPITests(APITestCase):
     def setUp(self):
+        cache.clear()
         self.path = "/api/my-documents/"
 
         address = AddressFactory(
@@ -41,6 +43,8 @@ class GetDocumentsAPITests(APITestCase):
             "date_of_issue": str(self.user.passport.date_of_issue),
             "date_of_expiry": str(self.user.passport.date_of_expiry),
             "photo": ANY,
+            "photo_thumbnail": ANY,
+            "photo_preview": ANY,
             "name": self.user.name,
             "surname": self.user.surname,
             "patronymic": self.user.patronymic,
@@ -65,6 +69,8 @@ class GetDocumentsAPITests(APITestCase):
             "date_of_issue": str(self.user.foreign_passport.date_of_issue),
             "date_of_expiry": str(self.user.foreign_passport.date_of_expiry),
             "photo": ANY,
+            "photo_thumbnail": ANY,
+            "photo_preview": ANY,
             "name": self.user.name,
             "surname": self.user.surname,
             "patronymic": self.user.patronymic,
@@ -1,7 +1,7 @@
 import os
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.conf import settings
 
+from django.core.cache import cache
 from rest_framework import status
 from rest_framework.test import APITestCase
 from unittest.mock import ANY
@@ -9,11 +9,12 @@ from unittest.mock import ANY
 from administration.factories import TaskFactory
 from authentication.factories import CustomUserFactory
 from passports.utils import COUNTRY_CHOICES_DICT
-from passports.factories import AddressFactory, PassportFactory
+from passports.factories import AddressFactory, PassportFactory, TEST_IMAGES_DIR
 
 
 class InternalPassportDetailAPITests(APITestCase):
     def setUp(self):
+        cache.clear()
         self.path = "/api/my-documents/internal-passport/"
 
         address = AddressFactory(
@@ -53,7 +54,7 @@ class InternalPassportDetailAPITests(APITestCase):
             "apartments": "11",
             "post_code": 61070
         }
-        self.image_path = os.path.join(settings.MEDIA_ROOT, 'tests/create_ip.png')
+        self.image_path = os.path.join(TEST_IMAGES_DIR, 'create_ip.png')
         self.loss_reason = "loss"
         self.expiry_reason = "expiry"
 
@@ -68,6 +69,8 @@ class InternalPassportDetailAPITests(APITestCase):
             "date_of_issue": str(self.user.passport.date_of_issue),
             "date_of_expiry": str(self.user.passport.date_of_expiry),
             "photo": ANY,
+            "photo_thumbnail": ANY,
+            "photo_preview": ANY,
             "name": self.user.name,
             "surname": self.user.surname,
             "patronymic": self.user.patronymic,
@@ -0,0 +1,98 @@
+from unittest.mock import patch
+
+from django.db import transaction
+from django.test import TestCase
+
+from passports.factories import PassportFactory, VisaFactory
+from passports.models import DocumentNumberReservation, Passport
+from passports.numbers import DocumentNumberAllocator, DocumentNumbersExhausted, FeistelPermutation
+from validation.validate_number import validate_number
+
+
+class FeistelPermutationTests(TestCase):
+    def test_bijection(self):
+        for size in (1, 2, 7, 1000, 4097):
+            permutation = FeistelPermutation(size, 'test')
+            self.assertEqual(sorted(map(permutation, range(size))), list(range(size)))
+
+    def test_keyed(self):
+        self.assertNotEqual([FeistelPermutation(1000, 'a')(i) for i in range(10)],
+                            [FeistelPermutation(1000, 'b')(i) for i in range(10)])
+
+
+class DocumentNumberAllocatorTests(TestCase):
+    def allocator(self, size=10000, block_size=64):
+        allocator = DocumentNumberAllocator('test', first=10000001, size=size, block_size=block_size)
+        allocator.model = Passport
+        return allocator
+
+    def test_fills_number_space(self):
+        # Four processes sharing the counter take 90% of the space.
+        workers = [self.allocator() for _ in range(4)]
+        numbers = [workers[i % 4].allocate() for i in range(9000)]
+        self.assertEqual(len(set(numbers)), 9000)
+        self.assertTrue(all(10000001 <= number < 10010001 for number in numbers))
+        consecutive = sum(b - a == 1 for a, b in zip(numbers, numbers[1:]))
+        self.assertLess(consecutive, 100)
+
+    def test_exhausted(self):
+        allocator = self.allocator(size=10, block_size=4)
+        self.assertEqual(len({allocator.allocate() for _ in range(10)}), 10)
+        with self.assertRaises(DocumentNumbersExhausted):
+            allocator.allocate()
+
+    def test_skips_taken_numbers(self):
+        allocator = self.allocator(size=10, block_size=10)
+        taken = 10000001 + allocator.permutation(0)
+        PassportFactory(number=taken, photo='')
+        numbers = {allocator.allocate() for _ in range(9)}
+        self.assertNotIn(taken, numbers)
+        with self.assertRaises(DocumentNumbersExhausted):
+            allocator.allocate()
+
+    def test_rolled_back_block_is_not_reused(self):
+        allocator, other = self.allocator(), self.allocator()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            first = allocator.allocate()
+            raise RuntimeError
+        self.assertFalse(DocumentNumberReservation.objects.exists())
+        # The reservation was undone, so another process may take the same block.
+        self.assertEqual(other.allocate(), first)
+        self.assertNotEqual(allocator.allocate(), first)
+
+    def test_committed_block_is_kept(self):
+        allocator = self.allocator()
+        with self.captureOnCommitCallbacks(execute=True):
+            allocator.allocate()
+        block = allocator.block
+        self.assertTrue(block.committed)
+        self.assertFalse(DocumentNumberReservation.objects.exists())
+        allocator.allocate()
+        self.assertIs(allocator.block, block)
+
+    def test_block_pending_in_another_transaction(self):
+        allocator = self.allocator()
+        allocator.allocate()
+        block = allocator.block
+        with patch('passports.numbers.transaction.get_connection', return_value=object()):
+            self.assertFalse(block.is_usable())
+        self.assertTrue(block.is_usable())
+
+    def test_reserves_without_lock(self):
+        allocator = self.allocator()
+        reserve = allocator.reserve
+
+        def reserve_unlocked():
+            self.assertFalse(allocator.lock.locked())
+            return reserve()
+
+        with patch.object(allocator, 'reserve', side_effect=reserve_unlocked) as mock:
+            allocator.allocate()
+        mock.assert_called_once()
+
+    def test_documents_get_valid_numbers(self):
+        visas = [VisaFactory(photo='', foreign_passport__photo='') for _ in range(5)]
+        passports = [PassportFactory(photo='') for _ in range(5)]
+        self.assertEqual(len({passport.number for passport in passports}), 5)
+        for document in visas + passports:
+            validate_number(document.number)
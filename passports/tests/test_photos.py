@@ -0,0 +1,199 @@
+import functools
+import multiprocessing
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from administration.factories import TaskFactory
+from administration.jobs import enqueue, run_due
+from administration.models import Job, Task
+from authentication.factories import CustomUserFactory
+from passports.factories import PassportFactory, ForeignPassportFactory, VisaFactory
+from passports.photos import delete_photo, make_variants, variant_path
+from passports.views import submit_task
+
+
+def image_content(size=(1200, 1600), mode='RGB', format='JPEG'):
+    content = BytesIO()
+    Image.new(mode, size, color='red').save(content, format=format)
+    return content.getvalue()
+
+
+def save_image(name, **kwargs):
+    return default_storage.save(name, ContentFile(image_content(**kwargs)))
+
+
+@override_settings(PHOTO_VARIANTS={'thumbnail': (160, 200), 'preview': (640, 800)})
+class PhotoVariantsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def assertVariants(self, path, exist=True):
+        for variant in ('thumbnail', 'preview'):
+            self.assertEqual(default_storage.exists(variant_path(path, variant)), exist)
+
+    def test_make_variants(self):
+        path = save_image('photos/photo.png', mode='RGBA', format='PNG')
+        self.assertEqual(make_variants(path), ['photos/photo.thumbnail.jpg', 'photos/photo.preview.jpg'])
+        for name, size in (('photos/photo.thumbnail.jpg', (150, 200)), ('photos/photo.preview.jpg', (600, 800))):
+            with default_storage.open(name) as file, Image.open(file) as image:
+                self.assertEqual((image.format, image.mode, image.size), ('JPEG', 'RGB', size))
+        with default_storage.open(path) as file, Image.open(file) as image:
+            self.assertEqual(image.size, (1200, 1600))
+
+    def test_small_photo_isnt_enlarged(self):
+        path = save_image('photos/small.jpg', size=(100, 120))
+        make_variants(path)
+        with default_storage.open('photos/small.preview.jpg') as file, Image.open(file) as image:
+            self.assertEqual(image.size, (100, 120))
+
+    def test_regenerate_replaces_variants(self):
+        path = save_image('photos/photo.jpg')
+        self.assertEqual(make_variants(path), make_variants(path))
+        self.assertEqual(sorted(default_storage.listdir('photos')[1]),
+                         ['photo.jpg', 'photo.preview.jpg', 'photo.thumbnail.jpg'])
+
+    def test_variant_saved_in_between(self):
+        path = save_image('photos/photo.jpg')
+        delete = default_storage.delete
+
+        def save_other_variant(name):
+            delete(name)
+            if name == 'photos/photo.thumbnail.jpg':
+                # Another generation of the photo saves the variant after this one deleted it.
+                save_image(name, size=(160, 200))
+
+        with patch.object(default_storage, 'delete', side_effect=save_other_variant):
+            self.assertEqual(make_variants(path), ['photos/photo.thumbnail.jpg', 'photos/photo.preview.jpg'])
+        self.assertEqual(sorted(default_storage.listdir('photos')[1]),
+                         ['photo.jpg', 'photo.preview.jpg', 'photo.thumbnail.jpg'])
+
+    def test_broken_upload_is_kept(self):
+        path = default_storage.save('photos/broken.jpg', ContentFile(b'not an image'))
+        enqueue('make_photo_variants', paths=[path])
+        with self.assertLogs('administration.jobs', 'WARNING'):
+            self.assertEqual(run_due('worker'), 1)
+        self.assertIn('UnidentifiedImageError', Job.objects.get().last_error)
+        self.assertTrue(default_storage.exists(path))
+
+    def test_deleted_upload_is_skipped(self):
+        enqueue('make_photo_variants', paths=['photos/missing.jpg'])
+        self.assertEqual(run_due('worker'), 1)
+        self.assertFalse(Job.objects.exists())
+
+    def test_upload_generates_variants(self):
+        user = CustomUserFactory(email="test@test.com", passport=PassportFactory(photo=''), foreign_passport=None)
+        self.client.force_authenticate(user)
+        photo = SimpleUploadedFile('photo.jpg', image_content(), content_type='image/jpeg')
+        response = self.client.post("/api/my-documents/foreign-passport/", {'photo': photo}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        path = Task.objects.get(user=user).user_data['photo']
+        # The variants are generated by a job, not in the request.
+        self.assertVariants(path, exist=False)
+        self.assertEqual(run_due('worker'), 1)
+        self.assertVariants(path)
+
+        self.client.force_authenticate(CustomUserFactory(email="admin@test.com", address=None, passport=None,
+                                                         foreign_passport=None, is_staff=True))
+        user_data = self.client.get("/api/staff/tasks/").json()['results'][0]['user_data']
+        self.assertEqual(user_data['new_photo_thumbnail'],
+                         'http://testserver/media/' + variant_path(path, 'thumbnail'))
+        self.assertEqual(user_data['new_photo_preview'], 'http://testserver/media/' + variant_path(path, 'preview'))
+
+    def test_document_variant_urls(self):
+        user = CustomUserFactory(email="test@test.com", passport=PassportFactory(photo='photos/passport.jpg'),
+                                 foreign_passport=ForeignPassportFactory(photo=''))
+        self.client.force_authenticate(user)
+        for _ in range(2):
+            documents = self.client.get("/api/my-documents/").json()
+            self.assertEqual(documents['internal_passport']['photo_thumbnail'],
+                             'http://testserver/media/photos/passport.thumbnail.jpg')
+            self.assertEqual(documents['internal_passport']['photo_preview'],
+                             'http://testserver/media/photos/passport.preview.jpg')
+            self.assertIsNone(documents['foreign_passport']['photo_thumbnail'])
+
+    def test_delete_photo(self):
+        path = save_image('photos/photo.jpg')
+        make_variants(path)
+        delete_photo(path)
+        self.assertFalse(default_storage.exists(path))
+        self.assertVariants(path, exist=False)
+        # Missing files are skipped.
+        delete_photo(path)
+
+    def test_duplicate_request_deletes_variants(self):
+        user = CustomUserFactory(passport=None, foreign_passport=None)
+        submit_task(user, "create a foreign passport", {})
+        path = save_image('photos/photo.jpg')
+        make_variants(path)
+        self.assertIsNone(submit_task(user, "create a foreign passport", {'photo': path}))
+        self.assertFalse(default_storage.exists(path))
+        self.assertVariants(path, exist=False)
+        self.assertFalse(Job.objects.exists())
+
+    def test_task_is_created_with_its_variants_job(self):
+        user = CustomUserFactory(passport=None, foreign_passport=None)
+        path = save_image('photos/photo.jpg')
+        with patch('passports.views.enqueue', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            submit_task(user, "create a foreign passport", {'photo': path})
+        self.assertFalse(Task.objects.exists())
+
+        task = submit_task(user, "create a foreign passport", {'photo': path})
+        self.assertEqual(Job.objects.get().payload, {'paths': [task.user_data['photo']]})
+
+    def test_delete_files_job_deletes_variants(self):
+        path = save_image('photos/photo.jpg')
+        make_variants(path)
+        enqueue('delete_files', paths=[path])
+        self.assertEqual(run_due('worker'), 1)
+        self.assertVariants(path, exist=False)
+
+    def test_generate_photo_variants(self):
+        foreign_passport = ForeignPassportFactory(photo=save_image('photos/foreign.jpg'))
+        visa = VisaFactory(foreign_passport=foreign_passport, photo=save_image('photos/visa.jpg'))
+        passport = PassportFactory(photo=save_image('photos/passport.jpg'))
+        user = CustomUserFactory(passport=passport, foreign_passport=foreign_passport)
+        task = TaskFactory(user=user, title="change user name", user_data={'photo': save_image('photos/task.jpg')})
+        TaskFactory(user=user, title="change user surname", user_data={'surname': 'Surname'})
+        broken = PassportFactory(photo=default_storage.save('photos/broken.jpg', ContentFile(b'not an image')))
+        PassportFactory(photo='photos/missing.jpg')
+
+        out, err = StringIO(), StringIO()
+        call_command('generate_photo_variants', workers=2, stdout=out, stderr=err)
+        self.assertRegex(out.getvalue(), r'^Generated variants of 4 photo\(s\), 1 failed, in [\d.]+s\.\n$')
+        self.assertIn(f'{broken.photo.name}: ', err.getvalue())
+        for path in (foreign_passport.photo.name, visa.photo.name, passport.photo.name, task.user_data['photo']):
+            self.assertVariants(path)
+
+        out = StringIO()
+        call_command('generate_photo_variants', '--missing', workers=2, stdout=out, stderr=StringIO())
+        self.assertRegex(out.getvalue(), r'^Generated variants of 0 photo\(s\), 1 failed')
+
+    def test_generate_photo_variants_in_spawned_workers(self):
+        # A name missing from the project's media, where the worker looks for it.
+        PassportFactory(photo=save_image(f'photos/{uuid.uuid4().hex}.jpg'))
+        spawn = functools.partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context('spawn'))
+        out, err = StringIO(), StringIO()
+        with patch('passports.management.commands.generate_photo_variants.ProcessPoolExecutor', spawn):
+            call_command('generate_photo_variants', workers=1, stdout=out, stderr=err)
+        # The worker set up Django, but with the settings of the project, not of the test.
+        self.assertRegex(out.getvalue(), r'^Generated variants of 0 photo\(s\), 1 failed')
+        self.assertIn('FileNotFoundError', err.getvalue())
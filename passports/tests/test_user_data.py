@@ -1,14 +1,13 @@
 import os
 
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.conf import settings
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from administration.factories import TaskFactory
 from authentication.factories import CustomUserFactory
 from unittest.mock import ANY
-from passports.factories import AddressFactory, PassportFactory, ForeignPassportFactory
+from passports.factories import AddressFactory, PassportFactory, ForeignPassportFactory, TEST_IMAGES_DIR
 
 
 class UserDataAPITests(APITestCase):
@@ -57,7 +56,7 @@ class UserDataAPITests(APITestCase):
             "nationality": self.user.nationality,
             "is_staff": self.user.is_staff
         }
-        self.image_path = os.path.join(settings.MEDIA_ROOT, 'tests/change_userdata.jpg')
+        self.image_path = os.path.join(TEST_IMAGES_DIR, 'change_userdata.jpg')
 
     # GET METHOD
     def test_get_user_data_full_data(self):
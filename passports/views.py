@@ -3,13 +3,16 @@ import uuid
 
 from django.contrib import messages
 from django.core.files.storage import default_storage
+from django.db import transaction
 from django.shortcuts import render, redirect
 
+from administration.jobs import enqueue
 from administration.models import Task
 from authentication.forms import UpdateUserNameForm, UpdateUserSurnameForm, UpdateUserPatronymicForm
 from passport_service.decorators import client_login_required
 from .forms import AddressForm, PhotoForm
 from .models import Address
+from .photos import delete_photo
 
 
 def main_page(request):
@@ -23,7 +26,8 @@ def get_documents(request):
 
 def get_photo_path(photo, user, task_title, folder='passports'):
     """
-    Generate a unique file path for the user's photo, incorporating a UUID to ensure uniqueness.
+    Generate a unique file path for the user's photo, incorporating a UUID to ensure uniqueness,
+    and save the photo there.
 
     Args:
         photo: The uploaded photo file.
@@ -44,6 +48,32 @@ def get_photo_path(photo, user, task_title, folder='passports'):
     return photo_path
 
 
+def submit_task(user, title, user_data, **fields):
+    """
+    Create a pending task for the user with a single insert.
+
+    Args:
+        user (models.Model): The user submitting the request.
+        title (str): The title of the task.
+        user_data (dict): The free-form data of the request.
+        **fields: Values of the indexed task columns (`visa`, `address`, `visa_country`).
+
+    Returns:
+        Task | None: The created task, or None if the same request is already pending.
+        In that case the photo uploaded for the request is removed; otherwise the
+        size variants of the photo are generated by the `make_photo_variants` job.
+    """
+    photo = user_data.get('photo')
+    # The job is committed together with the task, so a task never misses its variants.
+    with transaction.atomic():
+        task = Task.objects.create_pending(user=user, title=title, user_data=user_data, **fields)
+        if task is not None and photo:
+            enqueue('make_photo_variants', paths=[photo])
+    if task is None and photo:
+        delete_photo(photo)
+    return task
+
+
 def get_address(form_data):
     """
     Retrieve or create an address based on the provided form data.
@@ -75,9 +105,9 @@ def get_address(form_data):
 def create_passport(request):
     task_title = "create an internal passport"
     user = request.user
-    task = Task.objects.filter(user=user, title=task_title, status=0).exists()
-    if task:
-        messages.error(request, 'Ви вже відправили заявку на створення внутрішнього паспорту.')
+    duplicate_msg = 'Ви вже відправили заявку на створення внутрішнього паспорту.'
+    if request.method != 'POST' and Task.objects.filter(user=user, title=task_title, status=0).exists():
+        messages.error(request, duplicate_msg)
         return redirect('get_documents')
     if user.passport:
         messages.error(request, 'Ви вже маєте внутрішній паспорт.')
@@ -91,8 +121,9 @@ def create_passport(request):
             adr, created = get_address(address_form.cleaned_data)
             photo = photo_form.cleaned_data.get('photo')
             photo_path = get_photo_path(photo, user, task_title)
-            user_data = {'photo': photo_path, 'address_id': adr.pk}
-            task = Task.objects.create(user=user, title=task_title, user_data=user_data)
+            if not submit_task(user, task_title, {'photo': photo_path}, address=adr):
+                messages.error(request, duplicate_msg)
+                return redirect('get_documents')
             messages.success(request, 'Ваша заява на створення внутрішнього паспорту відправлена!')
             return redirect('get_documents')
         else:
@@ -110,9 +141,9 @@ def create_passport(request):
 def create_fpassport(request):
     task_title = "create a foreign passport"
     user = request.user
-    task = Task.objects.filter(user=user, title=task_title, status=0).exists()
-    if task:
-        messages.error(request, 'Ви вже відправили заявку на створення закордонного паспорту.')
+    duplicate_msg = 'Ви вже відправили заявку на створення закордонного паспорту.'
+    if request.method != 'POST' and Task.objects.filter(user=user, title=task_title, status=0).exists():
+        messages.error(request, duplicate_msg)
         return redirect('get_documents')
     if request.user.foreign_passport:
         messages.error(request, 'Ви вже маєте закордонний паспорт.')
@@ -126,7 +157,9 @@ def create_fpassport(request):
         if form.is_valid():
             photo = form.cleaned_data.get('photo')
             photo_path = get_photo_path(photo, user, task_title)
-            task = Task.objects.create(user=user, title=task_title, user_data={'photo': photo_path})
+            if not submit_task(user, task_title, {'photo': photo_path}):
+                messages.error(request, duplicate_msg)
+                return redirect('get_documents')
             messages.success(request, 'Ваша заявка на створення закордонного паспорту відправлена!')
             return redirect('get_documents')
         else:
@@ -145,8 +178,7 @@ def create_fpassport(request):
 @client_login_required
 def restore_passport(request, title, error_msg):
     user = request.user
-    task = Task.objects.filter(user=user, title=title, status=0).exists()
-    if task:
+    if request.method != 'POST' and Task.objects.filter(user=user, title=title, status=0).exists():
         messages.error(request, error_msg)
         return redirect('get_documents')
     if not user.passport:
@@ -158,7 +190,9 @@ def restore_passport(request, title, error_msg):
         if form.is_valid():
             photo = form.cleaned_data.get('photo')
             photo_path = get_photo_path(photo, user, title)
-            task = Task.objects.create(user=user, title=title, user_data={'photo': photo_path})
+            if not submit_task(user, title, {'photo': photo_path}):
+                messages.error(request, error_msg)
+                return redirect('get_documents')
             messages.success(request, 'Ваша заява на відновлення внутрішнього паспотру відправлена!')
             return redirect('get_documents')
         else:
@@ -194,8 +228,7 @@ def restore_passport_expiry(request):
 @client_login_required
 def restore_fpassport(request, title, error_msg):
     user = request.user
-    task = Task.objects.filter(user=user, title=title, status=0).exists()
-    if task:
+    if request.method != 'POST' and Task.objects.filter(user=user, title=title, status=0).exists():
         messages.error(request, error_msg)
         return redirect('get_documents')
     if not user.foreign_passport:
@@ -207,7 +240,9 @@ def restore_fpassport(request, title, error_msg):
         if form.is_valid():
             photo = form.cleaned_data.get('photo')
             photo_path = get_photo_path(photo, user, title)
-            task = Task.objects.create(user=user, title=title, user_data={'photo': photo_path})
+            if not submit_task(user, title, {'photo': photo_path}):
+                messages.error(request, error_msg)
+                return redirect('get_documents')
             messages.success(request, 'Ваша заяка на відновлення закордонного паспотру відправлена!')
             return redirect('get_documents')
         else:
@@ -243,9 +278,9 @@ def restore_fpassport_expiry(request):
 @client_login_required
 def change_address(request):
     task_title = 'change registation address'
-    task = Task.objects.filter(user=request.user, title=task_title, status=0).exists()
-    if task:
-        messages.error(request, 'Ви вже відправили заяву на оновлення адреси прописки.')
+    duplicate_msg = 'Ви вже відправили заяву на оновлення адреси прописки.'
+    if request.method != 'POST' and Task.objects.filter(user=request.user, title=task_title, status=0).exists():
+        messages.error(request, duplicate_msg)
         return redirect('get_documents')
     if not request.user.passport:
         messages.error(request, 'У вас ще нема паспорту, тому неможливе оновлення адреси прописки.')
@@ -255,7 +290,9 @@ def change_address(request):
         address_form = AddressForm(request.POST)
         if address_form.is_valid():
             adr, created = get_address(address_form.cleaned_data)
-            task = Task.objects.create(user=request.user, title=task_title, user_data={'address_id': adr.pk})
+            if not submit_task(request.user, task_title, {}, address=adr):
+                messages.error(request, duplicate_msg)
+                return redirect('get_documents')
             messages.success(request, 'Ваша заява на оновлення адреси прописки відправлена!')
             return redirect('get_documents')
         else:
@@ -271,9 +308,9 @@ def change_address(request):
 
 def change_data(request, task_title, UserDataForm, field):
     user = request.user
-    task = Task.objects.filter(user=user, title=task_title, status=0).exists()
-    if task:
-        messages.error(request, 'Ви вже відправили заяву на оновлення даних паспорту.')
+    duplicate_msg = 'Ви вже відправили заяву на оновлення даних паспорту.'
+    if request.method != 'POST' and Task.objects.filter(user=user, title=task_title, status=0).exists():
+        messages.error(request, duplicate_msg)
         return redirect('get_documents')
     if not user.passport:
         messages.error(request, 'У вас ще нема паспорту, тому неможливе оновлення ваших даних.')
@@ -287,7 +324,9 @@ def change_data(request, task_title, UserDataForm, field):
             field_value = user_form.cleaned_data.get(field)
             photo = photo_form.cleaned_data.get('photo')
             photo_path = get_photo_path(photo, user, task_title)
-            task = Task.objects.create(user=request.user, title=task_title, user_data={'photo': photo_path, field: field_value})
+            if not submit_task(user, task_title, {'photo': photo_path, field: field_value}):
+                messages.error(request, duplicate_msg)
+                return redirect('get_documents')
             messages.success(request, 'Ваша заява на оновлення даних паспорту відправлена!')
             return redirect('get_documents')
         else: